@@ -13,7 +13,6 @@
 
 import random
 from collections import defaultdict
-from copy import deepcopy
 
 class BGPnode:
 	''' 
@@ -30,7 +29,8 @@ class BGPnode:
 		(f) ASneighbors_preference: 	dictionary (initially empty) - dictionary with (i) keys the ASNs of neighbors and (ii) values the preferences of the neighbors for selection of BGP paths / tie breaker - values are float in [0,1]
 		(g) paths:				dictionary (initially empty) corresponding to the best paths per prefix - dictionary with (i) keys the IP prefixes and (ii) values the corresponding AS path given as a list (e.g., [ASNx, ASNy, ASNz, origin_ASN])
 		(h) all_paths:			dictionary of dictionaries (initially empty) representing the local FIB of BGP - dictionary with (i) keys the IP prefixes, (ii) keys (for each prefix) the ASN of the neighbor that sent the path, and (iii) values the corresponding AS path given as a list (e.g., [ASNx, ASNy, ASNz, origin_ASN])
-		(i) filters:			dictionary (initially empty) - dictionary with (i) keys the IPprefixes, and (ii) values sets of ASNs; if an ASN exists in the set, then the every path for the prefix that contains this ASN need to be filtered/discarded
+		(i) filters:			dictionary (initially empty) - dictionary with (i) keys the IPprefixes, and (ii) values sets (or frozensets, which may be shared by many nodes) of ASNs; if an ASN exists in the set, then the every path for the prefix that contains this ASN need to be filtered/discarded
+		(j) routing_generation:	integer - the generation (of the topology) of the routing tables, i.e., of the variables (c), (d), (g), (h), (i); see BGPtopology.clear_routing_information
 	'''
 
 	'''
@@ -50,6 +50,7 @@ class BGPnode:
 		self.paths = {} 
 		self.all_paths = defaultdict(dict)
 		self.filters = {}
+		self.routing_generation = Topology.routing_generation
 
 
 	
@@ -61,18 +62,21 @@ class BGPnode:
 	IF the given prefix does not exist in the "IPprefix" dictionary, 
 	THEN 	(i) add the prefix, 
 			(ii) set an empty path for this prefix in the "paths" dictionary, and
-			(iii) announce the prefix
+			(iii) announce the prefix (to all neighbors, except for the forbidden neighbors, which receive a withdrawal if the node had a path for the prefix before)
 
 	Input argument:
 		(a) IPprefix: the (owned) prefix to be added
 	'''
 	def add_prefix(self,IPprefix,forbidden_neighbors=None):
 		if not self.has_prefix(IPprefix):
+			had_path = bool(self.paths.get(IPprefix))
 			self.IPprefix.add(IPprefix)
 			self.paths[IPprefix] = []
 			if forbidden_neighbors is not None:
 				neighb_to_announce = set(self.ASneighbors.keys()).difference(set(forbidden_neighbors))
 				self.announce_path(IPprefix,list(neighb_to_announce))
+				if had_path:	# withdraw the path (for the prefix) that may have been announced earlier to the forbidden neighbors
+					self.Topology.send_withdrawals(self.ASN, IPprefix, [asn for asn in self.ASneighbors.keys() if asn not in neighb_to_announce])
 			else:
 				self.announce_path(IPprefix,list(self.ASneighbors.keys()))
 	'''
@@ -109,7 +113,7 @@ class BGPnode:
 
 
 	'''
-	Clears the routing tables, i.e. the dictionaries "paths" and "all_paths"
+	Clears the routing tables, i.e. the dictionaries "paths" and "all_paths", and sets their generation to the current generation of the topology
 	'''
 	def clear_routing_tables(self):
 		self.paths.clear() #self.paths = {} 
@@ -117,6 +121,7 @@ class BGPnode:
 		self.IPprefix.clear()	
 		self.hijacked_IPprefix.clear()
 		self.filters.clear()
+		self.routing_generation = self.Topology.routing_generation
 
 	### methods for	hijacked IP prefixes ###
 
@@ -189,12 +194,84 @@ class BGPnode:
 			self.ASneighbors_preference[ASN] = random.random()	# add a random preference to neighbor
 	
 
-	def remove_ASneighbor(self,ASN):
+	'''
+	Removes the given ASN from the AS neighbors, and (IF withdraw_paths==True) withdraws all the paths received from it (see the method "withdraw_paths_from_neighbor(...)").
+
+	Input arguments:
+		(a) ASN: the AS number of the AS neighbor to be removed
+		(b) withdraw_paths: True/False; e.g., False when several links are removed together, and the paths are withdrawn afterwards (see BGPtopology.remove_links)
+	'''
+	def remove_ASneighbor(self,ASN,withdraw_paths=True):
 		if self.has_ASneighbor(ASN): 
 			del self.ASneighbors[ASN]
 			del self.ASneighbors_preference[ASN]
-			# for prefix in self.all_paths.keys():
-			# 	self.withdraw_path(prefix,ASN)
+			if withdraw_paths:
+				self.withdraw_paths_from_neighbor(ASN)
+
+	'''
+	Withdraws the paths (for all prefixes) received from the given AS (e.g., after the link with the AS is removed), as if the AS had sent a withdrawal for each of them; i.e., the paths are discarded, and for the prefixes whose best path was from this AS, a new best path is selected and announced.
+	'''
+	def withdraw_paths_from_neighbor(self,ASN):
+		self.re_export_paths(self.discard_paths_from_neighbors([ASN]))
+
+	'''
+	Discards (without sending any message) the paths received from the given ASes, and for the prefixes whose best path was from one of these ASes, selects a new best path among the remaining paths.
+
+	Input arguments:
+		(a) list_of_ASNs: the ASNs of the (removed) AS neighbors
+
+	Returns:
+		The list of tuples (prefix, previous best path) of the prefixes whose best path has changed (and needs to be exported with the method "re_export_paths(...)")
+	'''
+	def discard_paths_from_neighbors(self,list_of_ASNs):
+		changed_prefixes = []
+		for IPprefix, paths_of_prefix in self.all_paths.items():
+			for ASN in list_of_ASNs:
+				paths_of_prefix.pop(ASN, None)
+			path = self.paths.get(IPprefix)
+			if path and (path[0] in list_of_ASNs) and (not self.has_prefix(IPprefix)) and (not self.has_hijacked_prefix(IPprefix)):
+				self.paths[IPprefix] = []
+				self.select_best_path(IPprefix)
+				changed_prefixes.append((IPprefix, path))
+		return changed_prefixes
+
+	'''
+	Announces again the best paths for the given prefixes, after they have changed (see the method "discard_paths_from_neighbors(...)"):
+	IF the node has a best path, THEN export it (the neighbors that received the previous best path, and to which the new one is not exported, receive a withdrawal; see the method "export_path(...)")
+	ELSE withdraw the prefix from the neighbors that received the previous best path
+
+	Input arguments:
+		(a) changed_prefixes: list of tuples (prefix, previous best path)
+	'''
+	def re_export_paths(self,changed_prefixes):
+		for (IPprefix, previous_path) in changed_prefixes:
+			if self.paths.get(IPprefix):
+				self.export_path(IPprefix, previous_path)
+			else:
+				neighbors_to_withdraw = self.get_neighbors_to_export(previous_path)
+				if neighbors_to_withdraw:
+					self.Topology.send_withdrawals(self.ASN, IPprefix, neighbors_to_withdraw)
+				elif self.Topology.path_indexes:	# no message is sent, but the best path has changed (see BGPtopology.get_path_index)
+					self.Topology.invalidate_path_index(IPprefix, self.ASN)
+
+	'''
+	Announces the paths of the node to a new AS neighbor (e.g., after a link is added), according to the export policy (see the method "export_path(...)"):
+	(i) the owned and hijacked prefixes are announced, and
+	(ii) the best path for every other prefix is announced, IF it is from a customer, or the new AS neighbor is a customer.
+	(The forbidden neighbors given to "add_prefix(...)" are not stored, i.e., an owned prefix is announced to every new AS neighbor.)
+
+	Input arguments:
+		(a) ASN: the AS number of the (new) AS neighbor
+	'''
+	def export_paths_to_neighbor(self,ASN):
+		if not self.has_ASneighbor(ASN):
+			return
+		for IPprefix in list(self.paths.keys()):
+			path = self.paths.get(IPprefix)
+			if self.has_prefix(IPprefix) or self.has_hijacked_prefix(IPprefix):
+				self.announce_path(IPprefix, [ASN])
+			elif path and (path[0] != ASN) and ((self.ASneighbors[path[0]] == -1) or (self.ASneighbors[ASN] == -1)):
+				self.announce_path(IPprefix, [ASN])
 	
 	'''
 	Checks if the AS neighbor exists in the "ASneighbors" dictionary.
@@ -273,9 +350,10 @@ class BGPnode:
 			if self.must_filter_path(IPprefix,new_path) or (self.ASN in new_path):
 				self.withdraw_path(IPprefix,new_path[0])
 			else:
+				previous_path = self.paths.get(IPprefix)
 				bool_export_path = self.add_received_path(IPprefix,new_path)
 				if bool_export_path:
-					self.export_path(IPprefix)
+					self.export_path(IPprefix, previous_path)
 
 
 	'''
@@ -377,12 +455,11 @@ class BGPnode:
 		(b) ASN:		the filter, i.e., the ASN whose announcements for the given prefix will be filtered out 
 	'''
 	def filter_path(self,IPprefix,ASN):
+		if self.Topology.compact_routes or self.Topology.compact_RIBs:	# the compact routes are read-only (see BGPtopology.expand_compact_routes)
+			self.Topology.expand_compact_routes(IPprefix)
 		self.add_filter(IPprefix,ASN)
 		if self.paths.get(IPprefix):	
-			copy_of_all_paths = deepcopy(self.all_paths[IPprefix])	
-			for search_key,search_path in copy_of_all_paths.items():
-				if self.must_filter_path(IPprefix,search_path):
-					del self.all_paths[IPprefix][search_key]
+			self.remove_filtered_paths(IPprefix)
 			my_best_path = list(self.paths[IPprefix])		
 			if self.must_filter_path(IPprefix,my_best_path): 
 				self.withdraw_path(IPprefix,my_best_path[0])
@@ -407,13 +484,50 @@ class BGPnode:
 			if self.all_paths[IPprefix].get(w_ASN):
 				del self.all_paths[IPprefix][w_ASN]		# remove it from local FIB
 			if w_ASN == list(self.paths[IPprefix])[0]:	# if the withdrawn path is my current best path
-				for neighbor in self.ASneighbors.keys(): # make all my neighbors to withdraw the path (in case I have announced it to them)
-					self.Topology.get_node(neighbor).withdraw_path(IPprefix,self.ASN)	# do withdrawal to neighbor
-				self.paths[IPprefix] = []	# remove it from my best path
-				self.select_best_path(IPprefix)	# select a new best path
-				if self.paths.get(IPprefix):
-					self.export_path(IPprefix)	# export the new best path
+				# make all my neighbors to withdraw the path (in case I have announced it to them), and then replace the withdrawn path
+				self.Topology.send_withdrawals(self.ASN, IPprefix, list(self.ASneighbors.keys()), node_to_replace_path=self)
+
+	'''
+	Replaces the best path for the given prefix, after it has been withdrawn (and the withdrawal has been sent to the neighbors; see the method "withdraw_path(...)").
 
+	(i) removes the best path, (ii) selects a new best path, and (iii) exports the new best path (if any) to the neighbors
+
+	Input arguments:
+		(a) IPprefix:	the prefix for which the path has been withdrawn
+	'''
+	def replace_withdrawn_path(self,IPprefix):
+		self.paths[IPprefix] = []	# remove it from my best path
+		self.select_best_path(IPprefix)	# select a new best path
+		if self.paths.get(IPprefix):
+			self.export_path(IPprefix)	# export the new best path
+
+
+	'''
+	Removes (without sending any message) the stored paths in the "all_paths" dictionary for the given prefix that must be filtered (see the method "must_filter_path(...)").
+	The keys of the paths to be removed are collected first, i.e., the stored paths are not copied.
+	'''
+	def remove_filtered_paths(self,IPprefix):
+		all_paths = self.all_paths.get(IPprefix)
+		if all_paths:
+			for search_key in [key for key, search_path in all_paths.items() if self.must_filter_path(IPprefix,search_path)]:
+				del all_paths[search_key]
+
+	'''
+	Removes the stored paths for the given prefix that must be filtered, and IF the best path must be filtered, selects a new best path among the remaining paths (without sending any message); it is used to apply the filters of many nodes in bulk (see BGPtopology.filter_paths).
+
+	Returns:
+		A list with the tuple (prefix, previous best path) IF the best path has changed (and needs to be exported with the method "re_export_paths(...)"), otherwise an empty list
+	'''
+	def discard_filtered_paths(self,IPprefix):
+		if self.has_prefix(IPprefix) or self.has_hijacked_prefix(IPprefix):
+			return []
+		self.remove_filtered_paths(IPprefix)
+		path = self.paths.get(IPprefix)
+		if path and self.must_filter_path(IPprefix,path):
+			self.paths[IPprefix] = []
+			self.select_best_path(IPprefix)
+			return [(IPprefix, path)]
+		return []
 
 	'''
 	Adds a filter for the given prefix.
@@ -427,11 +541,30 @@ class BGPnode:
 		(b) ASN:		the filter, i.e., the ASN whose announcements for the given prefix will be filtered out 
 	'''
 	def add_filter(self,IPprefix,ASN):
-		if self.filters.get(IPprefix):
-			self.filters[IPprefix].add(ASN)
+		filters = self.filters.get(IPprefix)
+		if isinstance(filters, frozenset):	# a set shared with other nodes (see the method "add_filters(...)"); copy it before changing it
+			filters = set(filters)
+			self.filters[IPprefix] = filters
+		if filters:
+			filters.add(ASN)
 		else:
 			self.filters[IPprefix] = set([ASN])
 
+	'''
+	Adds the given (frozen) set of ASNs as filters for the given prefix.
+	IF there are no filters for the given prefix, the given set is stored as it is, i.e., it can be shared by many nodes (e.g., the same filters for all the nodes that do route origin validation); it is copied by the method "add_filter(...)" before it is changed.
+
+	Input arguments:
+		(a) IPprefix:	the prefix for which the filters will be added
+		(b) ASNs:		frozenset of the ASNs whose announcements for the given prefix will be filtered out
+	'''
+	def add_filters(self,IPprefix,ASNs):
+		filters = self.filters.get(IPprefix)
+		if filters:
+			self.filters[IPprefix] = filters | ASNs
+		else:
+			self.filters[IPprefix] = ASNs
+
 	'''
 	Checks if the received path must be filtered, based on the stored filters.
 	
@@ -439,6 +572,7 @@ class BGPnode:
 	THEN 	FOR EACH ASN in the given path
 				IF the ASN exists in the filter for the given prefix (i.e. the dictionary "filters")
 				THEN 	return True (i.e., filter the path)
+	(the check is done with a single set operation, i.e., one hash lookup per ASN in the path)
 
 	Input arguments:
 		(a) IPprefix:	the prefix for which the path has to be checked if it will be filtered 
@@ -448,10 +582,9 @@ class BGPnode:
 		TRUE if the path must be filtered, FALSE otherwise
 	'''
 	def must_filter_path(self,IPprefix,path):
-		if self.filters.get(IPprefix):
-			for ASN in path:
-				if ASN in self.filters[IPprefix]:
-					return True
+		filters = self.filters.get(IPprefix)
+		if filters:
+			return not filters.isdisjoint(path)
 		return False
 
 	'''
@@ -520,23 +653,52 @@ class BGPnode:
 	IF the path for the given prefix is from a customer AS neighbor,
 	THEN 	the path must be announced to all AS neighbors (expect for the neighbor that sent it)
 	ELSE 	the path must be announced to all customer AS neighbors
+	IF a previous best path is given (i.e., it has been exported, and the new path replaces it),
+	THEN 	the AS neighbors that received the previous path, but do not receive the new one, receive a withdrawal, i.e.,
+			(i) the neighbor that sent the new path, IF the previous path was exported to it, and
+			(ii) the peer/provider AS neighbors, IF the previous path was from a customer and the new one is not
 
 	Input arguments:
-		(a) IPprefix:	the prefix whose the path needs to be exported
+		(a) IPprefix:		the prefix whose the path needs to be exported
+		(b) previous_path:	(optional) the previous best path for the prefix (i.e., list of ASNs); None (or an empty path) if there was no previous path, or it has already been withdrawn from all the neighbors (see the method "replace_withdrawn_path(...)")
 	'''
-	def export_path(self,IPprefix):
+	def export_path(self,IPprefix,previous_path=None):
 		neighbors_to_announce = set()
 		#neighbor_who_sent_the_announcement = self.ASneighbors[self.paths[IPprefix][0]]
 		neighbor_who_sent_the_announcement = self.paths[IPprefix][0]
-		if  self.ASneighbors[neighbor_who_sent_the_announcement] == -1:	# (if) path received from customer .... announce to all
+		from_customer = (self.ASneighbors[neighbor_who_sent_the_announcement] == -1)
+		if  from_customer:	# (if) path received from customer .... announce to all
 			neighbors_to_announce = set(self.ASneighbors.keys())
 		else:				# (else) path received from peer/provider ... announce to all customers 
 			for asn,peer_type in self.ASneighbors.items():
 				if peer_type == -1:
 					neighbors_to_announce.add(asn)
 		neighbors_to_announce.discard(neighbor_who_sent_the_announcement)	# do NOT announce to the neighbor from which the path is received
+		if previous_path:
+			previous_neighbor = previous_path[0]
+			previous_from_customer = (self.ASneighbors.get(previous_neighbor, -1) == -1)	# (a removed neighbor is treated as a customer, i.e., the previous path may have been exported to all neighbors)
+			if previous_from_customer and (not from_customer):
+				neighbors_to_withdraw = [asn for asn,peer_type in self.ASneighbors.items() if (peer_type != -1) and (asn != previous_neighbor)]
+			elif (neighbor_who_sent_the_announcement != previous_neighbor) and (previous_from_customer or from_customer):
+				neighbors_to_withdraw = [neighbor_who_sent_the_announcement]
+			else:
+				neighbors_to_withdraw = []
+			if neighbors_to_withdraw:
+				self.Topology.send_withdrawals(self.ASN, IPprefix, neighbors_to_withdraw)
 		if neighbors_to_announce:
 			self.announce_path(IPprefix, neighbors_to_announce)
+		elif self.Topology.path_indexes:	# no message is sent, but the best path has changed (see BGPtopology.get_path_index)
+			self.Topology.invalidate_path_index(IPprefix, self.ASN)
+
+	'''
+	Returns the list of the AS neighbors to which the given (best) path is exported (see the method "export_path(...)"), i.e., all the AS neighbors IF the path is from a customer, otherwise the customer AS neighbors, except for the neighbor that sent the path.
+	The path may be from a neighbor that is no longer an AS neighbor (e.g., after the link has been removed); it is treated as a path from a customer.
+	'''
+	def get_neighbors_to_export(self,path):
+		neighbor = path[0]
+		if self.ASneighbors.get(neighbor, -1) == -1:
+			return [asn for asn in self.ASneighbors.keys() if asn != neighbor]
+		return [asn for asn,peer_type in self.ASneighbors.items() if (peer_type == -1) and (asn != neighbor)]
 
 	'''
 	Announces the path for the given prefix to the given set of AS neighbors. 
@@ -544,14 +706,12 @@ class BGPnode:
 	IF a certain path is not given
 	THEN 	(i) get the path that is stored in the "paths" dictionary, and
 			(ii) add to it the self.ASN
-	Announce the (given/stored) path to the given AS neighbors
+	Announce the (given/stored) path to the given AS neighbors (how the announcements are delivered depends on the propagation mode of the topology; see BGPtopology.set_propagation_mode)
 	'''
 	def announce_path(self,IPprefix, neighbors_to_announce, path_to_announce=None):
 		if path_to_announce is None:
-			path_to_announce = list(self.paths[IPprefix])
-			path_to_announce.insert(0,self.ASN)
-		for neighbor in neighbors_to_announce:
-			self.Topology.get_node(neighbor).receive_path(IPprefix,path_to_announce)	# do announcement to neighbor
+			path_to_announce = [self.ASN] + self.paths[IPprefix]
+		self.Topology.send_announcements(self.ASN, IPprefix, neighbors_to_announce, path_to_announce)	# do announcement to neighbors
 
 
 
@@ -12,8 +12,26 @@
 
 import csv
 import json
+import itertools
+import os
+from collections import deque
+import numpy as np
 from BGPnode import BGPnode
 from IXPNode import IXPNode
+from topology_bulk_loader import LoadReport, read_CAIDA_rows, dedupe_links, iter_json_items, read_p2p_link_rows, paused_garbage_collection
+from gao_rexford_routing import get_routing_arrays, compute_batch_of_anycast_routes
+from compact_routes import ParentPointerRoutes, CompactPaths, CompactRIB, CompactAllPaths
+from path_index import PathIndex
+from routing_statistics import RoutingStatistics
+from routing_export import RoutingStateWriter, write_topology_routes
+from propagation_instrumentation import PropagationCounters, get_instrumented_node_class
+
+SNAPSHOT_VERSION = 1
+
+PROPAGATION_MODES = ('recursive', 'dfs', 'fifo', 'relationship')
+ANNOUNCEMENT = 0
+WITHDRAWAL = 1
+NO_NEIGHBOR = object()
 
 class BGPtopology:
 	''' 
@@ -23,6 +41,17 @@ class BGPtopology:
 
 	class variables: 
 		(a) list_of_all_BGP_nodes:	dictionary (initially empty) - dictionary with (i) keys the ASNs of member nodes and (ii) values the objects of type BGPnode (corresponding to each member node)
+		(b) propagation_mode:		string (default 'recursive') - how the BGP messages (announcements and withdrawals) are delivered among the nodes; see the method "set_propagation_mode(...)"
+		(c) compact_routes:			dictionary (initially empty) - dictionary with (i) keys the IP prefixes whose best paths are kept in compact form and (ii) values the corresponding ParentPointerRoutes; see the method "set_compact_routes(...)"
+		(d) compact_RIBs:			dictionary (initially empty) - dictionary with (i) keys the IP prefixes whose received routes are kept in compact form and (ii) values the corresponding CompactRIB; see the method "set_compact_RIB(...)"
+		(e) path_indexes:			dictionary (initially empty) - dictionary with (i) keys IP prefixes and (ii) values the corresponding PathIndex; see the method "get_path_index(...)"
+		(f) routing_generation:		integer (initially 0) - the generation of the routing information; the routing tables of a node of an older generation are treated as empty (see the method "clear_routing_information(...)")
+		(g) list_of_all_IXP_nodes:	dictionary (only after the IXPs are loaded) - dictionary with (i) keys the IXP ids and (ii) values the objects of type IXPNode
+		(h) IXPs_of_ASN:			dictionary (or None, until it is needed) - reverse index of the IXP members, with (i) keys ASNs and (ii) values the set of the IXP ids of which the AS is member; see the method "get_IXPs_of_ASN(...)"
+		(i) node_class:				class (default BGPnode) - the class of the node objects; an instrumented subclass while the instrumentation is enabled (see the method "enable_instrumentation(...)")
+		(j) instrumentation:		PropagationCounters (or None, if the instrumentation is disabled) - the counters of the propagation of the BGP messages; see propagation_instrumentation.py
+		(k) links_version:			integer (initially 0) - increased whenever nodes or links are added or removed; e.g., the hash of the topology is kept until the links change (see simulation_cache.get_topology_hash)
+		(l) compact_routes_version:	integer (initially 0) - increased whenever compact routes (or compact RIBs) are set or removed; the nodes keep the prefixes of their compact routes until it changes (see compact_routes.CompactPaths)
 	'''
 
 
@@ -31,6 +60,21 @@ class BGPtopology:
 	'''
 	def __init__(self):
 		self.list_of_all_BGP_nodes = {}
+		self.propagation_mode = 'recursive'
+		self.processing_messages = False
+		self.message_stack = []
+		self.message_inboxes = [{}, {}, {}]
+		self.ready_nodes = [deque(), deque(), deque()]
+		self.compact_routes = {}
+		self.compact_RIBs = {}
+		self.compact_routes_index = None
+		self.path_indexes = {}
+		self.routing_generation = 0
+		self.IXPs_of_ASN = None
+		self.node_class = BGPnode
+		self.instrumentation = None
+		self.links_version = 0
+		self.compact_routes_version = 0
 
 	
 	'''
@@ -44,26 +88,46 @@ class BGPtopology:
 	'''
 	def add_node(self,ASN):
 		if not self.has_node(ASN):
-			self.list_of_all_BGP_nodes[ASN] = BGPnode(ASN,self)
+			self.list_of_all_BGP_nodes[ASN] = self.node_class(ASN,self)
+			self.links_version += 1
 
 	
 	'''
-	Remove node from topology.
-	Not in use !!!
+	Removes a node from the topology.
+
+	IF the given node exists in the topology,
+	THEN 	(i) remove all its links (the paths received over these links are withdrawn, and the routing is updated incrementally; see the method "remove_links(...)"),
+			(ii) remove the node from the members of the IXPs (if any), and
+			(iii) delete the node
 
-	TODO: need to implement BGP path withdrawals at the BGPPnode class first, and a destructor, and then can only define this method
+	Input argument:
+		(a) ASN: the ASN of the node to be removed
 	'''
 	def remove_node(self,ASN):
-		pass
-		#if self.has_node(ASN):
-		#	del self.list_of_all_BGP_nodes[ASN]
+		if self.has_node(ASN):
+			self.remove_links([(ASN, neighbor) for neighbor in list(self.get_node(ASN).ASneighbors.keys())])
+			if getattr(self, 'list_of_all_IXP_nodes', None) is not None:
+				for ixp_id in list(self.get_IXPs_of_ASN(ASN)):
+					self.remove_IXP_member(ixp_id, ASN)
+			self.delete_node(ASN)
+
+	'''
+	Deletes the given node (without links) from the "list_of_all_BGP_nodes" dictionary.
+	'''
+	def delete_node(self,ASN):
+		if self.compact_routes or self.compact_RIBs:
+			self.expand_compact_routes()
+		del self.list_of_all_BGP_nodes[ASN]
+		self.links_version += 1
+		self.invalidate_path_index(ASN=ASN)
 
 
 	'''
 	Return a node (i.e. the BGPnode object) belonging to the topology.
 	
 	IF the given node exists in the "list_of_all_BGP_nodes" dictionary, 
-	THEN return the node
+	THEN 	(i) IF the routing tables of the node are of an older generation (see the method "clear_routing_information(...)"), clear them, and
+			(ii) return the node
 	
 	Input argument:
 		(a) ASN: the ASN of the node to be returned
@@ -72,8 +136,16 @@ class BGPtopology:
 		A BGPnode object corresponding to the given ASN
 	'''
 	def get_node(self,ASN):
-		if self.has_node(ASN):
-			return self.list_of_all_BGP_nodes[ASN]
+		node = self.list_of_all_BGP_nodes.get(ASN)
+		if (node is not None) and (node.routing_generation != self.routing_generation):
+			node.clear_routing_tables()
+		return node
+
+	'''
+	Returns the node of the given ASN (or None), to read its routing information; for a BGPtopology the same as "get_node(...)" (a CSRtopology does not create a permanent object for a node without routing information).
+	'''
+	def peek_node(self,ASN):
+		return self.get_node(ASN)
 
 	
 	'''
@@ -100,6 +172,7 @@ class BGPtopology:
 	THEN 	add them.
 	IF a link between the two given nodes does not exist,
 	THEN 	add ASN1 to ASN2's neighbors and ASN2 to ASN1's neighbors, and set the peering types according to the given type.
+			IF the nodes have routing information (i.e., paths), each node announces its paths to the other according to the export policy (see BGPnode.export_paths_to_neighbor), and the routing is updated incrementally.
 	
 	Input arguments:
 		(a) ASN1: the AS number of the first node
@@ -107,27 +180,90 @@ class BGPtopology:
 		(c) peering_type: an int (-1 or 0) that denotes the peering relation type between the two nodes; IF -1 then ASN2 is customer of ASN1, ELSE IF 0 then the nodes are peers
 	'''
 	def add_link(self,ASN1, ASN2,peering_type):
+		if self.compact_routes or self.compact_RIBs:
+			self.expand_compact_routes()
 		if not self.has_node(ASN1):
 			self.add_node(ASN1)
 		if not self.has_node(ASN2):
 			self.add_node(ASN2)
 		if not self.has_link(ASN1,ASN2):
+			node1 = self.get_node(ASN1)
+			node2 = self.get_node(ASN2)
 			if peering_type == -1:
-				self.list_of_all_BGP_nodes[ASN1].add_ASneighbor(ASN2,'customer')
-				self.list_of_all_BGP_nodes[ASN2].add_ASneighbor(ASN1,'provider')
+				node1.add_ASneighbor(ASN2,'customer')
+				node2.add_ASneighbor(ASN1,'provider')
 			elif peering_type == 0:
-				self.list_of_all_BGP_nodes[ASN1].add_ASneighbor(ASN2,'peer')
-				self.list_of_all_BGP_nodes[ASN2].add_ASneighbor(ASN1,'peer')
+				node1.add_ASneighbor(ASN2,'peer')
+				node2.add_ASneighbor(ASN1,'peer')
 			else:
 				print('ERROR: Not valid peering relation')
+				return
+			self.links_version += 1
+			if node1.paths:		# (only the nodes with routing information announce paths)
+				node1.export_paths_to_neighbor(ASN2)
+			if node2.paths:
+				node2.export_paths_to_neighbor(ASN1)
 		else:
 			print('ERROR: a link already exists')
 
 
+	'''
+	Removes the link between the two given nodes (see the method "remove_links(...)").
+	'''
 	def remove_link(self,ASN1, ASN2):
-		if self.has_node(ASN1) and self.has_node(ASN2) and self.has_link(ASN1,ASN2):
-			self.list_of_all_BGP_nodes[ASN1].remove_ASneighbor(ASN2)
-			self.list_of_all_BGP_nodes[ASN2].remove_ASneighbor(ASN1)
+		self.remove_links([(ASN1, ASN2)])
+
+
+	'''
+	Removes the given links from the topology, and updates the routing incrementally:
+	(i) removes both ends of every link (i.e., ASN1 from ASN2's neighbors and ASN2 from ASN1's neighbors),
+	(ii) each end discards the paths it has received from the other end, and selects a new best path where needed (see BGPnode.discard_paths_from_neighbors), and
+	(iii) the ends whose best paths have changed announce them (or withdraw them), and only the nodes affected by these messages update their paths.
+	All the links are removed before any message is sent, so that no path is announced over (or selected from) a removed link.
+
+	Input arguments:
+		(a) list_of_links: list of tuples (ASN1, ASN2); links that do not exist are ignored
+	'''
+	def remove_links(self,list_of_links):
+		if self.compact_routes or self.compact_RIBs:
+			self.expand_compact_routes()
+		removed_links = []
+		for (ASN1, ASN2) in list_of_links:
+			if self.has_node(ASN1) and self.has_node(ASN2) and self.has_link(ASN1,ASN2):
+				self.get_node(ASN1).remove_ASneighbor(ASN2,withdraw_paths=False)
+				self.get_node(ASN2).remove_ASneighbor(ASN1,withdraw_paths=False)
+				removed_links.append((ASN1, ASN2))
+		if removed_links:
+			self.links_version += 1
+		self.update_routing_after_removed_links(removed_links)
+
+
+	'''
+	Updates the routing after the given links have been removed (see the method "remove_links(...)"): every end discards (at once) the paths received from all its removed neighbors, and then the ends whose best paths have changed export them.
+	Only the ends with routing information are considered (see the method "get_node_with_routing_information(...)").
+
+	Input arguments:
+		(a) removed_links: list of tuples (ASN1, ASN2) with the ends of the removed links
+	'''
+	def update_routing_after_removed_links(self,removed_links):
+		removed_neighbors = {}
+		for (ASN1, ASN2) in removed_links:
+			for (ASN, neighbor) in ((ASN1, ASN2), (ASN2, ASN1)):
+				removed_neighbors.setdefault(ASN, []).append(neighbor)
+		changed = []
+		for ASN, list_of_ASNs in removed_neighbors.items():
+			node = self.get_node_with_routing_information(ASN)
+			if node is not None:
+				changed.append((node, node.discard_paths_from_neighbors(list_of_ASNs)))
+		for (node, changed_prefixes) in changed:
+			node.re_export_paths(changed_prefixes)
+
+
+	'''
+	Returns the node (i.e. the BGPnode object) of the given ASN, if the node may have routing information (for a BGPtopology, every node), otherwise None.
+	'''
+	def get_node_with_routing_information(self,ASN):
+		return self.get_node(ASN)
 
 
 	'''
@@ -183,6 +319,460 @@ class BGPtopology:
 			self.get_node(ASN).do_hijack(IPprefix,hijack_type)
 
 
+	'''
+	Makes the given nodes filter the paths for the given prefix that contain any of the given ASNs (e.g., route origin validation by many ASes at once), and updates the routing in bulk:
+	(i) every given node adds the filters (one frozenset shared by all the nodes), removes the filtered paths it has received, and selects a new best path IF its best path is filtered (see BGPnode.discard_filtered_paths), and
+	(ii) the nodes whose best paths have changed announce them (or withdraw them); i.e., the messages are sent only after all the filters are in place.
+	The resulting routing is the same as calling "BGPnode.filter_path(...)" for every node and ASN, and (for the paths received afterwards) the filters are applied by BGPnode.receive_path.
+
+	Input arguments:
+		(a) IPprefix: the prefix
+		(b) list_of_nodes: the ASNs of the nodes that filter the paths
+		(c) filtered_ASNs: the ASNs whose paths (for the prefix) are filtered
+	'''
+	def filter_paths(self,IPprefix,list_of_nodes,filtered_ASNs):
+		if self.compact_routes or self.compact_RIBs:
+			self.expand_compact_routes(IPprefix)
+		filtered_ASNs = frozenset(filtered_ASNs)
+		changed = []
+		for ASN in list_of_nodes:
+			if self.has_node(ASN):
+				node = self.get_node(ASN)
+				node.add_filters(IPprefix, filtered_ASNs)
+				changed.append((node, node.discard_filtered_paths(IPprefix)))
+		for (node, changed_prefixes) in changed:
+			node.re_export_paths(changed_prefixes)
+
+
+	'''
+	Simulates a batch of anycast configurations (i.e., sets of anycasters announcing the same prefix) over the topology, and returns the catchment of each configuration.
+	Equivalent to running for each configuration "add_prefix(...)" for all its anycasters (and, optionally, "create_Rgraph_from_Topo(...)") and then "clear_routing_information()", but
+	the routes are computed without BGP messages (see gao_rexford_routing.py) for chunks of configurations together, and the routing information of the nodes is not changed.
+
+	Input arguments:
+		(a) list_of_anycasters: list with the list of anycasters (ASNs) of each configuration
+		(b) list_of_forbidden_neighbors: (optional) list with one entry per configuration, either None or a dictionary with (i) keys anycasters and (ii) values the list of neighbors to which the anycaster does not announce the prefix
+		(c) with_Rgraph_edges: IF True, returns also the edges of the Rgraph of each configuration
+		(d) shortest_path_preference: True/False, as in "create_Rgraph_from_Topo(...)" (used only if with_Rgraph_edges==True)
+		(e) chunk_size: the number of configurations that are computed together (the memory needed grows with chunk_size x nb_nodes)
+
+	Returns:
+		A tuple (ASNs, origins, list_of_Rgraph_edges), where
+			ASNs:					list of the ASNs of the nodes (as in "get_CSR_arrays()")
+			origins:				numpy array (int32) of shape (nb_of_configurations, nb_nodes), with the index (in ASNs) of the anycaster each node routes to in each configuration (the anycaster itself for anycasters, and -1 for nodes without route)
+			list_of_Rgraph_edges:	None, or (IF with_Rgraph_edges==True) a list with the edges of the Rgraph of each configuration (see AnycastRoutes.get_Rgraph_edges)
+	'''
+	def simulate_anycast_configurations(self, list_of_anycasters, list_of_forbidden_neighbors=None, with_Rgraph_edges=False, shortest_path_preference=False, chunk_size=32):
+		routing_arrays = get_routing_arrays(self)
+		nb_configurations = len(list_of_anycasters)
+		if list_of_forbidden_neighbors is None:
+			list_of_forbidden_neighbors = [None]*nb_configurations
+		origins = np.empty((nb_configurations, routing_arrays.nb_nodes), dtype=np.int32)
+		list_of_Rgraph_edges = [] if with_Rgraph_edges else None
+		for start in range(0, nb_configurations, chunk_size):
+			end = min(start+chunk_size, nb_configurations)
+			batch = compute_batch_of_anycast_routes(self, list_of_anycasters[start:end], list_of_forbidden_neighbors[start:end], routing_arrays=routing_arrays)
+			origins[start:end] = batch.origin
+			if with_Rgraph_edges:
+				for k in range(batch.get_nb_of_configurations()):
+					list_of_Rgraph_edges.append(batch.get_routes(k).get_Rgraph_edges(shortest_path_preference=shortest_path_preference))
+		return (routing_arrays.ASNs, origins, list_of_Rgraph_edges)
+
+
+
+	### methods for compact routes ###
+
+	'''
+	Sets the best paths of all the nodes for the given prefix to the given compact routes (see compact_routes.py), i.e., the nodes do not keep a list per path, and their paths are reconstructed when they are requested (e.g., "BGPnode.get_path(...)" or "BGPnode.paths.get(...)").
+	The paths of the prefix that are stored in the nodes (e.g., the empty paths of the anycasters) are returned as they are, i.e., they take precedence over the compact routes.
+	The compact routes are not changed by BGP messages or changes of the links; before a BGP message for the prefix is sent, or the links are changed, they are written back to the nodes (see the method "expand_compact_routes(...)"), and they are removed by the method "clear_routing_information()".
+
+	Input arguments:
+		(a) IPprefix: the prefix
+		(b) routes: a ParentPointerRoutes object
+	'''
+	def set_compact_routes(self,IPprefix,routes):
+		for ASN in self.get_all_nodes_ASNs():
+			node = self.get_node_with_routing_information(ASN)
+			if (node is not None) and (not isinstance(node.paths, CompactPaths)):
+				node.paths = CompactPaths(node, node.paths)
+		self.compact_routes[IPprefix] = routes
+		self.compact_routes_version += 1
+		self.invalidate_path_index(IPprefix)
+
+
+	'''
+	Sets the routes received by all the nodes for the given prefix (i.e., "all_paths") to the given compact RIB (see compact_routes.py); the nodes do not keep a dictionary of paths for the prefix, and "BGPnode.all_paths[IPprefix]" returns a read-only view of the compact RIB.
+	As for the compact routes (see the method "set_compact_routes(...)"), the compact RIB is not changed by BGP messages or changes of the links, i.e., it is written back to the nodes before them (see the method "expand_compact_routes(...)").
+
+	Input arguments:
+		(a) IPprefix: the prefix
+		(b) RIB: a CompactRIB object (whose routes must be the compact routes of the prefix)
+	'''
+	def set_compact_RIB(self,IPprefix,RIB):
+		for ASN in self.get_all_nodes_ASNs():
+			node = self.get_node_with_routing_information(ASN)
+			if (node is not None) and (not isinstance(node.all_paths, CompactAllPaths)):
+				node.all_paths = CompactAllPaths(node, node.all_paths)
+		self.compact_RIBs[IPprefix] = RIB
+		self.compact_routes_version += 1
+
+
+	'''
+	Returns a tuple (ASNs, ASN_to_index) with the ASNs of the nodes and their indices, used by the compact routes; it is calculated once and shared by the compact routes of all prefixes (until the routing information is cleared, or the number of nodes changes).
+	'''
+	def get_compact_routes_index(self):
+		if (self.compact_routes_index is None) or (len(self.compact_routes_index[0]) != self.get_nb_nodes()):
+			ASNs = self.get_all_nodes_ASNs()
+			self.compact_routes_index = (ASNs, {ASN:i for i,ASN in enumerate(ASNs)})
+		return self.compact_routes_index
+
+
+	'''
+	Converts the (converged) best paths of all the nodes for the given prefix into compact routes (see the method "set_compact_routes(...)"), and removes the corresponding lists from the nodes.
+	A node keeps only the next hop and the length of its path, IF its path is the path of its next hop (i.e., [next_hop] + the path of the next hop); otherwise (e.g., for the paths of the hijackers) the path is kept explicitly in the compact routes.
+	The paths of the owners and of the hijackers of the prefix are kept in the nodes (as well).
+	IF compact_RIB==True, the received routes (i.e., "all_paths") are converted as well into a compact RIB (see the method "set_compact_RIB(...)"), in the same way.
+	This is typically called after a BGP simulation (e.g., "add_prefix(...)" for all the anycasters), to reduce the memory needed for the routes of the prefix.
+
+	Input arguments:
+		(a) IPprefix: the prefix
+		(b) compact_RIB: True/False (see above)
+
+	Returns:
+		The ParentPointerRoutes of the prefix
+	'''
+	def compact_routing_information(self,IPprefix,compact_RIB=True):
+		(ASNs, ASN_to_index) = self.get_compact_routes_index()
+		next_hop = np.full(len(ASNs), -1, dtype=np.int32)
+		path_length = np.full(len(ASNs), -1, dtype=np.int32)
+		explicit_paths = {}
+		nodes = [self.get_node_with_routing_information(ASN) for ASN in ASNs]
+		paths = [node.paths.get(IPprefix) if node is not None else None for node in nodes]
+
+		if compact_RIB:
+			RIB_indptr = np.zeros(len(ASNs)+1, dtype=np.int64)
+			RIB_neighbors = []
+			RIB_lengths = []
+			RIB_origins = []
+			RIB_explicit_paths = {}
+			for i, node in enumerate(nodes):
+				received = node.all_paths.get(IPprefix) if node is not None else None
+				if received:
+					for neighbor, path in received.items():
+						n = ASN_to_index[neighbor]
+						if (paths[n] is None) or (path[1:] != paths[n]):
+							RIB_explicit_paths[len(RIB_neighbors)] = path
+						RIB_neighbors.append(n)
+						RIB_lengths.append(len(path))
+						RIB_origins.append(ASN_to_index.get(path[-1], -1))
+				if (node is not None) and dict.__contains__(node.all_paths, IPprefix):
+					del node.all_paths[IPprefix]
+				RIB_indptr[i+1] = len(RIB_neighbors)
+
+		for i, (node, path) in enumerate(zip(nodes, paths)):
+			if path is None:
+				continue
+			if node.has_prefix(IPprefix):
+				path_length[i] = 0
+				continue
+			if not path:	# the path has been withdrawn (i.e., no route)
+				del node.paths[IPprefix]
+				continue
+			path_length[i] = len(path)
+			n = ASN_to_index.get(path[0])
+			if (not node.has_hijacked_prefix(IPprefix)) and (n is not None) and (paths[n] is not None) and (path[1:] == paths[n]):
+				next_hop[i] = n
+			else:
+				explicit_paths[i] = path
+			if not node.has_hijacked_prefix(IPprefix):
+				del node.paths[IPprefix]
+		routes = ParentPointerRoutes(ASNs, ASN_to_index, next_hop, path_length, explicit_paths)
+		self.set_compact_routes(IPprefix, routes)
+		if compact_RIB:
+			self.set_compact_RIB(IPprefix, CompactRIB(routes, RIB_indptr, RIB_neighbors, RIB_lengths, RIB_origins, RIB_explicit_paths))
+		return routes
+
+
+	'''
+	Writes the compact routes and the compact RIB of the given prefix (or of all the prefixes) back to the nodes, i.e., as lists of ASNs in "paths" and dictionaries in "all_paths", and removes them from the topology.
+	It is called before the routing information of the prefix changes (i.e., a BGP message for the prefix is sent; see the methods "send_announcements(...)" and "send_withdrawals(...)"), or before the links change (for all the prefixes),
+	since the compact routes are read-only, and the paths of the nodes (incl. the ones reconstructed from the next hops) would not follow the changes.
+	The paths stored in the nodes take precedence over the compact routes (see the method "set_compact_routes(...)"), i.e., they are not replaced.
+
+	Input arguments:
+		(a) IPprefix: the prefix; IF None, all the prefixes with compact routes (or a compact RIB)
+	'''
+	def expand_compact_routes(self,IPprefix=None):
+		if IPprefix is None:
+			list_of_prefixes = list(self.compact_routes.keys()) + [prefix for prefix in self.compact_RIBs.keys() if prefix not in self.compact_routes]
+		else:
+			list_of_prefixes = [IPprefix]
+		for prefix in list_of_prefixes:
+			routes = self.compact_routes.get(prefix)
+			RIB = self.compact_RIBs.get(prefix)
+			paths = {}
+			if routes is not None:
+				for i in np.flatnonzero(routes.path_length > 0).tolist():
+					paths[routes.ASNs[i]] = routes.get_path_of_index(i)
+			received_routes = {}
+			if RIB is not None:
+				ASNs = RIB.routes.ASNs
+				neighbors = RIB.neighbors.tolist()
+				indptr = RIB.indptr.tolist()
+				for i in np.flatnonzero(np.diff(RIB.indptr)).tolist():
+					received_routes[ASNs[i]] = {ASNs[neighbors[k]]: RIB.get_path_of_position(k) for k in range(indptr[i], indptr[i+1])}
+			self.compact_routes.pop(prefix, None)
+			self.compact_RIBs.pop(prefix, None)
+			self.compact_routes_version += 1
+			for ASN, path in paths.items():
+				node = self.get_node(ASN)
+				if not dict.__contains__(node.paths, prefix):
+					node.paths[prefix] = path
+			for ASN, received in received_routes.items():
+				node = self.get_node(ASN)
+				if not dict.__contains__(node.all_paths, prefix):
+					node.all_paths[prefix] = received
+
+
+
+	### methods for path indexes ###
+
+	'''
+	Returns the PathIndex of the given prefix (see path_index.py), i.e., the sets of the nodes whose best path contains each AS and each edge; it is built at the first call, and kept (and updated) until the routing information is cleared.
+	Every best path is changed either by a BGP message of the node (the node announces or withdraws its new path, or invalidates its entry if it sends no message) or by a method of the topology, which invalidate the corresponding nodes of the index (see the method "invalidate_path_index(...)"); the invalidated nodes are re-indexed at the next query.
+	(The paths written directly to the BGPnodes, i.e., not by BGP messages or methods of the topology, must be followed by a call of "invalidate_path_index(...)".)
+
+	Input arguments:
+		(a) IPprefix: the prefix
+	'''
+	def get_path_index(self,IPprefix):
+		index = self.path_indexes.get(IPprefix)
+		if index is None:
+			index = PathIndex(self, IPprefix)
+			self.path_indexes[IPprefix] = index
+		index.update()
+		return index
+
+
+	'''
+	Marks the given node (or all the nodes, if ASN is None) to be re-indexed in the path index of the given prefix (or of all prefixes, if IPprefix is None), since its best path may have changed.
+	'''
+	def invalidate_path_index(self,IPprefix=None,ASN=None):
+		if IPprefix is None:
+			for index in self.path_indexes.values():
+				index.invalidate(ASN)
+		else:
+			index = self.path_indexes.get(IPprefix)
+			if index is not None:
+				index.invalidate(ASN)
+
+
+
+	### methods for the propagation of BGP messages ###
+
+	'''
+	Sets how the BGP messages (announcements and withdrawals) are delivered among the nodes. The available modes are:
+		'recursive':	(default) each message is delivered immediately, i.e., a node calls the methods of its neighbors, which call the methods of their neighbors, etc. The depth of the recursion grows with the length of the propagation, and may hit the recursion limit of python for large topologies.
+		'dfs':			the messages are kept in an explicit stack, and delivered in exactly the same order as in the 'recursive' mode (i.e., the converged "paths" and "all_paths" are identical), without recursion.
+		'fifo':			the messages are kept in a queue and delivered in the order they are sent; the messages for the same node are delivered together (in a batch), and a message for a prefix replaces any earlier (not yet delivered) message from the same neighbor for the same prefix.
+		'relationship':	as 'fifo', but the messages from customers are delivered first, then the messages from peers, and then from providers (this reduces the path exploration, since the most preferred paths are received first).
+	With the standard policy (see BGPnode.conditions_to_change_existing_path), all modes converge to the same best paths ("paths").
+	The 'fifo' and 'relationship' modes may differ from the 'recursive' mode in the "all_paths" entries that a neighbor has not withdrawn; these entries depend on the order of the messages.
+
+	Input arguments:
+		(a) mode: one of 'recursive', 'dfs', 'fifo', 'relationship'
+	'''
+	def set_propagation_mode(self,mode):
+		if mode not in PROPAGATION_MODES:
+			raise Exception('Not valid propagation mode: {}'.format(mode))
+		if self.processing_messages:
+			raise Exception('Cannot change the propagation mode while messages are being processed.')
+		self.propagation_mode = mode
+
+
+	'''
+	Sends an announcement of the given path for the given prefix from the given node to the given neighbors (see BGPnode.announce_path).
+	The node is re-indexed in the path index of the prefix (if any), since its best path may have changed.
+	'''
+	def send_announcements(self,ASN,IPprefix,neighbors,path):
+		if self.compact_routes or self.compact_RIBs:
+			self.expand_compact_routes(IPprefix)
+		if self.path_indexes:
+			self.invalidate_path_index(IPprefix,ASN)
+		if self.propagation_mode == 'recursive':
+			for neighbor in neighbors:
+				self.get_node(neighbor).receive_path(IPprefix,path)
+		elif self.propagation_mode == 'dfs':
+			self.message_stack.append((ANNOUNCEMENT, ASN, IPprefix, iter(list(neighbors)), path, None))
+			self.process_messages()
+		else:
+			for neighbor in neighbors:
+				self.enqueue_message(neighbor, ANNOUNCEMENT, ASN, IPprefix, path)
+			self.process_messages()
+
+
+	'''
+	Sends a withdrawal for the given prefix from the given node to the given neighbors (see BGPnode.withdraw_path); after the withdrawals are sent, the method "replace_withdrawn_path(...)" of the given node "node_to_replace_path" (if any) is called.
+	The node is re-indexed in the path index of the prefix (if any), since its best path may have changed.
+	'''
+	def send_withdrawals(self,ASN,IPprefix,neighbors,node_to_replace_path=None):
+		if self.compact_routes or self.compact_RIBs:
+			self.expand_compact_routes(IPprefix)
+		if self.path_indexes:
+			self.invalidate_path_index(IPprefix,ASN)
+		if self.propagation_mode == 'recursive':
+			for neighbor in neighbors:
+				self.get_node(neighbor).withdraw_path(IPprefix,ASN)
+			if node_to_replace_path is not None:
+				node_to_replace_path.replace_withdrawn_path(IPprefix)
+		elif self.propagation_mode == 'dfs':
+			self.message_stack.append((WITHDRAWAL, ASN, IPprefix, iter(list(neighbors)), None, node_to_replace_path))
+			self.process_messages()
+		else:
+			for neighbor in neighbors:
+				self.enqueue_message(neighbor, WITHDRAWAL, ASN, IPprefix, None)
+			if node_to_replace_path is not None:
+				node_to_replace_path.replace_withdrawn_path(IPprefix)
+			self.process_messages()
+
+
+	'''
+	Adds a message in the inbox of the receiver node (for the 'fifo' and 'relationship' propagation modes).
+	A message for a prefix replaces the earlier message (if not yet delivered) from the same sender for the same prefix, since the receiver would keep only the last one.
+	'''
+	def enqueue_message(self,receiver,kind,sender,IPprefix,path):
+		if self.propagation_mode == 'relationship':
+			message_class = self.get_node(receiver).ASneighbors.get(sender,1) + 1	# 0 for customers, 1 for peers, 2 for providers
+		else:
+			message_class = 0
+		inbox = self.message_inboxes[message_class]
+		messages = inbox.get(receiver)
+		if messages is None:
+			messages = {}
+			inbox[receiver] = messages
+			self.ready_nodes[message_class].append(receiver)
+		messages[(IPprefix,sender)] = (kind, path)
+
+
+	'''
+	Delivers a message to the receiver node; messages from nodes that are no longer neighbors of the receiver (e.g., due to a removed link) are discarded.
+	'''
+	def deliver_message(self,receiver,kind,sender,IPprefix,path):
+		node = self.get_node(receiver)
+		if not node.has_ASneighbor(sender):
+			return
+		if kind == ANNOUNCEMENT:
+			node.receive_path(IPprefix,path)
+		else:
+			node.withdraw_path(IPprefix,sender)
+
+
+	'''
+	Delivers all the messages sent (and the messages that they trigger) until no message is left, i.e., until the routing converges.
+	The method returns immediately if it is already running (i.e., when a message is sent during the delivery of another message), so the messages are delivered by a loop and not by recursion.
+	'''
+	def process_messages(self):
+		if self.processing_messages:
+			return
+		self.processing_messages = True
+		try:
+			if self.propagation_mode == 'dfs':
+				stack = self.message_stack
+				while stack:
+					(kind, sender, IPprefix, neighbors, path, node_to_replace_path) = stack[-1]
+					receiver = next(neighbors, NO_NEIGHBOR)
+					if receiver is NO_NEIGHBOR:
+						stack.pop()
+						if node_to_replace_path is not None:
+							node_to_replace_path.replace_withdrawn_path(IPprefix)
+					elif kind == ANNOUNCEMENT:
+						self.get_node(receiver).receive_path(IPprefix,path)
+					else:
+						self.get_node(receiver).withdraw_path(IPprefix,sender)
+			else:
+				while True:
+					for message_class in range(3):
+						if self.ready_nodes[message_class]:
+							break
+					else:
+						break
+					receiver = self.ready_nodes[message_class].popleft()
+					messages = self.message_inboxes[message_class].pop(receiver)
+					for (IPprefix, sender), (kind, path) in messages.items():
+						self.deliver_message(receiver, kind, sender, IPprefix, path)
+		except BaseException:
+			# drop the messages that have not been delivered
+			self.message_stack = []
+			self.message_inboxes = [{}, {}, {}]
+			self.ready_nodes = [deque(), deque(), deque()]
+			raise
+		finally:
+			self.processing_messages = False
+
+
+
+	### methods for the instrumentation of the propagation of BGP messages ###
+
+	'''
+	Enables the counters (and IF timers==True, the timers) of the propagation of the BGP messages (see propagation_instrumentation.py), e.g., before "add_prefix(...)".
+
+	IF the instrumentation is not enabled
+	THEN 	(i) create the counters, and
+			(ii) switch the nodes (existing and new) to the instrumented subclass of their class, whose BGP methods update the counters
+	ELSE 	keep the existing counters (and set the timers)
+	'''
+	def enable_instrumentation(self,timers=False):
+		if self.instrumentation is None:
+			self.instrumentation = PropagationCounters(timers)
+			self.set_node_class(get_instrumented_node_class(self.node_class))
+		else:
+			self.instrumentation.timers = timers
+
+	'''
+	Disables the instrumentation, i.e., switches the nodes back to their (not instrumented) class, so that the BGP methods run without any extra cost.
+
+	Returns:
+		The PropagationReport of the counters (or None, if the instrumentation was not enabled)
+	'''
+	def disable_instrumentation(self):
+		if self.instrumentation is None:
+			return None
+		report = self.get_propagation_report()
+		self.set_node_class(self.node_class.base_node_class)
+		self.instrumentation = None
+		return report
+
+	'''
+	Returns a PropagationReport (see propagation_instrumentation.py) of the counters since the instrumentation was enabled (or reset), with the given number of hottest ASes (i.e., with the most received messages); None if the instrumentation is not enabled.
+	'''
+	def get_propagation_report(self,nb_of_hottest_ASes=10):
+		if self.instrumentation is None:
+			return None
+		return self.instrumentation.get_report(nb_of_hottest_ASes)
+
+	'''
+	Resets the counters of the instrumentation (if enabled), e.g., between the simulations of different prefixes.
+	'''
+	def reset_instrumentation(self):
+		if self.instrumentation is not None:
+			self.instrumentation = PropagationCounters(self.instrumentation.timers)
+
+	'''
+	Sets the class of the new nodes, and changes the class of the existing node objects (see the method "get_node_objects()"); the class must not add class variables to the nodes.
+	'''
+	def set_node_class(self,node_class):
+		self.node_class = node_class
+		for node in self.get_node_objects():
+			node.__class__ = node_class
+
+	'''
+	Returns the existing node objects, i.e., the values of the "list_of_all_BGP_nodes" dictionary.
+	'''
+	def get_node_objects(self):
+		return self.list_of_all_BGP_nodes.values()
+
+
 
 	'''
 	Creates the nodes and links of the topology, based on the data of the given csv file.
@@ -194,8 +784,18 @@ class BGPtopology:
 	Input arguments:
 		(a) file: a string with the name of the csv file to be read
 		(b) type: a string denoting the format type of the csv file; default is 'CAIDA' (which is currently the only supported type)
+		(c) asn_as_str: if True the ASNs are kept as strings, otherwise they are converted to integers
+		(d) bulk: if True (default), the file (plain text, gzip or bzip2) is parsed in chunks, the links are deduplicated and all the links are added at once (see the method "add_links_in_bulk(...)"), and instead of printing errors, a LoadReport with the malformed/duplicate/not valid rows is returned;
+			the resulting topology (incl. the preferences of the nodes, for the same random seed) is the same as with bulk=False, but no paths are exchanged over the new links (i.e., the topology should be loaded before any prefix is announced);
+			IF False, "add_link(...)" is called for each row
+		(e) chunk_size: the number of lines parsed at once (only for bulk=True)
+
+	Returns:
+		(only for bulk=True) a LoadReport
 	'''
-	def load_topology_from_csv(self,file,type='CAIDA', asn_as_str=False):
+	def load_topology_from_csv(self,file,type='CAIDA', asn_as_str=False, bulk=True, chunk_size=200000):
+		if bulk:
+			return self.load_topology_from_csv_in_bulk(file, type=type, asn_as_str=asn_as_str, chunk_size=chunk_size)
 		try:
 			if type == 'CAIDA':
 				with open(file, 'r') as csvfile:
@@ -210,6 +810,74 @@ class BGPtopology:
 			print('ERROR: file not found')
 
 
+	'''
+	Creates the nodes and links of the topology, based on the data of the given file (see the method "load_topology_from_csv(...)" with bulk=True).
+
+	Returns:
+		A LoadReport (see topology_bulk_loader.py)
+	'''
+	def load_topology_from_csv_in_bulk(self,file,type='CAIDA', asn_as_str=False, chunk_size=200000):
+		report = LoadReport()
+		if type != 'CAIDA':
+			print('ERROR: Not supported file type')
+			return report
+		try:
+			(ASN1s, ASN2s, peering_types, line_numbers) = read_CAIDA_rows(file, asn_as_str=asn_as_str, chunk_size=chunk_size, report=report)
+		except IOError:
+			print('ERROR: file not found')
+			return report
+		nb_nodes_before = self.get_nb_nodes()
+		existing_link = self.has_link if nb_nodes_before > 0 else None
+		(ASNs, first, second, link_types, preferences) = dedupe_links(ASN1s, ASN2s, peering_types, line_numbers, report, existing_link=existing_link)
+		self.add_links_in_bulk(ASNs, first, second, link_types, preferences)
+		report.nb_of_links_added = len(first)
+		report.nb_of_nodes_added = self.get_nb_nodes() - nb_nodes_before
+		return report
+
+
+	'''
+	Adds (at once) the given nodes and links to the topology; the links must not already exist in the topology (e.g., see the method "dedupe_links(...)" in topology_bulk_loader.py).
+
+	Input arguments:
+		(a) ASNs: 			list of ASNs; the nodes that do not exist in the topology are added in this order
+		(b) first, second:	arrays with the positions in "ASNs" of the two ends of each link
+		(c) peering_types:	array with the peering type of each link (see the method "add_link(...)"); IF -1 then second is customer of first, ELSE IF 0 then the nodes are peers
+		(d) preferences:	array of shape (nb_of_links, 2) with the preference of the first end for the second, and of the second for the first
+	'''
+	def add_links_in_bulk(self, ASNs, first, second, peering_types, preferences):
+		if self.compact_routes or self.compact_RIBs:
+			self.expand_compact_routes()
+		with paused_garbage_collection():
+			self._add_links_in_bulk(ASNs, first, second, peering_types, preferences)
+
+	def _add_links_in_bulk(self, ASNs, first, second, peering_types, preferences):
+		for ASN in ASNs:
+			if ASN not in self.list_of_all_BGP_nodes:
+				self.list_of_all_BGP_nodes[ASN] = self.node_class(ASN,self)
+		# the two directions of every link, grouped by node (a stable sort keeps the order in which the neighbors are added to each node)
+		nb_links = len(first)
+		rows = np.empty(2*nb_links, dtype=np.int64)
+		cols = np.empty(2*nb_links, dtype=np.int64)
+		rels = np.empty(2*nb_links, dtype=np.int64)
+		rows[0::2] = first
+		rows[1::2] = second
+		cols[0::2] = second
+		cols[1::2] = first
+		rels[0::2] = peering_types
+		rels[1::2] = -np.asarray(peering_types, dtype=np.int64)
+		order = np.argsort(rows, kind='stable')
+		counts = np.bincount(rows, minlength=len(ASNs)).tolist()
+		neighbor_ASNs = [ASNs[j] for j in cols[order].tolist()]
+		neighbors = iter(zip(neighbor_ASNs, rels[order].tolist()))
+		neighbors_preferences = iter(zip(neighbor_ASNs, np.asarray(preferences, dtype=np.float64).reshape(-1)[order].tolist()))
+		for ASN, count in zip(ASNs, counts):
+			if count:
+				node = self.list_of_all_BGP_nodes[ASN]
+				node.ASneighbors.update(itertools.islice(neighbors, count))
+				node.ASneighbors_preference.update(itertools.islice(neighbors_preferences, count))
+		self.links_version += 1
+
+
 
 
 
@@ -223,7 +891,7 @@ class BGPtopology:
 	Print some information for each node in the topology; see the respective method defined in the BGPnode class
 	'''
 	def print_info(self):
-		for key,node in self.list_of_all_BGP_nodes.items():
+		for key,node in self.iterate_nodes():
 			node.print_info()
 
 	'''
@@ -238,13 +906,51 @@ class BGPtopology:
 	def get_all_nodes_ASNs(self):
 		return list(self.list_of_all_BGP_nodes.keys())
 
+	'''
+	Returns an iterator over the tuples (ASN, node) of all the nodes in the topology; as in the method "get_node(...)", the routing tables of the nodes of an older generation are cleared first.
+	'''
+	def iterate_nodes(self):
+		routing_generation = self.routing_generation
+		for ASN, node in self.list_of_all_BGP_nodes.items():
+			if node.routing_generation != routing_generation:
+				node.clear_routing_tables()
+			yield ASN, node
+
+
+	'''
+	Returns the topology in Compressed Sparse Row (CSR) format, i.e., the neighbors of the node with index i (i.e., ASNs[i]) are in the positions indptr[i]...indptr[i+1]-1 of the arrays "indices", "relations" and "preferences" (in the order they were added to the node).
+
+	Returns:
+		A tuple (ASNs, indptr, indices, relations, preferences), where
+			ASNs: 			list of the ASNs of the nodes (the position in the list is the index of the node)
+			indptr:			numpy array (int64) of length nb_nodes+1
+			indices:		numpy array (int32) with the index of each neighbor
+			relations:		numpy array (int8) with values {1,0,-1} if the neighbor is {provider,peer,customer} respectively
+			preferences:	numpy array (float64) with the preference of the node for the neighbor
+	'''
+	def get_CSR_arrays(self):
+		ASNs = self.get_all_nodes_ASNs()
+		ASN_to_index = {ASN:i for i,ASN in enumerate(ASNs)}
+		indptr = np.zeros(len(ASNs)+1, dtype=np.int64)
+		cols = []
+		rels = []
+		prefs = []
+		for i,ASN in enumerate(ASNs):
+			node = self.list_of_all_BGP_nodes[ASN]
+			for n,t in node.ASneighbors.items():
+				cols.append(ASN_to_index[n])
+				rels.append(t)
+				prefs.append(node.ASneighbors_preference[n])
+			indptr[i+1] = indptr[i] + len(node.ASneighbors)
+		return (ASNs, indptr, np.array(cols, dtype=np.int32), np.array(rels, dtype=np.int8), np.array(prefs, dtype=np.float64))
+
 
 	'''
 	Returns a list containing the IP prefixes of all the nodes in the topology
 	'''
 	def get_list_of_prefixes(self):
 		list_of_prefixes = {}
-		for key,node in self.list_of_all_BGP_nodes.items():
+		for key,node in self.iterate_nodes():
 			if node.get_prefixes():
 				list_of_prefixes[key] = list(node.get_prefixes())
 		return list_of_prefixes
@@ -255,7 +961,7 @@ class BGPtopology:
 	'''
 	def get_list_of_hijacked_prefixes(self):
 		list_of_hijacked_prefixes = {}
-		for key,node in self.list_of_all_BGP_nodes.items():
+		for key,node in self.iterate_nodes():
 			if node.get_hijacked_prefixes():
 				list_of_hijacked_prefixes[key] = list(node.get_hijacked_prefixes().keys())
 		return list_of_hijacked_prefixes
@@ -266,13 +972,62 @@ class BGPtopology:
 	'''
 	def get_list_of_hijacked_prefixes_and_hijackers(self):
 		hijacked_prefixes_and_hijackers = {}
-		for key,node in self.list_of_all_BGP_nodes.items():
+		for key,node in self.iterate_nodes():
 			if node.get_hijacked_prefixes():
 				for prefix in list(node.get_hijacked_prefixes().keys()):
 					hijacked_prefixes_and_hijackers[prefix] = node.ASN
 		return hijacked_prefixes_and_hijackers
 
 
+	'''
+	Scans (once) the best paths of all the nodes, and returns a RoutingStatistics object (see routing_statistics.py), from which many statistics for all the prefixes (e.g., the number of nodes with a path or with a hijacked path, the average path length, the histogram of the path lengths), optionally only for a subset of the nodes, are computed without scanning the nodes again.
+
+	Input arguments:
+		(a) list_of_prefixes: the prefixes to be considered; default value is None (i.e., all the prefixes with a path, and the hijacked prefixes)
+
+	Returns:
+		A RoutingStatistics object
+	'''
+	def get_routing_statistics(self,list_of_prefixes=None):
+		ASNs = []
+		hijackers = {}
+		path_prefixes = []
+		path_nodes = []
+		paths = []
+		for ASN,node in self.iterate_nodes():
+			i = len(ASNs)
+			ASNs.append(ASN)
+			if node.hijacked_IPprefix:
+				for prefix in node.get_hijacked_prefixes():
+					hijackers[prefix] = ASN
+			if list_of_prefixes is None:
+				node_paths = node.paths.items()
+			else:
+				node_paths = [(prefix, node.paths.get(prefix)) for prefix in list_of_prefixes]
+			for prefix, path in node_paths:
+				if path:
+					path_prefixes.append(prefix)
+					path_nodes.append(i)
+					paths.append(path)
+
+		if list_of_prefixes is not None:
+			prefixes = list(list_of_prefixes)
+		else:
+			prefixes = list(dict.fromkeys(path_prefixes + list(hijackers.keys())))
+		prefix_to_index = {prefix:k for k,prefix in enumerate(prefixes)}
+		ASN_to_index = {ASN:i for i,ASN in enumerate(ASNs)}
+		hijacked = np.zeros(len(paths), dtype=bool)
+		for k, (prefix, path) in enumerate(zip(path_prefixes, paths)):
+			if (prefix in hijackers) and (hijackers[prefix] in path):
+				hijacked[k] = True
+		return RoutingStatistics(ASNs, prefixes, hijackers,
+			list(map(prefix_to_index.__getitem__, path_prefixes)),
+			path_nodes,
+			list(map(len, paths)),
+			[ASN_to_index.get(path[-1], -1) for path in paths],
+			hijacked)
+
+
 
 	'''
 	Returns the number of the (given) nodes that have a path to the given prefix (and, if any ASN is given, consider only paths originated by the given ASN)
@@ -303,11 +1058,12 @@ class BGPtopology:
 			list_of_nodes_to_search = {}
 			for key in list_of_nodes:
 				if key in self.list_of_all_BGP_nodes.keys():
-					list_of_nodes_to_search[key] = self.list_of_all_BGP_nodes[key]
+					list_of_nodes_to_search[key] = self.get_node(key)
+			list_of_nodes_to_search = list_of_nodes_to_search.items()
 		else:
-			list_of_nodes_to_search = self.list_of_all_BGP_nodes
+			list_of_nodes_to_search = self.iterate_nodes()
 
-		for key,node in list_of_nodes_to_search.items():
+		for key,node in list_of_nodes_to_search:
 			if node.paths.get(IPprefix):
 				if origin_ASN:
 					if node.paths.get(IPprefix)[-1] == origin_ASN:	# in case there is path, check the origin AS in the path
@@ -330,6 +1086,7 @@ class BGPtopology:
 		IF the node has a path to the prefix
 		THEN	IF the path contains the given ASN
 				THEN 	increment the nb_of_nodes_with_path_to_prefix
+	(the nodes whose path contains the given ASN/edge are looked up in the path index of the prefix, i.e., the paths are not scanned; see the method "get_path_index(...)")
 
 	Input arguments:
 		(a) IPprefix: 		the prefix for which paths to be considered
@@ -340,22 +1097,10 @@ class BGPtopology:
 		An integer denoting the number of nodes 
 	'''
 	def get_nb_of_nodes_with_hijacked_path_to_prefix(self,IPprefix,hijacker_ASN, list_of_nodes=None):
-		nb_of_nodes_with_path_to_prefix = 0
-
+		nodes_with_hijacked_path = self.get_path_index(IPprefix).get_nodes_with_ASN(hijacker_ASN)
 		if list_of_nodes:
-			list_of_nodes_to_search = {}
-			for key in list_of_nodes:
-				if key in self.list_of_all_BGP_nodes.keys():
-					list_of_nodes_to_search[key] = self.list_of_all_BGP_nodes[key]
-		else:
-			list_of_nodes_to_search = self.list_of_all_BGP_nodes
-
-		for key,node in list_of_nodes_to_search.items():
-			if node.paths.get(IPprefix):
-				if hijacker_ASN in node.paths.get(IPprefix):
-					nb_of_nodes_with_path_to_prefix += 1
-
-		return nb_of_nodes_with_path_to_prefix
+			return len(nodes_with_hijacked_path.intersection(list_of_nodes))
+		return len(nodes_with_hijacked_path)
 
 
 	'''
@@ -385,11 +1130,12 @@ class BGPtopology:
 			list_of_nodes_to_search = {}
 			for key in list_of_nodes:
 				if key in self.list_of_all_BGP_nodes.keys():
-					list_of_nodes_to_search[key] = self.list_of_all_BGP_nodes[key]
+					list_of_nodes_to_search[key] = self.get_node(key)
+			list_of_nodes_to_search = list_of_nodes_to_search.items()
 		else:
-			list_of_nodes_to_search = self.list_of_all_BGP_nodes
+			list_of_nodes_to_search = self.iterate_nodes()
 
-		for key,node in list_of_nodes_to_search.items():
+		for key,node in list_of_nodes_to_search:
 			if node.paths.get(IPprefix):
 				sum_path_lengths = sum_path_lengths + len(node.paths.get(IPprefix))
 				nb_of_nodes_with_path_to_prefix += 1
@@ -432,11 +1178,12 @@ class BGPtopology:
 			list_of_nodes_to_search = {}
 			for key in list_of_nodes:
 				if key in self.list_of_all_BGP_nodes.keys():
-					list_of_nodes_to_search[key] = self.list_of_all_BGP_nodes[key]
+					list_of_nodes_to_search[key] = self.get_node(key)
+			list_of_nodes_to_search = list_of_nodes_to_search.items()
 		else:
-			list_of_nodes_to_search = self.list_of_all_BGP_nodes
+			list_of_nodes_to_search = self.iterate_nodes()
 
-		for key,node in list_of_nodes_to_search.items():
+		for key,node in list_of_nodes_to_search:
 			if node.paths.get(IPprefix):
 				if origin_ASN:
 					if node.paths.get(IPprefix)[-1] == origin_ASN:	# in case there is path, check the origin AS in the path
@@ -457,6 +1204,7 @@ class BGPtopology:
 		IF the node has a path to the prefix
 		THEN	IF the path contains the given ASN
 				THEN 	add node to the set_of_nodes_with_path_to_prefix
+	(the nodes whose path contains the given ASN/edge are looked up in the path index of the prefix, i.e., the paths are not scanned; see the method "get_path_index(...)")
 
 	Input arguments:
 		(a) IPprefix: 		the prefix for which paths to be considered
@@ -467,22 +1215,10 @@ class BGPtopology:
 		A set of ASNs
 	'''
 	def get_set_of_nodes_with_hijacked_path_to_prefix(self,IPprefix,hijacker_ASN, list_of_nodes=None):
-		set_of_nodes_with_path_to_prefix = set()
-
+		nodes_with_hijacked_path = self.get_path_index(IPprefix).get_nodes_with_ASN(hijacker_ASN)
 		if list_of_nodes:
-			list_of_nodes_to_search = {}
-			for key in list_of_nodes:
-				if key in self.list_of_all_BGP_nodes.keys():
-					list_of_nodes_to_search[key] = self.list_of_all_BGP_nodes[key]
-		else:
-			list_of_nodes_to_search = self.list_of_all_BGP_nodes
-
-		for key,node in list_of_nodes_to_search.items():
-			if node.paths.get(IPprefix):
-				if hijacker_ASN in node.paths.get(IPprefix):
-					set_of_nodes_with_path_to_prefix.add(node.ASN)
-
-		return set_of_nodes_with_path_to_prefix
+			return nodes_with_hijacked_path.intersection(list_of_nodes)
+		return set(nodes_with_hijacked_path)
 
 
 
@@ -497,6 +1233,7 @@ class BGPtopology:
 		IF the node has a path to the prefix
 		THEN	IF the path contains the given edge
 				THEN 	add node to the set_of_nodes_with_path_to_prefix
+	(the nodes whose path contains the given ASN/edge are looked up in the path index of the prefix, i.e., the paths are not scanned; see the method "get_path_index(...)")
 
 	Input arguments:
 		(a) IPprefix: 		the prefix for which paths to be considered
@@ -507,34 +1244,17 @@ class BGPtopology:
 		A set of ASNs
 	'''
 	def get_set_of_nodes_with_specific_edge_to_prefix(self,IPprefix,edge, list_of_nodes=None, directed=False):
-		set_of_nodes_with_path_to_prefix = set()
-
+		nodes_with_edge = self.get_path_index(IPprefix).get_nodes_with_edge(edge, directed)
 		if list_of_nodes:
-			list_of_nodes_to_search = {}
-			for key in list_of_nodes:
-				if key in self.list_of_all_BGP_nodes.keys():
-					list_of_nodes_to_search[key] = self.list_of_all_BGP_nodes[key]
-		else:
-			list_of_nodes_to_search = self.list_of_all_BGP_nodes
-
-		for key,node in list_of_nodes_to_search.items():
-			if node.paths.get(IPprefix):
-				ASN1 = edge[0]
-				ASN2 = edge[1]
-				path = node.paths.get(IPprefix)
-				if (ASN1 in path) and (ASN2 in path): # if both ASNs exists in the path ...
-					if directed:
-						if (path.index(ASN1) - path.index(ASN2)) == 1:	# ... and in sequence (i.e., form an edge from ASN1 to ASN2)
-							set_of_nodes_with_path_to_prefix.add(node.ASN)
-					else:
-						if abs(path.index(ASN1) - path.index(ASN2)) == 1:	# ... and in sequence (i.e., form an edge)
-							set_of_nodes_with_path_to_prefix.add(node.ASN)
-
-		return set_of_nodes_with_path_to_prefix
+			return nodes_with_edge.intersection(list_of_nodes)
+		return set(nodes_with_edge)
 
 
 	def get_nb_of_nodes_with_specific_edge_to_prefix(self,IPprefix,edge,list_of_nodes=None, directed=False):
-		return len(self.get_set_of_nodes_with_specific_edge_to_prefix(IPprefix,edge,list_of_nodes,directed))
+		nodes_with_edge = self.get_path_index(IPprefix).get_nodes_with_edge(edge, directed)
+		if list_of_nodes:
+			return len(nodes_with_edge.intersection(list_of_nodes))
+		return len(nodes_with_edge)
 
 
 
@@ -547,84 +1267,140 @@ class BGPtopology:
 	(Currently) it writes to the given csv file a row per hijacked prefix.
 	The format is:		nb_of_nodes_with_path_to_prefix,nb_of_nodes_with_hijacked_path_to_prefix(,nb_of_nodes_from_the_given_list_with_path_to_prefix,nb_of_nodes_from_the_given_list_with_hijacked_path_to_prefix)
 				e.g., 	10,5,4,1
+	All the numbers are computed from a single scan of the nodes (see the method "get_routing_statistics(...)").
 
 	Input arguments:
 		(a) csv_filename: a string with the name of the csv file to be written
 		(b) list_of_nodes: 	the list of the specific nodes, which will be considered; default is None
 	'''
 	def write_hijacking_data_to_csv(self,csv_filename,list_of_nodes=None):
+		statistics = self.get_routing_statistics()
+		nb_of_nodes_with_path = statistics.get_nb_of_nodes_with_path()
+		nb_of_hijacked_nodes = statistics.get_nb_of_hijacked_nodes()
+		if list_of_nodes:
+			mask = statistics.get_nodes_mask(list_of_nodes)
+			nb_of_given_nodes_with_path = statistics.get_nb_of_nodes_with_path(mask=mask)
+			nb_of_given_hijacked_nodes = statistics.get_nb_of_hijacked_nodes(mask=mask)
 		with open(csv_filename, 'w') as csvfile:
 			spamwriter = csv.writer(csvfile, delimiter=',')
-			for prefix,hijacker in self.get_list_of_hijacked_prefixes_and_hijackers().items():
-				#print('writing statistics to csv ... '+str(100*i/nb_of_sims)+'%\r',end='')
+			for prefix in statistics.hijackers.keys():
 				DATA = []
-				DATA.append(self.get_nb_of_nodes_with_path_to_prefix(prefix))
-				DATA.append(self.get_nb_of_nodes_with_hijacked_path_to_prefix(prefix,hijacker))
+				DATA.append(nb_of_nodes_with_path[prefix])
+				DATA.append(nb_of_hijacked_nodes[prefix])
 				if list_of_nodes:
-					DATA.append(self.get_nb_of_nodes_with_path_to_prefix(prefix,None,list_of_nodes))
-					DATA.append(self.get_nb_of_nodes_with_hijacked_path_to_prefix(prefix,hijacker,list_of_nodes))
+					DATA.append(nb_of_given_nodes_with_path[prefix])
+					DATA.append(nb_of_given_hijacked_nodes[prefix])
 				spamwriter.writerow(DATA)
 
+	'''
+	Exports the best paths of all the nodes for the given prefixes in a columnar format (see routing_export.py), i.e., per prefix and node: the next hop, the origin, the path length, the relation of the next hop, and (optionally) the full path.
+	The rows are written in chunks (one prefix at a time), and can be read with the function "read_routing_state(...)" of routing_export.py.
+
+	Input arguments:
+		(a) dirname: the name of the directory to be written (it is created if it does not exist)
+		(b) list_of_prefixes: the prefixes to be exported; default value is None (i.e., all the owned and hijacked prefixes of the nodes)
+		(c) with_paths: IF True, the full paths are written as well
+		(d) format: 'npz' or 'parquet' (it needs the pyarrow package)
+		(e) chunk_size: the number of rows of a chunk
+	'''
+	def export_routing_state(self,dirname,list_of_prefixes=None,with_paths=False,format='npz',chunk_size=1000000):
+		hijackers = self.get_list_of_hijacked_prefixes_and_hijackers()
+		if list_of_prefixes is None:
+			list_of_prefixes = list(dict.fromkeys([prefix for prefixes in self.get_list_of_prefixes().values() for prefix in prefixes] + list(hijackers.keys())))
+		with RoutingStateWriter(dirname, self.get_all_nodes_ASNs(), with_paths=with_paths, format=format, chunk_size=chunk_size) as writer:
+			for prefix in list_of_prefixes:
+				write_topology_routes(writer, self, prefix, hijackers.get(prefix))
+
+
 	'''
 	Adds the IXP nodes as a list to the topology class
+	(the json file, i.e., a dictionary with keys the IXP ids, is parsed incrementally; see topology_bulk_loader.iter_json_items)
 	'''
 	def load_ixps_from_json(self, json_filename):
 		self.list_of_all_IXP_nodes = {}
+		self.IXPs_of_ASN = {}
 
-		with open(json_filename, 'r') as jsonfile:
-			raw_ixp_dict = json.load(jsonfile)
-
-			for ixp_id, ixp_info in raw_ixp_dict.items():
-				self.list_of_all_IXP_nodes[int(ixp_id)] = IXPNode(ixp_info)
+		for ixp_id, ixp_info in iter_json_items(json_filename):
+			self.list_of_all_IXP_nodes[int(ixp_id)] = IXPNode(ixp_info)
 
 		#print('%i new IXPs added in total' % (len(self.list_of_all_IXP_nodes)))
 
 	'''
 	Populates the IXP node membership info
+	(the json file, i.e., a list of tuples [ASN1, ASN2, ixp_id], is parsed incrementally; see topology_bulk_loader.iter_json_items)
 	'''
 
 	def load_ixp_members_from_json(self, json_filename):
-
-		with open(json_filename, 'r') as jsonfile:
-			all_asn_asn_ixp_tuples = json.load(jsonfile)
-
-			for t in all_asn_asn_ixp_tuples:
-				self.list_of_all_IXP_nodes[int(t[2])].add_ASN_member(int(t[0]))
-				self.list_of_all_IXP_nodes[int(t[2])].add_ASN_member(int(t[1]))
+		for t in iter_json_items(json_filename):
+			self.add_IXP_member(int(t[2]), int(t[0]))
+			self.add_IXP_member(int(t[2]), int(t[1]))
 
 	'''
 	Add the extra IXP-based p2p links
+	(the json file, i.e., a list of tuples [ASN1, ASN2, ixp_id], is parsed incrementally, and the links that do not exist are added at once, as with "load_topology_from_csv(..., bulk=True)"; i.e., the topology, incl. the preferences of the nodes for the same random seed, is the same as calling "add_link(ASN1, ASN2, 0)" for each new link, but no paths are exchanged over the new links, so the links should be added before any prefix is announced)
+
+	Returns:
+		A LoadReport (see topology_bulk_loader.py), with the number of added links and nodes, and the tuples of existing (or repeated) links as duplicates
 	'''
 	def add_extra_p2p_links_from_json(self, json_filename):
-		with open(json_filename, 'r') as jsonfile:
-			all_asn_asn_ixp_tuples = json.load(jsonfile)
+		report = LoadReport()
+		(ASN1s, ASN2s, peering_types, line_numbers) = read_p2p_link_rows(json_filename, report=report)
+		nb_nodes_before = self.get_nb_nodes()
+		(ASNs, first, second, link_types, preferences) = dedupe_links(ASN1s, ASN2s, peering_types, line_numbers, report, existing_link=self.has_link)
+		self.add_links_in_bulk(ASNs, first, second, link_types, preferences)
+		report.nb_of_links_added = len(first)
+		report.nb_of_nodes_added = self.get_nb_nodes() - nb_nodes_before
+		return report
 
-		i_asn  = 0
-		i_link = 0
-		for t in all_asn_asn_ixp_tuples:
-			if not self.has_node(t[0]) or not self.has_node(t[1]):
-				i_asn += 1
+	'''
+	Returns the reverse index of the IXP members (see the class variable "IXPs_of_ASN"); it is built from the members of the IXPs the first time it is needed, and then it is kept up to date by the methods "add_IXP_member(...)" and "remove_IXP_member(...)".
+	'''
+	def get_IXP_reverse_index(self):
+		if self.IXPs_of_ASN is None:
+			self.IXPs_of_ASN = {}
+			for ixp_id, IXP in getattr(self, 'list_of_all_IXP_nodes', {}).items():
+				for ASN in IXP.members:
+					self.IXPs_of_ASN.setdefault(ASN, set()).add(ixp_id)
+		return self.IXPs_of_ASN
 
-			if not self.has_link(t[0],t[1]):
-				self.add_link(t[0], t[1], 0)
-				i_link += 1
+	'''
+	Returns the set of the ids of the IXPs of which the given AS is member (the returned set must not be changed).
+	'''
+	def get_IXPs_of_ASN(self, ASN):
+		return self.get_IXP_reverse_index().get(ASN, frozenset())
+
+	'''
+	Adds the given AS to the members of the given IXP (and to the reverse index of the IXP members).
+	'''
+	def add_IXP_member(self, ixp_id, ASN):
+		self.list_of_all_IXP_nodes[ixp_id].add_ASN_member(ASN)
+		self.get_IXP_reverse_index().setdefault(ASN, set()).add(ixp_id)
 
-		#print ("%i new p2p links added in total" % (i_link))
-		#print ("%i new ASNs added in total because of the extra p2p links" % (i_asn))
+	'''
+	Removes the given AS from the members of the given IXP (and from the reverse index of the IXP members).
+	'''
+	def remove_IXP_member(self, ixp_id, ASN):
+		self.list_of_all_IXP_nodes[ixp_id].remove_ASN_member(ASN)
+		IXPs = self.get_IXP_reverse_index().get(ASN)
+		if IXPs is not None:
+			IXPs.discard(ixp_id)
+			if not IXPs:
+				del self.IXPs_of_ASN[ASN]
 
 	'''
 	Implement remote peering with a certain IXP
+	(to evaluate and rank many remote-peering options for an anycast prefix without changing the topology, see remote_peering.py)
 	'''
 	def peer_remotely_with_IXP(self, ASN, ixp_id):
 		ixp_members = self.list_of_all_IXP_nodes[ixp_id].members
 
 		#add the remote peer as a new IXP member
-		self.list_of_all_IXP_nodes[ixp_id].add_ASN_member(ASN)
+		self.add_IXP_member(ixp_id, ASN)
 
 		#add the remote p2p links with all current open IXP members
 		i = 0
 		for member in ixp_members:
-			if not self.has_link(ASN,member):
+			if (member != ASN) and (not self.has_link(ASN,member)):
 				self.add_link(ASN, member, 0)
 				i += 1
 
@@ -639,10 +1415,149 @@ class BGPtopology:
 
 
 	'''
-	Clears the routing information of all nodes in topology.
+	Writes the topology to a binary snapshot, i.e., a directory with the following files:
+		meta.json:			the format version, the number of nodes, and (if any IXPs are loaded) the data of the IXPs
+		ASNs.npy:			the ASN of each node (the position in the array is the index of the node)
+		indptr.npy, indices.npy, relations.npy, preferences.npy: the links of the topology in CSR format (see the method "get_CSR_arrays()")
+		IXP_ids.npy, IXP_indptr.npy, IXP_members.npy: (if any IXPs are loaded) the ASNs of the members of each IXP, in CSR format
+	The routing information of the nodes is not saved.
+
+	Input arguments:
+		(a) dirname: the name of the directory to be written (it is created if it does not exist)
+	'''
+	def save_topology_to_snapshot(self,dirname):
+		os.makedirs(dirname, exist_ok=True)
+		(ASNs, indptr, indices, relations, preferences) = self.get_CSR_arrays()
+		asn_as_str = any(isinstance(ASN,str) for ASN in ASNs)
+		meta = {'version': SNAPSHOT_VERSION, 'nb_nodes': len(ASNs), 'asn_as_str': asn_as_str, 'IXPs': None}
+		arrays = {'ASNs': np.array(ASNs, dtype=str if asn_as_str else np.int64), 'indptr': indptr, 'indices': indices, 'relations': relations, 'preferences': preferences}
+
+		if getattr(self, 'list_of_all_IXP_nodes', None) is not None:
+			IXP_ids = sorted(self.list_of_all_IXP_nodes.keys())
+			meta['IXPs'] = [self.list_of_all_IXP_nodes[ixp_id].get_info_dict() for ixp_id in IXP_ids]
+			members = [sorted(self.list_of_all_IXP_nodes[ixp_id].members) for ixp_id in IXP_ids]
+			arrays['IXP_ids'] = np.array(IXP_ids, dtype=np.int64)
+			arrays['IXP_indptr'] = np.cumsum([0]+[len(m) for m in members]).astype(np.int64)
+			arrays['IXP_members'] = np.array([ASN for m in members for ASN in m], dtype=str if asn_as_str else np.int64)
+
+		for name, array in arrays.items():
+			np.save(os.path.join(dirname, name+'.npy'), array)
+		with open(os.path.join(dirname, 'meta.json'), 'w') as jsonfile:
+			json.dump(meta, jsonfile)
+
+
+	'''
+	Reads the arrays of a snapshot written by the method "save_topology_to_snapshot(...)".
+
+	Input arguments:
+		(a) dirname: the name of the snapshot directory
+		(b) mmap: if True, the arrays are memory-mapped (read-only) from the files, instead of being read into memory
+
+	Returns:
+		A tuple (meta, arrays), where meta is the dictionary of meta.json, and arrays a dictionary with the (numpy) arrays of the snapshot
+	'''
+	def read_snapshot(self,dirname,mmap=True):
+		with open(os.path.join(dirname, 'meta.json'), 'r') as jsonfile:
+			meta = json.load(jsonfile)
+		if meta.get('version') != SNAPSHOT_VERSION:
+			raise Exception('Not supported snapshot version: {}'.format(meta.get('version')))
+		names = ['ASNs', 'indptr', 'indices', 'relations', 'preferences']
+		if meta['IXPs'] is not None:
+			names += ['IXP_ids', 'IXP_indptr', 'IXP_members']
+		arrays = {}
+		for name in names:
+			arrays[name] = np.load(os.path.join(dirname, name+'.npy'), mmap_mode='r' if mmap else None)
+		return (meta, arrays)
+
+
+	'''
+	Creates the nodes, links (and IXPs, if saved) of the topology from a snapshot written by the method "save_topology_to_snapshot(...)"; the topology must be empty.
+	For a BGPtopology, the snapshot is read and a BGPnode is created for every node; a CSRtopology uses directly the memory-mapped arrays (see CSRtopology.load_topology_from_snapshot).
+
+	Input arguments:
+		(a) dirname: the name of the snapshot directory
+	'''
+	def load_topology_from_snapshot(self,dirname):
+		if self.get_nb_nodes() > 0:
+			print('ERROR: the topology is not empty')
+			return
+		(meta, arrays) = self.read_snapshot(dirname, mmap=False)
+		ASNs = arrays['ASNs'].tolist()
+		indptr = arrays['indptr']
+		rows = np.repeat(np.arange(len(ASNs), dtype=np.int64), np.diff(indptr))
+		for ASN in ASNs:
+			self.add_node(ASN)
+		for i, j, t, p in zip(rows.tolist(), arrays['indices'].tolist(), arrays['relations'].tolist(), arrays['preferences'].tolist()):
+			node = self.list_of_all_BGP_nodes[ASNs[i]]
+			node.ASneighbors[ASNs[j]] = t
+			node.ASneighbors_preference[ASNs[j]] = p
+		self.links_version += 1
+		self.load_IXPs_from_snapshot(meta, arrays)
+
+
+	'''
+	Creates the IXPs (if any) of a snapshot; see the method "load_topology_from_snapshot(...)".
+	'''
+	def load_IXPs_from_snapshot(self,meta,arrays):
+		if meta['IXPs'] is None:
+			return
+		self.list_of_all_IXP_nodes = {}
+		self.IXPs_of_ASN = None
+		IXP_indptr = arrays['IXP_indptr'].tolist()
+		IXP_members = arrays['IXP_members'].tolist()
+		for k, (ixp_id, ixp_info) in enumerate(zip(arrays['IXP_ids'].tolist(), meta['IXPs'])):
+			ixp = IXPNode(ixp_info)
+			ixp.members.update(IXP_members[IXP_indptr[k]:IXP_indptr[k+1]])
+			self.list_of_all_IXP_nodes[ixp_id] = ixp
+
+
+	### methods for forks (what-if scenarios) ###
+
+	'''
+	Returns a copy of the IXPs of the topology (i.e., new IXPNode objects with their own sets of members), or None if the topology has no IXPs.
+	'''
+	def get_copy_of_IXPs(self):
+		if getattr(self, 'list_of_all_IXP_nodes', None) is None:
+			return None
+		IXPs = {}
+		for ixp_id, IXP in self.list_of_all_IXP_nodes.items():
+			ixp = IXPNode(IXP.get_info_dict())
+			ixp.members.update(IXP.members)
+			IXPs[ixp_id] = ixp
+		return IXPs
+
+	'''
+	Returns a fork of the topology, i.e., a new topology with the same nodes, links (and preferences) and IXPs, but without routing information, to be changed (e.g., "add_link(...)", "remove_link(...)", "peer_remotely_with_IXP(...)") and simulated independently of the topology.
+	The fork is a CSRtopology (with the same methods), built from the CSR arrays of the topology (see the method "get_CSR_arrays()"); the forks of a CSRtopology share its arrays (see CSRtopology.fork), i.e., for many scenarios fork the topology once, and then fork the returned topology.
+	'''
+	def fork(self):
+		from CSRtopology import CSRtopology		# imported here, since CSRtopology.py imports this file
+		Fork = CSRtopology()
+		Fork.load_topology_from_CSR_arrays(*self.get_CSR_arrays())
+		Fork.propagation_mode = self.propagation_mode
+		IXPs = self.get_copy_of_IXPs()
+		if IXPs is not None:
+			Fork.list_of_all_IXP_nodes = IXPs
+		return Fork
+
+	'''
+	Clears the routing information of all nodes in topology (incl. the compact routes and the path indexes), or of the given nodes.
+
+	IF no list_of_nodes is given
+	THEN 	increase the routing generation, i.e., the routing tables of every node are treated as empty, and they are cleared when the node is accessed next (see the methods "get_node(...)" and "iterate_nodes(...)"); the cost does not depend on the number of nodes
+	ELSE 	clear the routing tables of the given nodes
 	'''
 	def clear_routing_information(self,list_of_nodes=None):
 		if not list_of_nodes:
-			list_of_nodes = self.get_all_nodes_ASNs()
+			self.routing_generation += 1
+			self.compact_routes.clear()
+			self.compact_RIBs.clear()
+			self.compact_routes_version += 1
+			self.compact_routes_index = None
+			self.path_indexes.clear()
+			return
+		if self.compact_routes or self.compact_RIBs:
+			self.expand_compact_routes()
 		for ASN in list_of_nodes:
 			self.get_node(ASN).clear_routing_tables()
+			self.invalidate_path_index(ASN=ASN)
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Array-backed alternative to the Rgraph (see Rgraph.py), with the same methods; e.g., use "create_Rgraph_from_edges(anycasters, edges, Rgraph_class=CSRRgraph)" instead of "create_Rgraph_from_edges(anycasters, edges)".
+# The nodes are mapped to integer indices, and the predecessors and successors of the nodes are stored in Compressed Sparse Row (CSR) arrays, which are (re)built after the Rgraph has been changed, the first time they are needed.
+# The probabilistic coloring and the removal of the leaves are computed over the arrays, level by level of the topological sorting (i.e., for all the nodes of a level at once), instead of node by node over the dictionaries of the nx.DiGraph.
+# The colors are kept in the same dictionary ("colors") as in the Rgraph, so the measurement selection methods (see measurement_selection_methods.py) work with both.
+#
+
+from collections import defaultdict
+from itertools import chain
+import numpy as np
+import networkx as nx
+from Rgraph import Rgraph
+
+
+'''
+Returns the positions indptr[i]...indptr[i+1]-1 for all the given nodes i (i.e., the concatenation of their CSR rows); as gao_rexford_routing._get_rows_of.
+'''
+def _get_rows_of(indptr, nodes):
+	starts = indptr[nodes]
+	counts = indptr[nodes+1] - starts
+	offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+	return offsets + np.arange(int(counts.sum()), dtype=np.int64)
+
+
+
+'''
+The CSR arrays of the (current) structure of a CSRRgraph; they are built by the CSRRgraph, and dropped when it is changed.
+
+class variables:
+	(a) alive:			numpy array (bool) - True for the indices of the nodes of the Rgraph (i.e., not removed)
+	(b) nodes:			numpy array (int64) - the indices of the nodes of the Rgraph, in the order they were added
+	(c) in_degree, out_degree:	numpy arrays (int64) - the number of predecessors / successors of each index
+	(d) pred_indptr, pred_indices:	numpy arrays (int64) - the predecessors of the node with index i are in the positions pred_indptr[i]...pred_indptr[i+1]-1 of "pred_indices", in the order the edges were added
+	(e) pred_edges:		numpy array (int64) - the position of the edge (see CSRRgraph.edge_sources) of each position of "pred_indices"
+	(f) succ_indptr, succ_indices:	numpy arrays (int64) - the successors, as the predecessors
+	(g) levels:			list of numpy arrays - the indices of the nodes per level of the topological sorting (i.e., all the predecessors of a node are in earlier levels); computed the first time it is requested
+'''
+class RgraphArrays:
+	def __init__(self, G):
+		nb_of_indices = len(G.index_to_ID)
+		self.alive = np.ones(nb_of_indices, dtype=bool)
+		if G.removed_indices:
+			self.alive[list(G.removed_indices)] = False
+		self.nodes = np.flatnonzero(self.alive)
+		sources = np.array(G.edge_sources, dtype=np.int64)
+		targets = np.array(G.edge_targets, dtype=np.int64)
+		keep = self.alive[sources] & self.alive[targets]
+		if G.removed_edges:
+			keep[list(G.removed_edges)] = False
+		edges = np.flatnonzero(keep)
+
+		self.pred_edges = edges[np.argsort(targets[edges], kind='stable')]
+		self.pred_indices = sources[self.pred_edges]
+		self.in_degree = np.bincount(targets[edges], minlength=nb_of_indices)
+		self.pred_indptr = np.concatenate(([0], np.cumsum(self.in_degree)))
+		succ_edges = edges[np.argsort(sources[edges], kind='stable')]
+		self.succ_indices = targets[succ_edges]
+		self.out_degree = np.bincount(sources[edges], minlength=nb_of_indices)
+		self.succ_indptr = np.concatenate(([0], np.cumsum(self.out_degree)))
+		self.levels = None
+
+	'''
+	Returns the levels of the topological sorting (Kahn's algorithm, for all the nodes of a level at once); raises an exception if the Rgraph has a cycle.
+	'''
+	def get_levels(self):
+		if self.levels is None:
+			remaining_in_degree = self.in_degree.copy()
+			frontier = self.nodes[remaining_in_degree[self.nodes] == 0]
+			levels = []
+			nb_of_sorted_nodes = 0
+			while len(frontier) > 0:
+				levels.append(frontier)
+				nb_of_sorted_nodes += len(frontier)
+				successors = self.succ_indices[_get_rows_of(self.succ_indptr, frontier)]
+				remaining_in_degree -= np.bincount(successors, minlength=len(remaining_in_degree))
+				successors = np.unique(successors)
+				frontier = successors[remaining_in_degree[successors] == 0]
+			if nb_of_sorted_nodes != len(self.nodes):
+				raise Exception('The Rgraph has a cycle.')
+			self.levels = levels
+		return self.levels
+
+
+
+class CSRRgraph(Rgraph):
+	'''
+	Array-backed Rgraph, with the same methods as the Rgraph (see the description at the top of the file).
+	A removed node keeps its index (which is not reused; a node that is added again gets a new index), and a removed edge keeps its position, i.e., they are only skipped when the arrays are built.
+
+	class variables (in addition to "colors", and the other dictionaries of the Rgraph, except for "nxG"):
+		(a) ID_to_index:		dictionary - dictionary with (i) keys the IDs (ASNs) of the nodes and (ii) values their index
+		(b) index_to_ID:		list - the ID of each index
+		(c) removed_indices:	set - the indices of the removed nodes
+		(d) edge_sources, edge_targets:	lists - the indices of the nodes ID1, ID2 of each directed edge ID1-->ID2, in the order the edges were added
+		(e) edge_preferences:	list - the local_preference of each edge (or None)
+		(f) edge_index:			dictionary - dictionary with (i) keys the tuples (index1, index2) and (ii) values the position of the edge; None after edges have been added in bulk (see the method "add_edges(...)"), until it is requested
+		(g) removed_edges:		set - the positions of the removed edges
+		(h) routes:				dictionary - dictionary with (i) keys the IDs and (ii) values the route of the node (see Rgraph.set_route)
+		(i) arrays:				RgraphArrays - the CSR arrays of the current structure, or None if they have not been built since the last change
+	'''
+
+	'''
+	Contructor for object of the class CSRRgraph. Creates an empty Rgraph.
+	'''
+	def __init__(self):
+		self.ID_to_index = {}
+		self.index_to_ID = []
+		self.removed_indices = set()
+		self.edge_sources = []
+		self.edge_targets = []
+		self.edge_preferences = []
+		self.edge_index = {}
+		self.removed_edges = set()
+		self.routes = {}
+		self.arrays = None
+		self.set_of_node_IDs_with_route_valid = set()
+		self.routes_from_Topo = defaultdict()
+		self.paths_from_Topo = defaultdict(list)
+		self.routes_from_Graph = defaultdict()
+		self.colors = defaultdict(dict)
+
+
+	'''
+	Returns the CSR arrays of the current structure of the Rgraph (see RgraphArrays); they are built IF the Rgraph has been changed since they were last built.
+	'''
+	def get_arrays(self):
+		if self.arrays is None:
+			self.arrays = RgraphArrays(self)
+		return self.arrays
+
+
+	def print_info(self):
+		print('CSRRgraph with {} nodes and {} edges'.format(len(self.ID_to_index), len(self.get_arrays().pred_indices)))
+
+
+	def has_node(self,ID):
+		return ID in self.ID_to_index
+
+
+	def has_edge(self,ID1,ID2):
+		index1 = self.ID_to_index.get(ID1)
+		index2 = self.ID_to_index.get(ID2)
+		return (index1 is not None) and (index2 is not None) and ((index1, index2) in self.get_edge_index())
+
+
+	def add_node(self,ID):
+		if ID not in self.ID_to_index:
+			self.ID_to_index[ID] = len(self.index_to_ID)
+			self.index_to_ID.append(ID)
+			self.arrays = None
+
+
+	def add_edge(self,ID1,ID2, local_preference=None):	# directed edge ID1-->ID2, local_preference is the local preference of node ID2 to node ID1
+		index1 = self.ID_to_index.get(ID1)
+		if index1 is None:
+			self.add_node(ID1)
+			index1 = self.ID_to_index[ID1]
+		index2 = self.ID_to_index.get(ID2)
+		if index2 is None:
+			self.add_node(ID2)
+			index2 = self.ID_to_index[ID2]
+		edge_index = self.get_edge_index()
+		if (index1, index2) not in edge_index:
+			edge_index[(index1, index2)] = len(self.edge_sources)
+			self.edge_sources.append(index1)
+			self.edge_targets.append(index2)
+			self.edge_preferences.append(local_preference)
+			self.arrays = None
+
+	'''
+	Returns the dictionary "edge_index"; it is built (from the lists of the edges) IF edges have been added in bulk since it was last built.
+	'''
+	def get_edge_index(self):
+		if self.edge_index is None:
+			self.edge_index = {edge: e for e, edge in enumerate(zip(self.edge_sources, self.edge_targets)) if e not in self.removed_edges}
+		return self.edge_index
+
+	'''
+	Adds the given edges (as the method "add_edge(...)" for each edge, in the given order), with the duplicate edges removed over arrays.
+
+	Input argument:
+		(a) edges: list of tuples (ID1, ID2, local_preference) for the directed edges ID1-->ID2
+	'''
+	def add_edges(self, edges):
+		if len(edges) == 0:
+			return
+		IDs1 = [edge[0] for edge in edges]
+		IDs2 = [edge[1] for edge in edges]
+		ID_to_index = self.ID_to_index
+		new_IDs = [ID for ID in dict.fromkeys(chain.from_iterable(zip(IDs1, IDs2))) if ID not in ID_to_index]	# the new nodes, in the same order as added by "add_edge(...)"
+		if new_IDs:
+			ID_to_index.update(zip(new_IDs, range(len(self.index_to_ID), len(self.index_to_ID) + len(new_IDs))))
+			self.index_to_ID.extend(new_IDs)
+			self.arrays = None
+		sources = np.fromiter(map(ID_to_index.__getitem__, IDs1), dtype=np.int64, count=len(IDs1))
+		targets = np.fromiter(map(ID_to_index.__getitem__, IDs2), dtype=np.int64, count=len(IDs2))
+		nb_of_indices = len(self.index_to_ID)
+		existing_codes = np.array(self.edge_sources, dtype=np.int64) * nb_of_indices + np.array(self.edge_targets, dtype=np.int64)	# the edges that already exist are not added again
+		if self.removed_edges:
+			existing_codes = np.delete(existing_codes, list(self.removed_edges))
+		first = np.unique(np.concatenate((existing_codes, sources * nb_of_indices + targets)), return_index=True)[1] - len(existing_codes)
+		new = np.sort(first[first >= 0])	# the first occurrence of every new edge, in the given order
+		if len(new) > 0:
+			self.edge_sources.extend(sources[new].tolist())
+			self.edge_targets.extend(targets[new].tolist())
+			self.edge_preferences.extend([edges[e][2] for e in new.tolist()])
+			self.edge_index = None
+			self.arrays = None
+
+	'''
+	Removes the node and its edges (the edges are skipped when the arrays are built, since the index of the node is not reused).
+	'''
+	def remove_node(self,ID):
+		if ID not in self.ID_to_index:
+			raise Exception('The node {} is not in the graph.'.format(ID))
+		self.removed_indices.add(self.ID_to_index.pop(ID))
+		self.routes.pop(ID, None)
+		self.arrays = None
+
+
+	def remove_edge(self,ID1,ID2):
+		if not self.has_edge(ID1,ID2):
+			raise Exception('The edge {}-{} is not in the graph.'.format(ID1,ID2))
+		self.removed_edges.add(self.get_edge_index().pop((self.ID_to_index[ID1], self.ID_to_index[ID2])))
+		self.arrays = None
+
+
+	def get_predecessors(self,ID):
+		arrays = self.get_arrays()
+		index = self.ID_to_index[ID]
+		return [self.index_to_ID[i] for i in arrays.pred_indices[arrays.pred_indptr[index]:arrays.pred_indptr[index+1]].tolist()]
+
+
+	def get_successors(self,ID):
+		arrays = self.get_arrays()
+		index = self.ID_to_index[ID]
+		return [self.index_to_ID[i] for i in arrays.succ_indices[arrays.succ_indptr[index]:arrays.succ_indptr[index+1]].tolist()]
+
+
+	def get_all_nodes_IDs(self):
+		return [self.index_to_ID[i] for i in self.get_arrays().nodes.tolist()]
+
+
+	def get_topological_sort(self):
+		return [self.index_to_ID[i] for level in self.get_arrays().get_levels() for i in level.tolist()]
+
+	'''
+	Returns a list of tuples (ID1, ID2, local_preference) for all the directed edges ID1-->ID2, with the edges into each node in the order of its predecessors (as Rgraph.get_list_of_edges); the nodes are in the order of their indices, i.e., the order they were added.
+	'''
+	def get_list_of_edges(self):
+		arrays = self.get_arrays()
+		targets = np.repeat(np.arange(len(arrays.in_degree), dtype=np.int64), arrays.in_degree)
+		ID = self.index_to_ID
+		return [(ID[i], ID[j], self.edge_preferences[e]) for i, j, e in zip(arrays.pred_indices.tolist(), targets.tolist(), arrays.pred_edges.tolist())]
+
+
+	def has_route(self,ID):
+		if ID not in self.ID_to_index:
+			raise KeyError(ID)
+		return self.routes.get(ID) is not None
+
+
+	def get_route(self,ID):
+		if self.has_route(ID):
+			return self.routes[ID]
+		else:
+			raise Exception('Node does not have route.')
+
+
+	def set_route(self,ID,route):
+		if self.has_route(ID):
+			raise Exception('Node has already route.')
+		if self.is_valid_route(route):
+			raise Exception('The route is invalid.')
+		self.routes[ID] = route
+
+
+	'''
+	Returns the Rgraph as a (new) nx.DiGraph, with the same nodes, edges (with the attribute "local_preference") and node attributes ("color" is None, as in the Rgraph, whose colors are kept in "colors"), in the order they were added.
+	'''
+	def to_networkx(self):
+		nxG = nx.DiGraph()
+		for ID in self.get_all_nodes_IDs():
+			nxG.add_node(ID, color=None, route=self.routes.get(ID))
+		arrays = self.get_arrays()
+		for e in np.sort(arrays.pred_edges).tolist():
+			nxG.add_edge(self.index_to_ID[self.edge_sources[e]], self.index_to_ID[self.edge_targets[e]], local_preference=self.edge_preferences[e])
+		return nxG
+
+	'''
+	Adds the nodes and the edges of the given nx.DiGraph (e.g., the "nxG" of an Rgraph) to the CSRRgraph; the edges into each node are added in the order of its predecessors, so the coloring is the same as for the nx.DiGraph.
+	'''
+	def load_from_networkx(self, nxG):
+		for ID, data in nxG.nodes(data=True):
+			self.add_node(ID)
+			if data.get('route') is not None:
+				self.routes[ID] = data['route']
+		for ID2 in nxG.nodes():
+			for ID1 in nxG.predecessors(ID2):
+				self.add_edge(ID1, ID2, nxG.edges[ID1, ID2].get('local_preference'))
+
+	'''
+	Removes all the leaves of the Rgraph, i.e., the nodes without successors and with one predecessor, in the reverse order of the topological sorting (as Rgraph.remove_all_leaves; a node whose successors are all removed leaves becomes a leaf too).
+	All the nodes of a level are checked at once, since there are no edges among them.
+	'''
+	def remove_all_leaves(self):
+		arrays = self.get_arrays()
+		out_degree = arrays.out_degree.copy()
+		leaves = []
+		for level in reversed(arrays.get_levels()):
+			level_leaves = level[(out_degree[level] == 0) & (arrays.in_degree[level] == 1)]
+			if len(level_leaves) > 0:
+				out_degree -= np.bincount(arrays.pred_indices[arrays.pred_indptr[level_leaves]], minlength=len(out_degree))
+				leaves.append(level_leaves)
+		for level_leaves in leaves:
+			for i in level_leaves.tolist():
+				self.remove_node(self.index_to_ID[i])
+
+
+	'''
+	### COLORING FUNCTIONS ###
+	'''
+
+	'''
+	Colors the given nodes from their predecessors, level by level of the topological sorting (as the method "color_node_from_neighbors(...)" for each node):
+	the color of a node is the sum of the colors of its predecessors (in the order of its predecessors) divided by the number of its predecessors; the nodes without predecessors are not colored.
+	The colors of a node are ordered (as the keys of its color dictionary) by their first appearance in the colors of its predecessors, since this order is used when the colors are summed in other methods (e.g., see measurement_selection_methods.py).
+
+	Input arguments:
+		(a) color_matrix: numpy array (float64) with one row per index and one column per color; it is updated
+		(b) color_order: numpy array (int64) with the position of each color in the color dictionary of each index (for the colors with positive probability); it is updated
+		(c) colored: numpy array (bool) - True for the indices with a color; it is updated
+		(d) to_color: numpy array (bool) - True for the indices to be colored
+
+	Returns:
+		The indices of the nodes that were colored
+	'''
+	def color_from_predecessors(self, color_matrix, color_order, colored, to_color):
+		arrays = self.get_arrays()
+		nb_of_colors = color_matrix.shape[1]
+		colored_nodes = []
+		for level in arrays.get_levels():
+			nodes = level[to_color[level] & (arrays.in_degree[level] > 0)]
+			if len(nodes) == 0:
+				continue
+			if not colored[arrays.pred_indices[_get_rows_of(arrays.pred_indptr, nodes)]].all():
+				raise Exception('Not all predecessors are colored.')
+			nodes = nodes[np.argsort(-arrays.in_degree[nodes], kind='stable')]	# the nodes with more than r predecessors are the first ones
+			counts = arrays.in_degree[nodes]
+			starts = arrays.pred_indptr[nodes]
+			predecessors = arrays.pred_indices[starts]
+			color = color_matrix[predecessors]
+			first_appearance = np.where(color > 0, color_order[predecessors], np.iinfo(np.int64).max)
+			for r in range(1, int(counts[0])):	# the colors of the predecessors are added one after another (i.e., in the same order of summation as "color_node_from_neighbors(...)")
+				nb_of_nodes = int(np.count_nonzero(counts > r))
+				predecessors = arrays.pred_indices[starts[:nb_of_nodes] + r]
+				color[:nb_of_nodes] += color_matrix[predecessors]
+				first_appearance[:nb_of_nodes] = np.minimum(first_appearance[:nb_of_nodes], np.where(color_matrix[predecessors] > 0, r*nb_of_colors + color_order[predecessors], np.iinfo(np.int64).max))
+			color /= counts[:, None]
+			sums = color.sum(axis=1)
+			invalid = np.abs(sums - 1.0) > 0.0001
+			if invalid.any():
+				raise Exception('Color from predecessors is not valid (sum of probabilities = {}).'.format(sums[invalid][0]))
+			color_matrix[nodes] = color
+			color_order[nodes] = np.argsort(np.argsort(first_appearance, axis=1, kind='stable'), axis=1)
+			colored[nodes] = True
+			colored_nodes.append(nodes)
+		return np.concatenate(colored_nodes) if colored_nodes else np.zeros(0, dtype=np.int64)
+
+	'''
+	Sets the colors (in the dictionary "colors") of the given nodes from the rows of the color matrix, in the order of the color_order matrix, keeping only the colors with positive probability (as the method "color_node_from_neighbors(...)").
+	The nodes are grouped by their (ordered) colors with positive probability, e.g., all the nodes with the same certain color, so the keys of the dictionaries are computed once per group.
+	'''
+	def set_colors_from_matrix(self, nodes, color_matrix, color_order, list_of_colors):
+		if len(nodes) == 0:
+			return
+		nb_of_colors = color_matrix.shape[1]
+		color = color_matrix[nodes]
+		columns = np.argsort(np.where(color > 0, color_order[nodes], np.iinfo(np.int64).max), axis=1, kind='stable')
+		patterns = np.where(np.take_along_axis(color, columns, axis=1) > 0, columns, nb_of_colors)	# the columns of the colors with positive probability, in their order, padded with nb_of_colors
+		if (nb_of_colors+1)**nb_of_colors < 2**62:	# a pattern is encoded as an integer (with base nb_of_colors+1), which is faster to group than the rows
+			codes = patterns @ ((nb_of_colors+1)**np.arange(nb_of_colors, dtype=np.int64))
+		else:
+			codes = np.unique(patterns, axis=0, return_inverse=True)[1].reshape(-1)
+		order = np.argsort(codes, kind='stable')
+		boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+		index_to_ID = self.index_to_ID
+		for members in np.split(order, boundaries):
+			pattern = [c for c in patterns[members[0]].tolist() if c < nb_of_colors]
+			keys = [list_of_colors[c] for c in pattern]
+			IDs = [index_to_ID[i] for i in nodes[members].tolist()]
+			if len(keys) == 1:	# e.g., the nodes with a certain color
+				key = keys[0]
+				self.colors.update(zip(IDs, [{key: value} for value in color[members, pattern[0]].tolist()]))
+			else:
+				self.colors.update(zip(IDs, [dict(zip(keys, values)) for values in color[np.ix_(members, pattern)].tolist()]))
+
+	'''
+	Sets the probabilistic coloring of the Rgraph (as Rgraph.set_probabilistic_coloring), for all the nodes of each level of the topological sorting at once.
+	'''
+	def set_probabilistic_coloring(self, source_nodes):
+		source_nodes = list(source_nodes)
+		source_indices = []
+		for ID in source_nodes:
+			if not self.has_node(ID):
+				raise Exception("The source node {} is not in the graph".format(ID))
+			if self.get_arrays().in_degree[self.ID_to_index[ID]] > 0:
+				raise Exception("The source node {} is not a root".format(ID))
+			if self.has_color(ID):
+				raise Exception("The source node {} already has a color".format(ID))
+			source_indices.append(self.ID_to_index[ID])
+		set_of_sources = set(source_nodes)
+		for ID, color in self.colors.items():
+			if color and (ID not in set_of_sources) and (ID in self.ID_to_index):
+				raise Exception('Node has already color.')
+
+		nb_of_indices = len(self.index_to_ID)
+		color_matrix = np.zeros((nb_of_indices, len(source_nodes)))
+		color_matrix[source_indices, np.arange(len(source_nodes))] = 1.0
+		color_order = np.tile(np.arange(len(source_nodes), dtype=np.int64), (nb_of_indices, 1))
+		colored = np.zeros(nb_of_indices, dtype=bool)
+		colored[source_indices] = True
+		for ID in source_nodes:
+			color_dict = dict.fromkeys(source_nodes,0)
+			color_dict[ID] = 1.0
+			self.colors[ID] = color_dict
+		nodes = self.color_from_predecessors(color_matrix, color_order, colored, self.get_arrays().alive & ~colored)
+		self.set_colors_from_matrix(nodes, color_matrix, color_order, source_nodes)
+
+	'''
+	Updates the probabilistic coloring of the Rgraph (as Rgraph.update_forward_probabilistic_coloring), for all the nodes (without certain color) of each level of the topological sorting at once.
+	'''
+	def update_forward_probabilistic_coloring(self):
+		nb_of_indices = len(self.index_to_ID)
+		list_of_colors = []
+		color_to_column = {}
+		entries = []
+		for ID, color in self.colors.items():
+			index = self.ID_to_index.get(ID)
+			if (index is None) or (not color):
+				continue
+			for position, (c, p) in enumerate(color.items()):
+				if c not in color_to_column:
+					color_to_column[c] = len(list_of_colors)
+					list_of_colors.append(c)
+				entries.append((index, color_to_column[c], p, position))
+		color_matrix = np.zeros((nb_of_indices, len(list_of_colors)))
+		color_order = np.zeros((nb_of_indices, len(list_of_colors)), dtype=np.int64)
+		colored = np.zeros(nb_of_indices, dtype=bool)
+		if entries:
+			(rows, columns, values, positions) = zip(*entries)
+			color_matrix[rows, columns] = values
+			color_order[rows, columns] = positions
+			colored[list(rows)] = True
+		certain = colored & (color_matrix.max(axis=1, initial=0) == 1)
+		nodes = self.color_from_predecessors(color_matrix, color_order, colored, self.get_arrays().alive & ~certain)
+		self.set_colors_from_matrix(nodes, color_matrix, color_order, list_of_colors)
@@ -0,0 +1,571 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+
+import random
+from collections import defaultdict
+from collections.abc import Mapping
+import numpy as np
+from BGPnode import BGPnode
+from BGPtopology import BGPtopology
+from compact_routes import CompactPaths, CompactAllPaths
+
+
+'''
+Read-only mapping over the neighbors of one node of a CSRtopology, with (i) keys the ASNs of the neighbors and (ii) values either the peering relation type ({1,0,-1}) or the preference of the neighbor.
+It is used by the CSRnode in place of the "ASneighbors" and "ASneighbors_preference" dictionaries of the BGPnode.
+
+The values of a row are materialized (as a python dictionary) only the first time they are requested, i.e., only for the nodes that take part in the routing; the CSRtopology drops the materialized rows when the routing information is cleared.
+'''
+class NeighborMapping(Mapping):
+	def __init__(self, node, field):
+		self.node = node
+		self.field = field
+
+	def _get_dict(self):
+		return self.node.get_neighbor_dicts()[self.field]
+
+	def __getitem__(self, ASN):
+		return self._get_dict()[ASN]
+
+	def __contains__(self, ASN):
+		return ASN in self._get_dict()
+
+	def __iter__(self):
+		return iter(self._get_dict())
+
+	def __len__(self):
+		return len(self._get_dict())
+
+	def keys(self):
+		return self._get_dict().keys()
+
+	def items(self):
+		return self._get_dict().items()
+
+	def values(self):
+		return self._get_dict().values()
+
+	def __repr__(self):
+		return repr(self._get_dict())
+
+
+
+'''
+Thin view of a node of a CSRtopology. It is a BGPnode (i.e., it keeps its own routing information and runs the same BGP methods), but its "ASneighbors" and "ASneighbors_preference" are views over the arrays of the CSRtopology.
+
+class variables (in addition to the ones of the BGPnode):
+	(a) index: 	integer - the index of the node in the arrays of the CSRtopology
+'''
+class CSRnode(BGPnode):
+	def __init__(self, ASN, Topology, index):
+		BGPnode.__init__(self, ASN, Topology)
+		self.index = index
+		self._neighbor_dicts = None
+		self.ASneighbors = NeighborMapping(self, 'relation')
+		self.ASneighbors_preference = NeighborMapping(self, 'preference')
+		if Topology.compact_routes:
+			self.paths = CompactPaths(self)
+		if Topology.compact_RIBs:
+			self.all_paths = CompactAllPaths(self)
+
+	'''
+	Returns a dictionary {'relation': {ASN: relation}, 'preference': {ASN: preference}} for the neighbors of the node; the dictionary is built from the arrays of the topology the first time it is requested.
+	'''
+	def get_neighbor_dicts(self):
+		if self._neighbor_dicts is None:
+			relation = {}
+			preference = {}
+			for ASN, rel, pref in self.Topology.get_neighbors_of_index(self.index):
+				relation[ASN] = rel
+				preference[ASN] = pref
+			self._neighbor_dicts = {'relation': relation, 'preference': preference}
+		return self._neighbor_dicts
+
+	'''
+	Drops the materialized neighbor dictionaries (e.g., after a change in the links of the node).
+	'''
+	def invalidate_neighbors(self):
+		self._neighbor_dicts = None
+
+	def add_ASneighbor(self,ASN,relation):
+		if not self.has_ASneighbor(ASN):
+			if relation == 'customer':
+				rel = -1
+			elif relation == 'peer':
+				rel = 0
+			elif relation == 'provider':
+				rel = 1
+			else:
+				print('ERROR: Not valid peering relation')
+				return
+			self.Topology.add_directed_link(self.ASN, ASN, rel, random.random())
+
+	def remove_ASneighbor(self,ASN,withdraw_paths=True):
+		if self.has_ASneighbor(ASN):
+			self.Topology.remove_directed_link(self.ASN, ASN)
+			if withdraw_paths:
+				self.withdraw_paths_from_neighbor(ASN)
+
+
+
+'''
+Mapping with (i) keys the ASNs of the nodes of a CSRtopology and (ii) values the corresponding CSRnode objects; it replaces the "list_of_all_BGP_nodes" dictionary of the BGPtopology.
+
+Accessing a single node (e.g., list_of_all_BGP_nodes[ASN]) returns the same CSRnode as CSRtopology.get_node(...). Iterating over the items/values returns the existing CSRnode for nodes with routing information, and a temporary (empty) CSRnode for every other node; i.e., iterating over all the nodes does not create a permanent object per node.
+'''
+class NodeMapping(Mapping):
+	def __init__(self, Topology):
+		self.Topology = Topology
+
+	def __getitem__(self, ASN):
+		if not self.Topology.has_node(ASN):
+			raise KeyError(ASN)
+		return self.Topology.get_node(ASN)
+
+	def __contains__(self, ASN):
+		return self.Topology.has_node(ASN)
+
+	def __iter__(self):
+		return iter(self.Topology.index_to_ASN)
+
+	def __len__(self):
+		return len(self.Topology.index_to_ASN)
+
+	def items(self):
+		for ASN in self.Topology.index_to_ASN:
+			yield ASN, self.Topology.peek_node(ASN)
+
+	def values(self):
+		for ASN in self.Topology.index_to_ASN:
+			yield self.Topology.peek_node(ASN)
+
+
+
+class CSRtopology(BGPtopology):
+	'''
+	Array-backed network topology, with the same methods as the BGPtopology.
+	The ASNs are mapped to dense integer indices (0,1,2,...), and the links are stored in Compressed Sparse Row (CSR) arrays, i.e., the neighbors of the node with index i are in the positions indptr[i]...indptr[i+1]-1 of the arrays "indices", "relations" and "preferences".
+	The nodes are returned as CSRnode objects (thin views over the arrays), which keep their own routing information; a CSRnode object is created only when a node is requested (e.g., get_node(...)), and it is dropped when its routing information is cleared.
+
+	Links added (or removed) after the last call of the method "compile()" are kept in a small overlay (i.e., "pending_links" and "removed_slots"), which is merged into the arrays by the next "compile()".
+
+	class variables:
+		(a) ASN_to_index:		dictionary - dictionary with (i) keys the ASNs and (ii) values the index of the node
+		(b) index_to_ASN:		list - the ASN of each index
+		(c) indptr:				numpy array (int64) - the CSR row pointers
+		(d) indices:			numpy array (int32) - the index of the neighbor in each position
+		(e) relations:			numpy array (int8) - values {1,0,-1} if the neighbor is {provider,peer,customer} respectively
+		(f) preferences:		numpy array (float64) - the preference of the node for the neighbor (used for BGP tie breaker); float in [0,1]
+		(g) pending_links:		dictionary of dictionaries - links not yet compiled, with (i) keys the index of the node, (ii) keys the index of the neighbor and (iii) values a tuple (relation, preference)
+		(h) removed_slots:		set - positions in the arrays of links that have been removed
+		(i) node_views:			dictionary - dictionary with (i) keys the indices and (ii) values the CSRnode objects of the nodes that have been requested (and keep routing information)
+		(j) list_of_all_BGP_nodes: 	a NodeMapping, i.e., a read-only dictionary-like view with (i) keys the ASNs of the nodes and (ii) values the corresponding CSRnode objects
+		(k) shared_nodes:		True/False - whether "ASN_to_index" and "index_to_ASN" are shared with forks of the topology (see the method "fork()"); they are copied before they are changed
+		(l) node_class:			class (default CSRnode) - the class of the CSRnode objects (see BGPtopology.enable_instrumentation)
+	'''
+
+
+	'''
+	Contructor for object of the class CSRtopology. Creates an empty topology.
+	'''
+	def __init__(self):
+		BGPtopology.__init__(self)
+		self.ASN_to_index = {}
+		self.index_to_ASN = []
+		self.indptr = np.zeros(1, dtype=np.int64)
+		self.indices = np.zeros(0, dtype=np.int32)
+		self.relations = np.zeros(0, dtype=np.int8)
+		self.preferences = np.zeros(0, dtype=np.float64)
+		self.pending_links = defaultdict(dict)
+		self.removed_slots = set()
+		self.node_views = {}
+		self.list_of_all_BGP_nodes = NodeMapping(self)
+		self.shared_nodes = False
+		self.node_class = CSRnode
+
+
+	### methods for nodes ###
+
+	def add_node(self,ASN):
+		if not self.has_node(ASN):
+			self.unshare_nodes()
+			self.ASN_to_index[ASN] = len(self.index_to_ASN)
+			self.index_to_ASN.append(ASN)
+			self.links_version += 1
+
+	def has_node(self,ASN):
+		return ASN in self.ASN_to_index
+
+	'''
+	Returns the CSRnode of the given ASN (if it exists in the topology); the same object is returned until the routing information of the node is cleared.
+	'''
+	def get_node(self,ASN):
+		index = self.ASN_to_index.get(ASN)
+		if index is not None:
+			node = self.node_views.get(index)
+			if node is None:
+				node = self.node_class(ASN, self, index)
+				self.node_views[index] = node
+			return node
+
+	'''
+	Returns the CSRnode of the given ASN if it exists, otherwise a temporary (not stored) CSRnode without routing information.
+	'''
+	def peek_node(self,ASN):
+		index = self.ASN_to_index.get(ASN)
+		if index is not None:
+			node = self.node_views.get(index)
+			if node is None:
+				node = self.node_class(ASN, self, index)
+			return node
+
+	'''
+	Deletes the given node (without links) from the topology; the nodes with a higher index are renumbered (i.e., their index decreases by one), so the cost is linear in the size of the topology.
+	'''
+	def delete_node(self,ASN):
+		if self.compact_routes or self.compact_RIBs:
+			self.expand_compact_routes()
+		self.compile()
+		self.unshare_nodes()
+		i = self.ASN_to_index[ASN]
+		self.indptr = np.delete(self.indptr, i)
+		self.indices = (self.indices - (self.indices > i)).astype(np.int32)
+		del self.index_to_ASN[i]
+		self.links_version += 1
+		self.ASN_to_index = {ASN:index for index, ASN in enumerate(self.index_to_ASN)}
+		node_views = {}
+		for index, node in self.node_views.items():
+			if index != i:
+				node.index = index - (index > i)
+				node_views[node.index] = node
+		self.node_views = node_views
+		self.invalidate_path_index(ASN=ASN)
+
+	'''
+	Copies "ASN_to_index" and "index_to_ASN", if they are shared with forks of the topology (i.e., before they are changed).
+	'''
+	def unshare_nodes(self):
+		if self.shared_nodes:
+			self.ASN_to_index = dict(self.ASN_to_index)
+			self.index_to_ASN = list(self.index_to_ASN)
+			self.shared_nodes = False
+
+	'''
+	Returns the existing CSRnode objects, i.e., of the nodes with routing information (see the method "get_node(...)").
+	'''
+	def get_node_objects(self):
+		return self.node_views.values()
+
+	def get_nb_nodes(self):
+		return len(self.index_to_ASN)
+
+	def get_all_nodes_ASNs(self):
+		return list(self.index_to_ASN)
+
+
+	### methods for links ###
+
+	'''
+	Returns the position (in the CSR arrays) of the directed link from index i to index j, or None if it is not a compiled (and not removed) link.
+	'''
+	def find_slot(self,i,j):
+		if i >= len(self.indptr)-1:
+			return None
+		start = int(self.indptr[i])
+		end = int(self.indptr[i+1])
+		if start == end:
+			return None
+		positions = np.flatnonzero(self.indices[start:end] == j)
+		for pos in positions.tolist():
+			if (start+pos) not in self.removed_slots:
+				return start+pos
+		return None
+
+	def has_directed_link(self,i,j):
+		return (j in self.pending_links.get(i,())) or (self.find_slot(i,j) is not None)
+
+	'''
+	Returns a list of (ASN, relation, preference) tuples for the neighbors of the node with the given index.
+	'''
+	def get_neighbors_of_index(self,i):
+		neighbors = []
+		if i < len(self.indptr)-1:
+			start = int(self.indptr[i])
+			end = int(self.indptr[i+1])
+			if start < end:
+				cols = self.indices[start:end].tolist()
+				rels = self.relations[start:end].tolist()
+				prefs = self.preferences[start:end].tolist()
+				index_to_ASN = self.index_to_ASN
+				removed_slots = self.removed_slots
+				for k in range(end-start):
+					if removed_slots and ((start+k) in removed_slots):
+						continue
+					neighbors.append((index_to_ASN[cols[k]], rels[k], prefs[k]))
+		for j, (rel, pref) in self.pending_links.get(i,{}).items():
+			neighbors.append((self.index_to_ASN[j], rel, pref))
+		return neighbors
+
+	def _invalidate_node_views(self,*list_of_indices):
+		for i in list_of_indices:
+			node = self.node_views.get(i)
+			if node is not None:
+				node.invalidate_neighbors()
+
+	'''
+	Adds the directed link ASN1-->ASN2 (i.e., ASN2 becomes a neighbor of ASN1) with the given relation type (1,0,-1) and preference.
+	'''
+	def add_directed_link(self,ASN1,ASN2,relation,preference):
+		self.add_node(ASN1)
+		self.add_node(ASN2)
+		i = self.ASN_to_index[ASN1]
+		j = self.ASN_to_index[ASN2]
+		if not self.has_directed_link(i,j):
+			self.pending_links[i][j] = (relation, preference)
+			self.links_version += 1
+			self._invalidate_node_views(i)
+
+	'''
+	Removes the directed link ASN1-->ASN2 (i.e., ASN2 stops being a neighbor of ASN1).
+	'''
+	def remove_directed_link(self,ASN1,ASN2):
+		if self.has_node(ASN1) and self.has_node(ASN2):
+			i = self.ASN_to_index[ASN1]
+			j = self.ASN_to_index[ASN2]
+			if j in self.pending_links.get(i,()):
+				del self.pending_links[i][j]
+			else:
+				slot = self.find_slot(i,j)
+				if slot is not None:
+					self.removed_slots.add(slot)
+			self.links_version += 1
+			self._invalidate_node_views(i)
+
+	'''
+	Adds a link in the topology between the two given nodes (see BGPtopology.add_link); the preferences of the two nodes for each other are drawn (in the same order) as in the BGPtopology.
+	Only the nodes with routing information (i.e., an existing CSRnode) announce their paths over the new link.
+	'''
+	def add_link(self,ASN1, ASN2,peering_type):
+		if self.compact_routes or self.compact_RIBs:
+			self.expand_compact_routes()
+		self.add_node(ASN1)
+		self.add_node(ASN2)
+		if not self.has_link(ASN1,ASN2):
+			if peering_type == -1:
+				self.add_directed_link(ASN1, ASN2, -1, random.random())
+				self.add_directed_link(ASN2, ASN1, 1, random.random())
+			elif peering_type == 0:
+				self.add_directed_link(ASN1, ASN2, 0, random.random())
+				self.add_directed_link(ASN2, ASN1, 0, random.random())
+			else:
+				print('ERROR: Not valid peering relation')
+				return
+			for (ASN, neighbor) in ((ASN1, ASN2), (ASN2, ASN1)):
+				node = self.get_node_with_routing_information(ASN)
+				if node is not None:
+					node.export_paths_to_neighbor(neighbor)
+		else:
+			print('ERROR: a link already exists')
+
+	'''
+	Removes the given links from the topology, and updates the routing incrementally (see BGPtopology.remove_links); only the nodes with routing information (i.e., an existing CSRnode) withdraw paths.
+	'''
+	def remove_links(self,list_of_links):
+		if self.compact_routes or self.compact_RIBs:
+			self.expand_compact_routes()
+		removed_links = []
+		for (ASN1, ASN2) in list_of_links:
+			if self.has_node(ASN1) and self.has_node(ASN2) and self.has_link(ASN1,ASN2):
+				self.remove_directed_link(ASN1, ASN2)
+				self.remove_directed_link(ASN2, ASN1)
+				removed_links.append((ASN1, ASN2))
+		self.update_routing_after_removed_links(removed_links)
+
+	'''
+	Returns the CSRnode of the given ASN if it exists (i.e., if the node has routing information), otherwise None.
+	'''
+	def get_node_with_routing_information(self,ASN):
+		index = self.ASN_to_index.get(ASN)
+		if index is not None:
+			return self.node_views.get(index)
+
+	def has_link(self,ASN1,ASN2):
+		i = self.ASN_to_index.get(ASN1)
+		j = self.ASN_to_index.get(ASN2)
+		if (i is None) or (j is None):
+			return False
+		return self.has_directed_link(i,j) or self.has_directed_link(j,i)
+
+
+	'''
+	Merges the pending (added) and removed links into the CSR arrays. The neighbors of each node keep the order in which they were added (as in the "ASneighbors" dictionary of a BGPnode), since this order determines the order in which the BGP messages are sent.
+	'''
+	def compile(self):
+		if (not self.pending_links) and (not self.removed_slots) and (len(self.indptr)-1 == len(self.index_to_ASN)):
+			return
+		nb_nodes = len(self.index_to_ASN)
+		nb_compiled = len(self.indptr)-1
+
+		rows = np.repeat(np.arange(nb_compiled, dtype=np.int64), np.diff(self.indptr))
+		alive = np.ones(len(self.indices), dtype=bool)
+		if self.removed_slots:
+			alive[np.fromiter(self.removed_slots, dtype=np.int64, count=len(self.removed_slots))] = False
+
+		pending_rows = []
+		pending_cols = []
+		pending_rels = []
+		pending_prefs = []
+		for i, neighbors in self.pending_links.items():
+			for j, (rel, pref) in neighbors.items():
+				pending_rows.append(i)
+				pending_cols.append(j)
+				pending_rels.append(rel)
+				pending_prefs.append(pref)
+
+		rows = np.concatenate((rows[alive], np.array(pending_rows, dtype=np.int64)))
+		cols = np.concatenate((self.indices[alive], np.array(pending_cols, dtype=np.int32)))
+		rels = np.concatenate((self.relations[alive], np.array(pending_rels, dtype=np.int8)))
+		prefs = np.concatenate((self.preferences[alive], np.array(pending_prefs, dtype=np.float64)))
+
+		order = np.argsort(rows, kind='stable')
+		self.indices = cols[order]
+		self.relations = rels[order]
+		self.preferences = prefs[order]
+		self.indptr = np.zeros(nb_nodes+1, dtype=np.int64)
+		np.cumsum(np.bincount(rows, minlength=nb_nodes), out=self.indptr[1:])
+
+		self.pending_links = defaultdict(dict)
+		self.removed_slots = set()
+
+
+	'''
+	Returns the topology as CSR arrays (after compiling any pending changes); see BGPtopology.get_CSR_arrays
+	'''
+	def get_CSR_arrays(self):
+		self.compile()
+		return (self.index_to_ASN, self.indptr, self.indices, self.relations, self.preferences)
+
+
+	'''
+	Creates the nodes and links of the topology, based on the data of the given csv file; see BGPtopology.load_topology_from_csv (here, the bulk loading is used by default).
+	'''
+	def load_topology_from_csv(self,file,type='CAIDA', asn_as_str=False, bulk=True, chunk_size=200000):
+		report = BGPtopology.load_topology_from_csv(self, file, type=type, asn_as_str=asn_as_str, bulk=bulk, chunk_size=chunk_size)
+		self.compile()
+		return report
+
+
+	'''
+	Adds (at once) the given nodes and links to the topology (see BGPtopology.add_links_in_bulk); the new links are merged directly into the CSR arrays.
+	'''
+	def add_links_in_bulk(self, ASNs, first, second, peering_types, preferences):
+		if self.compact_routes or self.compact_RIBs:
+			self.expand_compact_routes()
+		self.compile()
+		for ASN in ASNs:
+			self.add_node(ASN)
+		position_to_index = np.array([self.ASN_to_index[ASN] for ASN in ASNs], dtype=np.int64)
+		nb_links = len(first)
+		rows = np.empty(2*nb_links, dtype=np.int64)
+		cols = np.empty(2*nb_links, dtype=np.int64)
+		rels = np.empty(2*nb_links, dtype=np.int8)
+		rows[0::2] = position_to_index[first]
+		rows[1::2] = position_to_index[second]
+		cols[0::2] = rows[1::2]
+		cols[1::2] = rows[0::2]
+		rels[0::2] = peering_types
+		rels[1::2] = -peering_types
+		prefs = np.asarray(preferences, dtype=np.float64).reshape(-1)
+
+		nb_nodes = len(self.index_to_ASN)
+		old_rows = np.repeat(np.arange(len(self.indptr)-1, dtype=np.int64), np.diff(self.indptr))
+		rows = np.concatenate((old_rows, rows))
+		order = np.argsort(rows, kind='stable')
+		self.indices = np.concatenate((self.indices, cols.astype(np.int32)))[order]
+		self.relations = np.concatenate((self.relations, rels))[order]
+		self.preferences = np.concatenate((self.preferences, prefs))[order]
+		self.indptr = np.zeros(nb_nodes+1, dtype=np.int64)
+		np.cumsum(np.bincount(rows, minlength=nb_nodes), out=self.indptr[1:])
+		self.links_version += 1
+		self._invalidate_node_views(*self.node_views.keys())
+
+
+	'''
+	Attaches the topology to a snapshot written by the method "save_topology_to_snapshot(...)"; the topology must be empty.
+	The CSR arrays are memory-mapped (read-only) from the snapshot files, i.e., they are not copied in memory, and the pages of the files are shared by all the processes that load the same snapshot.
+
+	Input arguments:
+		(a) dirname: the name of the snapshot directory
+		(b) mmap: if False, the arrays are read into memory
+	'''
+	def load_topology_from_snapshot(self,dirname,mmap=True):
+		if self.get_nb_nodes() > 0:
+			print('ERROR: the topology is not empty')
+			return
+		(meta, arrays) = self.read_snapshot(dirname, mmap=mmap)
+		self.index_to_ASN = arrays['ASNs'].tolist()
+		self.ASN_to_index = {ASN:i for i,ASN in enumerate(self.index_to_ASN)}
+		self.indptr = arrays['indptr']
+		self.indices = arrays['indices']
+		self.relations = arrays['relations']
+		self.preferences = arrays['preferences']
+		self.links_version += 1
+		self.load_IXPs_from_snapshot(meta, arrays)
+
+
+	'''
+	Creates the nodes and links of the topology from the given CSR arrays (see BGPtopology.get_CSR_arrays); the topology must be empty. The arrays are used as they are (i.e., not copied), and they must not be changed afterwards.
+	'''
+	def load_topology_from_CSR_arrays(self, ASNs, indptr, indices, relations, preferences):
+		if self.get_nb_nodes() > 0:
+			print('ERROR: the topology is not empty')
+			return
+		self.index_to_ASN = list(ASNs)
+		self.ASN_to_index = {ASN:i for i,ASN in enumerate(self.index_to_ASN)}
+		self.indptr = indptr
+		self.indices = indices
+		self.relations = relations
+		self.preferences = preferences
+		self.links_version += 1
+
+
+	'''
+	Returns a fork of the topology (see BGPtopology.fork), i.e., a CSRtopology with the same nodes, links and IXPs, but without routing information, for what-if scenarios that are simulated side by side with the topology and its other forks.
+	The fork shares the CSR arrays and the mapping of the ASNs to indices with the topology (the pending changes of the topology are compiled first), and keeps only its own changes, i.e., its added links in "pending_links", its removed links in "removed_slots", and its added nodes;
+	the changes of a fork do not change the topology or the other forks, and vice versa, since the arrays are never changed in place (e.g., "compile()" creates new arrays) and the shared mapping is copied before it is changed (see the method "unshare_nodes()").
+	Hence, a fork costs memory only for its changes (and its IXPs, which are copied); a fork that is compiled (e.g., after "delete_node(...)" or "get_CSR_arrays()") gets its own arrays.
+	'''
+	def fork(self):
+		self.compile()
+		Fork = CSRtopology()
+		(Fork.ASN_to_index, Fork.index_to_ASN) = (self.ASN_to_index, self.index_to_ASN)
+		(Fork.indptr, Fork.indices, Fork.relations, Fork.preferences) = (self.indptr, self.indices, self.relations, self.preferences)
+		Fork.shared_nodes = True
+		self.shared_nodes = True
+		Fork.propagation_mode = self.propagation_mode
+		IXPs = self.get_copy_of_IXPs()
+		if IXPs is not None:
+			Fork.list_of_all_IXP_nodes = IXPs
+		return Fork
+
+
+	'''
+	Clears the routing information of the given nodes (or of all nodes); since the routing information is kept only in the CSRnode objects, it drops the corresponding objects.
+	'''
+	def clear_routing_information(self,list_of_nodes=None):
+		if not list_of_nodes:
+			self.node_views.clear()
+			self.compact_routes.clear()
+			self.compact_RIBs.clear()
+			self.compact_routes_version += 1
+			self.compact_routes_index = None
+			self.path_indexes.clear()
+		else:
+			if self.compact_routes or self.compact_RIBs:
+				self.expand_compact_routes()
+			for ASN in list_of_nodes:
+				self.node_views.pop(self.ASN_to_index[ASN], None)
+				self.invalidate_path_index(ASN=ASN)
@@ -48,6 +48,13 @@ class IXPNode:
     def remove_ASN_member(self, ASN):
         self.members.remove(ASN)
 
+    def get_info_dict(self):
+        '''
+        Returns the IXP data (without the members) as a dictionary, in the format of the input argument raw_dict
+        '''
+        return {'id': self.id, 'name': self.name, 'name_long': self.name_long, 'city': self.city, 'country': self.country,
+                'region_continent': self.region_continent, 'status': self.status, 'website': self.website}
+
     ### methods for	printing information ###
     def print_info(self):
         print('***IXP***: '     +str(self.id))
@@ -69,6 +69,14 @@ class Rgraph():
 			self.nxG.add_edge(ID1,ID2,local_preference=local_preference)
 
 
+	'''
+	Adds the given edges, i.e., a list of tuples (ID1, ID2, local_preference), as the method "add_edge(...)" for each edge.
+	'''
+	def add_edges(self, edges):
+		for (ID1, ID2, local_preference) in edges:
+			self.add_edge(ID1, ID2, local_preference)
+
+
 	def remove_node(self,ID):
 		self.nxG.remove_node(ID)
 
@@ -77,6 +85,34 @@ class Rgraph():
 		self.nxG.remove_edge(ID1,ID2)
 
 
+	def get_predecessors(self,ID):
+		return self.nxG.predecessors(ID)
+
+
+	def get_successors(self,ID):
+		return self.nxG.successors(ID)
+
+
+	def get_all_nodes_IDs(self):
+		return self.nxG.nodes()
+
+
+	def get_topological_sort(self):
+		return nx.topological_sort(self.nxG)
+
+	'''
+	Returns a list of tuples (ID1, ID2, local_preference) for all the directed edges ID1-->ID2; the edges into each node are listed in the order of its predecessors (i.e., the order in which they are used by the coloring).
+	'''
+	def get_list_of_edges(self):
+		return [(ID1, ID2, self.nxG.edges[ID1, ID2].get('local_preference')) for ID2 in self.nxG.nodes() for ID1 in self.nxG.predecessors(ID2)]
+
+	'''
+	Returns the Rgraph as a nx.DiGraph (i.e., the graph "nxG" itself; see CSRRgraph.to_networkx for the other backend).
+	'''
+	def to_networkx(self):
+		return self.nxG
+
+
 	def has_color(self,ID):
 		#if self.nxG.nodes[ID]['color'] is None:
 		if len(self.colors[ID]) == 0:
@@ -92,9 +128,9 @@ class Rgraph():
 			raise Exception('Node does not have color.')
 
 	def remove_all_leaves(self):
-		topo_sort = nx.topological_sort(self.nxG)
+		topo_sort = self.get_topological_sort()
 		for n in reversed(list(topo_sort)):
-			if (len(list(self.nxG.successors(n))) == 0) and (len(list(self.nxG.predecessors(n))) == 1):
+			if (len(list(self.get_successors(n))) == 0) and (len(list(self.get_predecessors(n))) == 1):
 				self.remove_node(n)
 
 
@@ -143,7 +179,7 @@ class Rgraph():
 	checks if the given "route" corresponds to a node in the Graph 
 	'''
 	def is_valid_route(self,route):
-		if route in self.nxG.nodes():
+		if self.has_node(route):
 			return True
 		else:
 			return False
@@ -155,9 +191,9 @@ class Rgraph():
 		nb_active_conditions = sum([1 for c in conditions if c])
 
 		if subset_of_nodes is None:
-			list_of_nodes = self.nxG.nodes()
+			list_of_nodes = self.get_all_nodes_IDs()
 		else:
-			list_of_nodes = [n for n in self.nxG.nodes() if n in subset_of_nodes]
+			list_of_nodes = [n for n in self.get_all_nodes_IDs() if n in subset_of_nodes]
 
 		if nb_active_conditions == 0:
 			return list_of_nodes
@@ -224,7 +260,7 @@ class Rgraph():
 		(ii) normalizes the resulting value by diving it to the number of predecessors
 	'''
 	def color_node_from_neighbors(self,ID, recolor=False):
-		set_of_predecessors = list(self.nxG.predecessors(ID))
+		set_of_predecessors = list(self.get_predecessors(ID))
 
 		if len(set_of_predecessors) ==0:
 			#print('WARNING: node does not have any predecessors.')
@@ -280,7 +316,7 @@ class Rgraph():
 		if update_color_of_neighbors:
 			# update colors of predecessors
 			list_of_possible_predecessors = []
-			for p_ID in self.nxG.predecessors(ID):
+			for p_ID in self.get_predecessors(ID):
 				if self.get_color(p_ID).get(certain_color,0) > 0:
 					list_of_possible_predecessors.append(p_ID)
 			if len(list_of_possible_predecessors) == 0:
@@ -292,7 +328,7 @@ class Rgraph():
 					self.add_certain_color_to_node(p_ID_to_color, certain_color, update_color_of_neighbors=True)
 
 			# update colors of successors
-			for s_ID in self.nxG.successors(ID):
+			for s_ID in self.get_successors(ID):
 				if not self.has_certain_color(s_ID):
 					self.color_node_from_neighbors(s_ID, recolor=True)
 					if self.has_certain_color(s_ID):
@@ -310,7 +346,7 @@ class Rgraph():
 	'''
 	def update_forward_probabilistic_coloring(self):
 		nodes_to_skip = self.get_list_of_nodes(with_certain_color=True)
-		topo_sort = nx.topological_sort(self.nxG)
+		topo_sort = self.get_topological_sort()
 		for ID in topo_sort:
 			if ID in nodes_to_skip:
 				continue
@@ -328,7 +364,7 @@ class Rgraph():
 		for ID in source_nodes:
 			if not self.has_node(ID):
 				raise Exception("The source node {} is not in the graph".format(ID))
-			if len(list(self.nxG.predecessors(ID))) >0:
+			if len(list(self.get_predecessors(ID))) >0:
 				raise Exception("The source node {} is not a root".format(ID))
 			if self.has_color(ID):
 				raise Exception("The source node {} already has a color".format(ID))
@@ -337,7 +373,7 @@ class Rgraph():
 			self.color_node(ID,color_dict)
 
 		# color the other nodes (non roots), based on the color of their neighbors
-		topo_sort = nx.topological_sort(self.nxG)
+		topo_sort = self.get_topological_sort()
 		for ID in topo_sort:
 			if ID in source_nodes:
 				continue
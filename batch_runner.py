@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Command-line batch runner of catchment inference and measurement selection experiments (as in example_catchment_inference.py and example_measurement_selection.py), from a json config file:
+#	python3 batch_runner.py config.json [--processes N] [--restart]
+# Every configuration (i.e., a set of anycasters) is run in a pool of worker processes (see parallel_experiments.map_over_topology): the anycasters announce a prefix, the Rgraph is created and colored,
+# and (optionally) measurements are selected greedily and randomly (see measurement_selection_methods.py).
+# The result of each configuration is appended to a checkpoint file (in the output directory) as soon as it is completed; when the runner is started again with the same config, the completed configurations are skipped (the configurations that raised an exception are not checkpointed, i.e., they are run again).
+# When all the configurations are completed, the results are written (in the order of the configurations) to a single json file.
+# See DEFAULT_CONFIG for the options of the config file ("python3 batch_runner.py --print-default-config").
+#
+
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from functools import partial
+import numpy as np
+from BGPtopology import BGPtopology
+from CSRtopology import CSRtopology
+from create_Rgraph_from_Topo import create_Rgraph_from_Topo, create_Rgraph_from_edges
+from gao_rexford_routing import compute_anycast_routes
+from measurement_selection_methods import greedy_measurements, random_measurements
+from parallel_experiments import map_over_topology
+
+PREFIX = 0	# the prefix announced by the anycasters
+
+CONFIG_FILENAME = 'config.json'
+CHECKPOINT_FILENAME = 'checkpoint.jsonl'
+RESULTS_FILENAME = 'results.json'
+
+DEFAULT_CONFIG = {
+	'topology_file': None,				# a file of the CAIDA AS-relationship dataset (plain, gzip or bzip2); or
+	'snapshot_dirname': None,			# a snapshot of the topology (see BGPtopology.save_topology_to_snapshot), memory-mapped by every worker
+	'topology_class': 'BGPtopology',	# 'BGPtopology' or 'CSRtopology' (for topology_file)
+	'topology_seed': 0,					# the seed of the preferences of the links (for topology_file)
+	'propagation_mode': 'dfs',			# see BGPtopology.set_propagation_mode ('dfs' gives the same paths as the default 'recursive' mode, without the recursion limit)
+	'use_routing_engine': False,		# IF True, the routes are computed without BGP messages (see gao_rexford_routing.py)
+	'list_of_anycasters': None,			# explicit list with the list of anycasters (ASNs) of each configuration; or
+	'nb_of_configurations': 1,			# the number of configurations with random anycasters ...
+	'nb_of_anycasters': 2,				# ... with this number of anycasters each ...
+	'anycasters_seed': 0,				# ... drawn with this seed
+	'shortest_path_preference': True,	# see create_Rgraph_from_Topo
+	'in_percentage': False,				# see Rgraph.get_certain_catchment
+	'measurements': False,				# IF True, the measurements are selected (with the options below) after the coloring
+	'remove_leaves': True,				# IF True, the leaves of the Rgraph are removed before the selection of the measurements
+	'candidate_nodes': None,			# the ASNs that can be measured (e.g., with RIPE Atlas probes), or None for all; only the nodes with a color but not a certain color are candidates
+	'max_candidates': 1000,				# the maximum number of candidates (a random sample of them, if more)
+	'greedy_budget': 10,				# the number of measurements selected greedily (0 for none)
+	'random_budget': 10,				# the number of measurements selected randomly ...
+	'nb_of_random_samples': 5,			# ... in this number of samples (0 for none)
+	'lazy_evaluations': True,			# see measurement_selection_methods.greedy_measurements
+	'lazy_probabilities_threshold': 0,
+	'lazy_state_space_sampling': 20,
+	'seed': 0,							# the seed of the random choices of each configuration (combined with the position of the configuration)
+	'nb_of_processes': None,			# the number of worker processes (default: the number of CPUs)
+	'output_dir': 'results',			# the directory of the checkpoint and the results
+}
+
+RUN_OPTIONS = ('nb_of_processes', 'output_dir')	# the options that can change when an interrupted run is resumed
+
+
+
+'''
+Reads a config file (json), and returns the config, i.e., the DEFAULT_CONFIG updated with the options of the file.
+'''
+def read_config(config_filename):
+	with open(config_filename) as f:
+		options = json.load(f)
+	unknown = set(options).difference(DEFAULT_CONFIG)
+	if unknown:
+		raise Exception('Not valid options in the config file: {}'.format(sorted(unknown)))
+	config = dict(DEFAULT_CONFIG)
+	config.update(options)
+	if (config['topology_file'] is None) == (config['snapshot_dirname'] is None):
+		raise Exception('Exactly one of topology_file and snapshot_dirname must be given')
+	if config['topology_class'] not in ('BGPtopology', 'CSRtopology'):
+		raise Exception('Not valid topology class: {}'.format(config['topology_class']))
+	return config
+
+
+'''
+Loads the topology of the config (the snapshot is memory-mapped into a CSRtopology).
+'''
+def load_topology(config):
+	if config['snapshot_dirname'] is not None:
+		Topo = CSRtopology()
+		Topo.load_topology_from_snapshot(config['snapshot_dirname'])
+	else:
+		Topo = CSRtopology() if config['topology_class'] == 'CSRtopology' else BGPtopology()
+		random.seed(config['topology_seed'])
+		Topo.load_topology_from_csv(config['topology_file'], bulk=True)
+	Topo.set_propagation_mode(config['propagation_mode'])
+	return Topo
+
+
+'''
+Returns the list with the list of anycasters of each configuration: the explicit "list_of_anycasters" of the config, or random sets of anycasters drawn with "anycasters_seed" (the same for the same topology and config).
+'''
+def get_list_of_anycasters(config, Topo):
+	if config['list_of_anycasters'] is not None:
+		list_of_anycasters = [list(anycasters) for anycasters in config['list_of_anycasters']]
+		for anycasters in list_of_anycasters:
+			for ASN in anycasters:
+				if not Topo.has_node(ASN):
+					raise Exception('The anycaster {} is not in the topology'.format(ASN))
+		return list_of_anycasters
+	rnd = random.Random(config['anycasters_seed'])
+	ASNs = sorted(Topo.get_all_nodes_ASNs())
+	return [rnd.sample(ASNs, config['nb_of_anycasters']) for _ in range(config['nb_of_configurations'])]
+
+
+
+'''
+Returns the Rgraph of the prefix announced by the given anycasters (with the routing engine, or with BGP messages; then the routing information is cleared).
+'''
+def get_Rgraph(Topo, anycasters, config):
+	if config['use_routing_engine']:
+		edges = compute_anycast_routes(Topo, anycasters).get_Rgraph_edges(shortest_path_preference=config['shortest_path_preference'])
+		return create_Rgraph_from_edges(anycasters, edges)
+	try:
+		for ASN in anycasters:
+			Topo.add_prefix(ASN, PREFIX)
+		return create_Rgraph_from_Topo(Topo, PREFIX, shortest_path_preference=config['shortest_path_preference'])
+	finally:
+		Topo.clear_routing_information()
+
+
+'''
+Selects the measurements for the given (colored) Rgraph, as in example_measurement_selection.py, and adds the results to the given dictionary:
+	'nb_of_candidates', 'RND_nodes' and 'RND_eff' (lists with the nodes and efficiencies of each random sample), 'GRD_nodes' and 'GRD_eff' (of the greedy selection)
+'''
+def select_measurements(G, config, rnd, result):
+	if config['remove_leaves']:
+		G.remove_all_leaves()
+		G.colors = defaultdict(dict, ((ID, color) for ID, color in G.colors.items() if G.has_node(ID)))	# the colors of the other nodes do not change, since a leaf is not a predecessor of any node
+	candidates = set(G.get_list_of_nodes(with_color=True)) - set(G.get_list_of_nodes(with_certain_color=True))
+	if config['candidate_nodes'] is not None:
+		candidates = candidates.intersection(config['candidate_nodes'])
+	candidates = sorted(candidates)
+	if len(candidates) > config['max_candidates']:
+		candidates = rnd.sample(candidates, config['max_candidates'])
+	result['nb_of_candidates'] = len(candidates)
+	initial_colors = copy.deepcopy(G.colors)
+	lazy = {'lazy_probabilities_threshold': config['lazy_probabilities_threshold'], 'lazy_state_space_sampling': config['lazy_state_space_sampling']}
+	(result['RND_nodes'], result['RND_eff']) = ([], [])
+	for _ in range(config['nb_of_random_samples']):
+		(nodes, eff) = random_measurements(G, list(candidates), min(config['random_budget'], len(candidates)), **lazy)
+		result['RND_nodes'].append(nodes)
+		result['RND_eff'].append(eff)
+		G.colors = copy.deepcopy(initial_colors)
+	(result['GRD_nodes'], result['GRD_eff']) = ([], [])
+	if config['greedy_budget'] > 0:
+		(result['GRD_nodes'], result['GRD_eff']) = greedy_measurements(G, list(candidates), min(config['greedy_budget'], len(candidates)), lazy_evaluations=config['lazy_evaluations'], **lazy)
+		G.colors = copy.deepcopy(initial_colors)
+
+
+'''
+Runs a configuration (in a worker; see parallel_experiments.map_over_topology): the anycasters announce the prefix, the Rgraph is created and colored, and (IF config['measurements']) the measurements are selected.
+The random choices are seeded with the seed of the config and the position of the configuration, so the result does not depend on the worker or on the order of the configurations.
+
+Input arguments:
+	(a) Topo: the topology
+	(b) task: a tuple (k, anycasters), where k is the position of the configuration
+	(c) config: the config
+
+Returns:
+	A dictionary with the results (see also the function "select_measurements(...)"): 'certain_catchment', 'probabilistic_catchment', 'nb_nodes_w_color', and 'time' (in seconds);
+	or with 'error', if the configuration raised an exception
+'''
+def run_configuration(Topo, task, config=None):
+	(k, anycasters) = task
+	seed = '{}-{}'.format(config['seed'], k)
+	rnd = random.Random(seed)
+	random.seed(seed)
+	np.random.seed(rnd.randrange(2**32))
+	result = {}
+	start = time.time()
+	try:
+		if Topo.propagation_mode != config['propagation_mode']:	# e.g., a topology memory-mapped by the worker
+			Topo.set_propagation_mode(config['propagation_mode'])
+		G = get_Rgraph(Topo, anycasters, config)
+		G.set_probabilistic_coloring(anycasters)
+		result['certain_catchment'] = dict(G.get_certain_catchment(in_percentage=config['in_percentage']))
+		result['probabilistic_catchment'] = dict(G.get_probabilistic_catchment(in_percentage=config['in_percentage']))
+		result['nb_nodes_w_color'] = G.get_nb_of_nodes(with_color=True)
+		if config['measurements']:
+			select_measurements(G, config, rnd, result)
+	except Exception as e:
+		result['error'] = '{}: {}'.format(type(e).__name__, e)
+	result['time'] = time.time() - start
+	return result
+
+
+
+def _to_json(value):
+	if hasattr(value, 'item'):	# numpy scalars
+		return value.item()
+	raise TypeError('Not serializable: {}'.format(type(value)))
+
+
+'''
+Reads the checkpoint file (if it exists), and returns a dictionary with (i) keys the positions of the completed configurations and (ii) values the checkpoint records {'k': k, 'anycasters': anycasters, 'result': result}.
+A last line that was not completely written (e.g., due to a crash) is ignored (see also the function "truncate_incomplete_line(...)"), the records of other anycasters than the current configurations are ignored,
+and the records of configurations that raised an exception are ignored (i.e., these configurations are run again).
+'''
+def read_checkpoint(checkpoint_filename, list_of_anycasters):
+	completed = {}
+	if not os.path.exists(checkpoint_filename):
+		return completed
+	with open(checkpoint_filename) as f:
+		for line in f:
+			try:
+				record = json.loads(line)
+			except ValueError:
+				continue
+			k = record['k']
+			if (0 <= k < len(list_of_anycasters)) and (record['anycasters'] == list_of_anycasters[k]) and ('error' not in record['result']):
+				completed[k] = record
+	return completed
+
+
+'''
+Removes the last line of the checkpoint file (if it exists) IF it was not completely written (i.e., it does not end with a newline; e.g., due to a crash), so that the records appended when the run is resumed start on a new line.
+'''
+def truncate_incomplete_line(checkpoint_filename, chunk_size=65536):
+	if not os.path.exists(checkpoint_filename):
+		return
+	with open(checkpoint_filename, 'rb+') as f:
+		end = f.seek(0, os.SEEK_END)
+		position = end
+		while position > 0:
+			start = max(position - chunk_size, 0)
+			f.seek(start)
+			chunk = f.read(position - start)
+			newline = chunk.rfind(b'\n')
+			if newline >= 0:
+				position = start + newline + 1
+				break
+			position = start
+		if position < end:
+			f.truncate(position)
+			f.flush()
+			os.fsync(f.fileno())
+
+
+'''
+Appends a record to the checkpoint file, and writes it to the disk (i.e., it is kept even if the process crashes right after); the record of a configuration that raised an exception is not appended, so that the configuration is run again when the run is resumed.
+The record is returned as it will be read from the checkpoint (e.g., the keys of the dictionaries as strings), so the results of resumed and not resumed runs are the same.
+'''
+def append_to_checkpoint(checkpoint_file, record):
+	line = json.dumps(record, default=_to_json)
+	if 'error' not in record['result']:
+		checkpoint_file.write(line + '\n')
+		checkpoint_file.flush()
+		os.fsync(checkpoint_file.fileno())
+	return json.loads(line)
+
+
+'''
+Writes the given object to the given json file; the file is written first to a temporary file and then renamed, so it is never left incomplete.
+'''
+def write_json_file(filename, obj):
+	tmp_filename = filename + '.tmp'
+	with open(tmp_filename, 'w') as f:
+		json.dump(obj, f, indent=1, default=_to_json)
+	os.replace(tmp_filename, filename)
+
+
+'''
+Keeps the config in the output directory, or IF the output directory has the config of an earlier run, checks that it is the same config (except for the RUN_OPTIONS), so that its checkpoint can be resumed.
+'''
+def check_config_of_output_dir(config, output_dir):
+	config_filename = os.path.join(output_dir, CONFIG_FILENAME)
+	if os.path.exists(config_filename):
+		with open(config_filename) as f:
+			old_config = json.load(f)
+		changed = sorted(option for option in set(config).union(old_config) if (option not in RUN_OPTIONS) and (config.get(option) != old_config.get(option)))
+		if changed:
+			raise Exception('The output directory {} has the checkpoint of a run with other options {}; use another output directory, or --restart'.format(output_dir, changed))
+	else:
+		write_json_file(config_filename, config)
+
+
+
+'''
+Runs all the configurations of the given config (see DEFAULT_CONFIG), resuming from the checkpoint of an earlier run (if any) in the output directory, and writes the results.
+
+Input arguments:
+	(a) config: the config (see the function "read_config(...)")
+	(b) restart: IF True, the checkpoint and the results of an earlier run in the output directory are deleted
+	(c) verbose: IF True, print the progress
+
+Returns:
+	A dictionary {'config': config, 'results': list of the records {'k', 'anycasters', 'result'} of all the configurations (in their order)}, which is also written to the results file of the output directory
+'''
+def run_batch(config, restart=False, verbose=True):
+	output_dir = config['output_dir']
+	os.makedirs(output_dir, exist_ok=True)
+	checkpoint_filename = os.path.join(output_dir, CHECKPOINT_FILENAME)
+	if restart:
+		for filename in (CONFIG_FILENAME, CHECKPOINT_FILENAME, RESULTS_FILENAME):
+			if os.path.exists(os.path.join(output_dir, filename)):
+				os.remove(os.path.join(output_dir, filename))
+	check_config_of_output_dir(config, output_dir)
+
+	Topo = load_topology(config)
+	list_of_anycasters = get_list_of_anycasters(config, Topo)
+	completed = read_checkpoint(checkpoint_filename, list_of_anycasters)
+	tasks = [(k, anycasters) for k, anycasters in enumerate(list_of_anycasters) if k not in completed]
+	if verbose:
+		print('configurations: {}, completed (checkpoint): {}, to run: {}'.format(len(list_of_anycasters), len(completed), len(tasks)))
+		sys.stdout.flush()
+
+	if tasks:
+		function = partial(run_configuration, config=config)
+		if config['snapshot_dirname'] is not None:
+			(Topo_to_share, snapshot_dirname) = (None, config['snapshot_dirname'])
+		else:
+			(Topo_to_share, snapshot_dirname) = (Topo, None)
+		truncate_incomplete_line(checkpoint_filename)
+		with open(checkpoint_filename, 'a') as checkpoint_file:
+			for j, result in map_over_topology(function, Topo_to_share, tasks, snapshot_dirname=snapshot_dirname, nb_of_processes=config['nb_of_processes'], ordered=False):
+				(k, anycasters) = tasks[j]
+				completed[k] = append_to_checkpoint(checkpoint_file, {'k': k, 'anycasters': anycasters, 'result': result})
+				if verbose:
+					print('completed configuration {} ({}/{}): anycasters {}{}'.format(k, len(completed), len(list_of_anycasters), anycasters, ' ERROR ' + result['error'] if 'error' in result else ''))
+					sys.stdout.flush()
+
+	results = {'config': config, 'results': [completed[k] for k in range(len(list_of_anycasters))]}
+	write_json_file(os.path.join(output_dir, RESULTS_FILENAME), results)
+	if verbose:
+		print('results: {}'.format(os.path.join(output_dir, RESULTS_FILENAME)))
+	return results
+
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Runs the catchment inference (and measurement selection) experiments of a config file, with checkpoints.')
+	parser.add_argument('config', nargs='?', help='json config file (see DEFAULT_CONFIG in batch_runner.py)')
+	parser.add_argument('--processes', type=int, default=None, help='number of worker processes (overrides nb_of_processes of the config)')
+	parser.add_argument('--output-dir', default=None, help='output directory (overrides output_dir of the config)')
+	parser.add_argument('--restart', action='store_true', help='delete the checkpoint of an earlier run, instead of resuming it')
+	parser.add_argument('--print-default-config', action='store_true')
+	args = parser.parse_args(argv)
+	if args.print_default_config:
+		print(json.dumps(DEFAULT_CONFIG, indent=1))
+		return 0
+	if args.config is None:
+		parser.error('the config file is required')
+	config = read_config(args.config)
+	if args.processes is not None:
+		config['nb_of_processes'] = args.processes
+	if args.output_dir is not None:
+		config['output_dir'] = args.output_dir
+	results = run_batch(config, restart=args.restart)
+	return 1 if any('error' in record['result'] for record in results['results']) else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Benchmarks of the main steps of a catchment inference (see example_catchment_inference.py and example_measurement_selection.py) over synthetic topologies (see synthetic_topology.py), without the CAIDA files.
+# Every scenario is prepared (not timed), and then run (timed) a number of times; then it is prepared and run once more with tracemalloc, for its peak memory (the memory allocated by the timed part, above the memory before it).
+# All the random choices (topology, preferences of the links, anycasters, candidates for measurements) are seeded, so two runs with the same arguments do the same work (e.g., before and after a commit).
+# The results are written to a json file, and two result files can be compared (see the function "compare_benchmark_results(...)"), e.g.:
+#	python3 benchmark.py --sizes 1000 10000 --output before.json
+#	python3 benchmark.py --sizes 1000 10000 --output after.json
+#	python3 benchmark.py --compare before.json after.json
+# The exit status is non-zero if any scenario fails (its error is written to the results instead of its times), so every scenario gives a signal for the regressions.
+#
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from BGPtopology import BGPtopology
+from create_Rgraph_from_Topo import create_Rgraph_from_Topo
+from Rgraph import Rgraph
+from CSRRgraph import CSRRgraph
+from measurement_selection_methods import greedy_measurements, random_measurements
+from synthetic_topology import generate_topology_file
+
+RESULTS_VERSION = 1
+PREFIX = 0	# the prefix announced by the anycasters
+
+SCENARIOS = ('load_topology_from_csv', 'add_prefix', 'create_Rgraph_from_Topo', 'set_probabilistic_coloring', 'remove_all_leaves', 'greedy_measurements', 'random_measurements', 'CSRRgraph_set_probabilistic_coloring', 'CSRRgraph_remove_all_leaves')
+
+
+
+'''
+The (shared) state of the scenarios of a topology: the topology is loaded once, and the anycasters announce the prefix once, for all the scenarios that need them.
+
+class variables:
+	(a) filename:			the file of the topology (CAIDA format)
+	(b) seed:				the seed of all the random choices
+	(c) nb_of_anycasters:	the number of anycasters
+	(d) nb_of_candidates:	the (maximum) number of candidate nodes for the measurements
+	(e) budget:				the number of measurements selected by greedy_measurements and random_measurements
+	(f) Topo:				the BGPtopology (None until it is loaded)
+	(g) anycasters:			the list of the ASNs of the anycasters
+	(h) routed:				True if the anycasters have announced the prefix in the topology
+'''
+class BenchmarkContext:
+	def __init__(self, filename, seed=0, nb_of_anycasters=2, nb_of_candidates=100, budget=5):
+		self.filename = filename
+		self.seed = seed
+		self.nb_of_anycasters = nb_of_anycasters
+		self.nb_of_candidates = nb_of_candidates
+		self.budget = budget
+		self.Topo = None
+		self.anycasters = None
+		self.routed = False
+
+	'''
+	Loads a topology from the file, with the preferences of the links drawn with the seed.
+	'''
+	def load_topology(self):
+		random.seed(self.seed)
+		Topo = BGPtopology()
+		Topo.load_topology_from_csv(self.filename)
+		Topo.set_propagation_mode('dfs')	# the same paths as the default (recursive) mode, without the recursion limit of python for large topologies
+		return Topo
+
+	'''
+	Returns the topology (loaded at the first call) and the anycasters (selected with the seed).
+	'''
+	def get_topology(self):
+		if self.Topo is None:
+			self.Topo = self.load_topology()
+			self.anycasters = random.Random(self.seed).sample(sorted(self.Topo.get_all_nodes_ASNs()), self.nb_of_anycasters)
+		return self.Topo
+
+	'''
+	Announces the prefix from every anycaster (the ties of the BGP decision are broken with the seed).
+	'''
+	def announce_prefix(self):
+		random.seed(self.seed)
+		for ASN in self.anycasters:
+			self.Topo.add_prefix(ASN, PREFIX)
+		self.routed = True
+
+	'''
+	Returns the topology, after the anycasters have announced the prefix.
+	'''
+	def get_routed_topology(self):
+		Topo = self.get_topology()
+		if not self.routed:
+			self.announce_prefix()
+		return Topo
+
+	'''
+	Returns a new Rgraph (of the given class, i.e., Rgraph or CSRRgraph) of the prefix (see create_Rgraph_from_Topo), IF remove_leaves==True without leaves, and IF coloring==True with the probabilistic coloring.
+	'''
+	def get_Rgraph(self, remove_leaves=False, coloring=False, Rgraph_class=Rgraph):
+		G = create_Rgraph_from_Topo(self.get_routed_topology(), PREFIX, shortest_path_preference=True, Rgraph_class=Rgraph_class)
+		if remove_leaves:
+			G.remove_all_leaves()
+		if coloring:
+			G.set_probabilistic_coloring(self.anycasters)
+		return G
+
+	'''
+	Returns the candidate nodes for the measurements, i.e., (at most nb_of_candidates of) the nodes of the Rgraph with a color but not a certain color, selected with the seed.
+	'''
+	def get_candidate_nodes(self, G):
+		candidates = sorted(set(G.get_list_of_nodes(with_color=True)) - set(G.get_list_of_nodes(with_certain_color=True)))
+		if len(candidates) > self.nb_of_candidates:
+			candidates = random.Random(self.seed).sample(candidates, self.nb_of_candidates)
+		return candidates
+
+
+
+### scenarios: each one prepares the state (not timed), and returns the function to be timed ###
+
+def prepare_load_topology_from_csv(context):
+	return context.load_topology
+
+def prepare_add_prefix(context):
+	context.get_topology().clear_routing_information()
+	context.routed = False
+	return context.announce_prefix
+
+def prepare_create_Rgraph_from_Topo(context):
+	Topo = context.get_routed_topology()
+	return lambda: create_Rgraph_from_Topo(Topo, PREFIX, shortest_path_preference=True)
+
+def prepare_set_probabilistic_coloring(context):
+	G = context.get_Rgraph()
+	return lambda: G.set_probabilistic_coloring(context.anycasters)
+
+def prepare_remove_all_leaves(context):
+	G = context.get_Rgraph()
+	return G.remove_all_leaves
+
+def prepare_greedy_measurements(context):
+	G = context.get_Rgraph(remove_leaves=True, coloring=True)
+	candidates = context.get_candidate_nodes(G)
+	def run():
+		random.seed(context.seed)
+		np.random.seed(context.seed)	# for the sampling of the state space (see measurement_selection_methods.evaluate_efficiency)
+		return greedy_measurements(G, list(candidates), min(context.budget, len(candidates)), lazy_evaluations=True, lazy_state_space_sampling=20)
+	return run
+
+def prepare_random_measurements(context):
+	G = context.get_Rgraph(remove_leaves=True, coloring=True)
+	candidates = context.get_candidate_nodes(G)
+	def run():
+		random.seed(context.seed)
+		np.random.seed(context.seed)	# for the sampling of the state space (see measurement_selection_methods.evaluate_efficiency)
+		return random_measurements(G, list(candidates), min(context.budget, len(candidates)), lazy_probabilities_threshold=0, lazy_state_space_sampling=20)
+	return run
+
+def prepare_CSRRgraph_set_probabilistic_coloring(context):
+	G = context.get_Rgraph(Rgraph_class=CSRRgraph)
+	return lambda: G.set_probabilistic_coloring(context.anycasters)
+
+def prepare_CSRRgraph_remove_all_leaves(context):
+	G = context.get_Rgraph(Rgraph_class=CSRRgraph)
+	return G.remove_all_leaves
+
+PREPARE_SCENARIO = {
+	'load_topology_from_csv': prepare_load_topology_from_csv,
+	'add_prefix': prepare_add_prefix,
+	'create_Rgraph_from_Topo': prepare_create_Rgraph_from_Topo,
+	'set_probabilistic_coloring': prepare_set_probabilistic_coloring,
+	'remove_all_leaves': prepare_remove_all_leaves,
+	'greedy_measurements': prepare_greedy_measurements,
+	'random_measurements': prepare_random_measurements,
+	'CSRRgraph_set_probabilistic_coloring': prepare_CSRRgraph_set_probabilistic_coloring,
+	'CSRRgraph_remove_all_leaves': prepare_CSRRgraph_remove_all_leaves,
+}
+
+
+
+'''
+Runs the given scenario "repeat" times (and once more for the memory, IF memory==True).
+
+Returns:
+	A dictionary with the times (in seconds) of the runs, their minimum and median, and the peak memory (in bytes; None IF memory==False)
+'''
+def run_scenario(context, scenario, repeat=3, memory=True):
+	prepare = PREPARE_SCENARIO[scenario]
+	times = []
+	for _ in range(repeat):
+		function = prepare(context)
+		gc.collect()
+		start = time.perf_counter()
+		function()
+		times.append(time.perf_counter() - start)
+	peak_memory = None
+	if memory:
+		function = prepare(context)
+		gc.collect()
+		tracemalloc.start()
+		try:
+			function()
+			peak_memory = tracemalloc.get_traced_memory()[1]
+		finally:
+			tracemalloc.stop()
+	sorted_times = sorted(times)
+	return {'times': times, 'min_time': sorted_times[0], 'median_time': sorted_times[len(sorted_times)//2], 'peak_memory': peak_memory}
+
+
+'''
+Returns the commit of the repository (or None, e.g., if git is not available).
+'''
+def get_git_commit():
+	try:
+		output = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True)
+		return output.stdout.decode().strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+'''
+Returns a dictionary with the versions of python and of the used packages, the platform, the commit and the time of the benchmark.
+'''
+def get_environment():
+	environment = {'python': platform.python_version(), 'platform': platform.platform(), 'commit': get_git_commit(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+	for package in ('numpy', 'networkx'):
+		try:
+			environment[package] = __import__(package).__version__
+		except ImportError:
+			environment[package] = None
+	return environment
+
+
+
+'''
+Runs the benchmarks for every size of topology and every scenario.
+
+Input arguments:
+	(a) sizes: list of the numbers of ASes of the synthetic topologies
+	(b) scenarios: list of the scenarios (see SCENARIOS)
+	(c) seed: the seed of the topologies and of all the random choices
+	(d) repeat: the number of timed runs of each scenario
+	(e) memory: IF True, the peak memory of each scenario is measured (in an extra run)
+	(f) workdir: the directory of the topology files (they are generated if they do not exist); default a temporary directory
+	(g) nb_of_anycasters, nb_of_candidates, budget: see BenchmarkContext
+	(h) verbose: IF True, print the results of each scenario
+
+Returns:
+	A dictionary with (i) 'version', (ii) 'environment' (see the function "get_environment()"), (iii) 'parameters', and (iv) 'results', i.e., a list with a dictionary per (size, scenario),
+	with the keys 'scenario', 'nb_of_ASes', 'nb_of_links', and the results of "run_scenario(...)" (or 'error' if the scenario failed)
+'''
+def run_benchmarks(sizes, scenarios=SCENARIOS, seed=0, repeat=3, memory=True, workdir=None, nb_of_anycasters=2, nb_of_candidates=100, budget=5, verbose=True):
+	for scenario in scenarios:
+		if scenario not in PREPARE_SCENARIO:
+			raise Exception('Not valid scenario: {}'.format(scenario))
+	parameters = {'sizes': list(sizes), 'scenarios': list(scenarios), 'seed': seed, 'repeat': repeat, 'memory': memory, 'nb_of_anycasters': nb_of_anycasters, 'nb_of_candidates': nb_of_candidates, 'budget': budget}
+	results = []
+	with tempfile.TemporaryDirectory() as tmpdir:
+		if workdir is None:
+			workdir = tmpdir
+		os.makedirs(workdir, exist_ok=True)
+		for nb_of_ASes in sizes:
+			filename = os.path.join(workdir, 'synthetic_{}_{}.txt'.format(nb_of_ASes, seed))
+			if not os.path.exists(filename):
+				generate_topology_file(filename, nb_of_ASes, seed=seed)
+			with open(filename) as f:
+				nb_of_links = sum(1 for line in f if not line.startswith('#'))
+			context = BenchmarkContext(filename, seed=seed, nb_of_anycasters=nb_of_anycasters, nb_of_candidates=nb_of_candidates, budget=budget)
+			for scenario in scenarios:
+				result = {'scenario': scenario, 'nb_of_ASes': nb_of_ASes, 'nb_of_links': nb_of_links}
+				try:
+					result.update(run_scenario(context, scenario, repeat=repeat, memory=memory))
+				except Exception as e:
+					result['error'] = '{}: {}'.format(type(e).__name__, e)
+				results.append(result)
+				if verbose:
+					print_result(result)
+	return {'version': RESULTS_VERSION, 'environment': get_environment(), 'parameters': parameters, 'results': results}
+
+
+def print_result(result):
+	if 'error' in result:
+		print('{:<28} {:>7} ASes   ERROR {}'.format(result['scenario'], result['nb_of_ASes'], result['error']))
+	else:
+		memory = '{:10.1f} MB'.format(result['peak_memory']/2**20) if result['peak_memory'] is not None else ''
+		print('{:<28} {:>7} ASes   min {:9.4f} s   median {:9.4f} s {}'.format(result['scenario'], result['nb_of_ASes'], result['min_time'], result['median_time'], memory))
+	sys.stdout.flush()
+
+
+'''
+Returns the list of the (scenario, nb_of_ASes) of a benchmark that failed (i.e., their results have an 'error'); the results of a failed scenario cannot be compared with other benchmarks.
+'''
+def get_failed_scenarios(benchmark):
+	return [(result['scenario'], result['nb_of_ASes']) for result in benchmark['results'] if 'error' in result]
+
+
+def write_benchmark_results(filename, benchmark):
+	with open(filename, 'w') as f:
+		json.dump(benchmark, f, indent=1)
+
+
+def read_benchmark_results(filename):
+	with open(filename) as f:
+		return json.load(f)
+
+
+'''
+Compares two benchmarks (e.g., read with "read_benchmark_results(...)"), i.e., the minimum time and the peak memory of every (scenario, size) in both.
+
+Returns:
+	A list of tuples (scenario, nb_of_ASes, metric, old_value, new_value, ratio) for every metric ('min_time' or 'peak_memory') that is larger in the new benchmark by more than the threshold (e.g., 0.2 for 20%), i.e., the regressions
+'''
+def compare_benchmark_results(old_benchmark, new_benchmark, threshold=0.2, verbose=True):
+	old_results = {(r['scenario'], r['nb_of_ASes']): r for r in old_benchmark['results'] if 'error' not in r}
+	regressions = []
+	if verbose:
+		print('old commit: {}, new commit: {}'.format(old_benchmark['environment'].get('commit'), new_benchmark['environment'].get('commit')))
+	for new in new_benchmark['results']:
+		old = old_results.get((new['scenario'], new['nb_of_ASes']))
+		if (old is None) or ('error' in new):
+			continue
+		for metric in ('min_time', 'peak_memory'):
+			if (old.get(metric) is None) or (new.get(metric) is None) or (old[metric] <= 0):
+				continue
+			ratio = new[metric] / old[metric]
+			regression = ratio > 1 + threshold
+			if regression:
+				regressions.append((new['scenario'], new['nb_of_ASes'], metric, old[metric], new[metric], ratio))
+			if verbose:
+				print('{:<28} {:>7} ASes   {:<12} {:12.4g} -> {:12.4g}   x{:.2f}{}'.format(new['scenario'], new['nb_of_ASes'], metric, old[metric], new[metric], ratio, '   REGRESSION' if regression else ''))
+	return regressions
+
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Benchmarks of the BGPsimulator over synthetic topologies.')
+	parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='numbers of ASes of the synthetic topologies')
+	parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=SCENARIOS)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--repeat', type=int, default=3)
+	parser.add_argument('--no-memory', action='store_true', help='do not measure the peak memory')
+	parser.add_argument('--workdir', default=None, help='directory of the topology files (kept for the next runs)')
+	parser.add_argument('--anycasters', type=int, default=2)
+	parser.add_argument('--candidates', type=int, default=100)
+	parser.add_argument('--budget', type=int, default=5)
+	parser.add_argument('--output', default=None, help='json file for the results')
+	parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two json files of results, instead of running the benchmarks')
+	parser.add_argument('--threshold', type=float, default=0.2, help='relative increase that is reported as a regression')
+	args = parser.parse_args(argv)
+
+	if args.compare:
+		regressions = compare_benchmark_results(read_benchmark_results(args.compare[0]), read_benchmark_results(args.compare[1]), threshold=args.threshold)
+		return 1 if regressions else 0
+	benchmark = run_benchmarks(args.sizes, scenarios=args.scenarios, seed=args.seed, repeat=args.repeat, memory=not args.no_memory, workdir=args.workdir,
+		nb_of_anycasters=args.anycasters, nb_of_candidates=args.candidates, budget=args.budget)
+	if args.output:
+		write_benchmark_results(args.output, benchmark)
+	failed = get_failed_scenarios(benchmark)
+	if failed:
+		print('{} scenario(s) failed: {}'.format(len(failed), ', '.join('{} ({} ASes)'.format(scenario, nb_of_ASes) for (scenario, nb_of_ASes) in failed)))
+		return 1
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Compact (parent-pointer) storage of the best paths of all the nodes of a topology for a prefix.
+# Instead of a list (i.e., the full AS path) per node, every node keeps only the index of the neighbor of its best path (next hop) and the length of the path;
+# since (after convergence) the best path of a node is the path announced by its next hop, i.e., [next_hop] + best path of the next hop, the full path is reconstructed on demand by walking the next hops.
+# The memory per prefix is 8 bytes per node, instead of a list of ASNs per node.
+# Similarly, the routes received by the nodes (i.e., "all_paths") are kept as (neighbor, path length, origin) per route, i.e., 12 bytes per route.
+#
+
+from collections import defaultdict
+from collections.abc import Mapping
+import numpy as np
+
+
+'''
+Best paths of all the nodes of a topology for a prefix, as parent pointers.
+
+class variables:
+	(a) ASNs:				list of the ASNs of the nodes (the position in the list is the index of the node)
+	(b) ASN_to_index:		dictionary with (i) keys the ASNs and (ii) values the indices of the nodes
+	(c) next_hop:			numpy array (int32) with the index of the neighbor of the best path of each node (-1 for anycasters, nodes without route, and nodes with explicit path)
+	(d) path_length:		numpy array (int32) with the length of the best path (0 for anycasters, -1 for nodes without route)
+	(e) explicit_paths:		dictionary with (i) keys indices and (ii) values the (full) best path of the nodes whose path is not the path of their next hop (e.g., hijackers)
+'''
+class ParentPointerRoutes:
+	def __init__(self, ASNs, ASN_to_index, next_hop, path_length, explicit_paths=None):
+		self.ASNs = ASNs
+		self.ASN_to_index = ASN_to_index
+		self.next_hop = np.asarray(next_hop, dtype=np.int32)
+		self.path_length = np.asarray(path_length, dtype=np.int32)
+		self.explicit_paths = explicit_paths if explicit_paths is not None else {}
+
+	'''
+	Returns True if the node with the given ASN has a route (or is an anycaster), False otherwise.
+	'''
+	def has_route(self, ASN):
+		i = self.ASN_to_index.get(ASN)
+		return (i is not None) and (i < len(self.path_length)) and (self.path_length[i] >= 0)
+
+	'''
+	Returns the best path (i.e., a list of ASNs [neighborAS1 AS2 AS3.... originAS], as in BGPnode.paths) of the node with the given index; [] for anycasters and None for nodes without route.
+	'''
+	def get_path_of_index(self, i):
+		explicit_paths = self.explicit_paths
+		if i in explicit_paths:
+			return explicit_paths[i]
+		path_length = self.path_length
+		if path_length[i] < 0:
+			return None
+		ASNs = self.ASNs
+		next_hop = self.next_hop
+		path = []
+		while path_length[i] > 0:
+			i = int(next_hop[i])
+			path.append(ASNs[i])
+			if i in explicit_paths:
+				path.extend(explicit_paths[i])
+				break
+		return path
+
+	'''
+	Returns the best path of the node with the given ASN (see the method "get_path_of_index(...)"); None for nodes that are not in the routes.
+	'''
+	def get_path(self, ASN):
+		i = self.ASN_to_index.get(ASN)
+		if (i is None) or (i >= len(self.path_length)):
+			return None
+		return self.get_path_of_index(i)
+
+	'''
+	Returns the number of bytes of the arrays of the routes (the explicit paths are not counted).
+	'''
+	def get_nb_bytes(self):
+		return self.next_hop.nbytes + self.path_length.nbytes
+
+
+
+'''
+Dictionary of the best paths of a BGPnode (i.e., "BGPnode.paths"), for topologies with compact routes (see BGPtopology.set_compact_routes).
+The paths stored in the dictionary (e.g., of owned or hijacked prefixes) are returned as in a normal dictionary; for the other prefixes, the path is reconstructed from the compact routes of the topology (if any).
+The prefixes of the compact routes with a route for the node are kept (in "compact_prefixes") until the compact routes of the topology change (see BGPtopology.compact_routes_version), so the keys and the length do not scan the compact routes of all the prefixes.
+'''
+class CompactPaths(dict):
+	__slots__ = ('node', 'compact_prefixes')
+
+	def __init__(self, node, paths=()):
+		dict.__init__(self, paths)
+		self.node = node
+		self.compact_prefixes = None
+
+	def _get_compact_path(self, IPprefix):
+		routes = self.node.Topology.compact_routes.get(IPprefix)
+		if routes is not None:
+			return routes.get_path(self.node.ASN)
+
+	def __missing__(self, IPprefix):
+		path = self._get_compact_path(IPprefix)
+		if path is None:
+			raise KeyError(IPprefix)
+		return path
+
+	def get(self, IPprefix, default=None):
+		if dict.__contains__(self, IPprefix):
+			return dict.__getitem__(self, IPprefix)
+		path = self._get_compact_path(IPprefix)
+		return default if path is None else path
+
+	def __contains__(self, IPprefix):
+		return dict.__contains__(self, IPprefix) or (self._get_compact_path(IPprefix) is not None)
+
+	'''
+	Returns the prefixes of the compact routes of the topology with a route for the node (incl. the prefixes stored in the dictionary); they are computed again only after the compact routes change.
+	'''
+	def get_compact_prefixes(self):
+		Topology = self.node.Topology
+		cached = self.compact_prefixes
+		if (cached is None) or (cached[0] != Topology.compact_routes_version):
+			cached = (Topology.compact_routes_version, tuple(IPprefix for IPprefix, routes in Topology.compact_routes.items() if routes.has_route(self.node.ASN)))
+			self.compact_prefixes = cached
+		return cached[1]
+
+	def keys(self):
+		compact_prefixes = self.get_compact_prefixes()
+		if not compact_prefixes:
+			return list(dict.keys(self))
+		return list(dict.keys(self)) + [IPprefix for IPprefix in compact_prefixes if not dict.__contains__(self, IPprefix)]
+
+	def __iter__(self):
+		return iter(self.keys())
+
+	def __len__(self):
+		return dict.__len__(self) + sum(1 for IPprefix in self.get_compact_prefixes() if not dict.__contains__(self, IPprefix))
+
+	def __bool__(self):
+		return (dict.__len__(self) > 0) or (len(self.get_compact_prefixes()) > 0)
+
+	def items(self):
+		return [(IPprefix, self[IPprefix]) for IPprefix in self.keys()]
+
+	def values(self):
+		return [self[IPprefix] for IPprefix in self.keys()]
+
+
+
+'''
+Routes received by all the nodes of a topology for a prefix (i.e., the "all_paths" of the BGPnodes), in CSR format: the routes received by the node with index i are in the positions indptr[i]...indptr[i+1]-1 of the arrays.
+A route received from the neighbor N is the path announced by N, i.e., [N] + the best path of N; so, only the neighbor, the length and the origin of each route are kept, and the full path is reconstructed on demand from the (compact) best paths.
+
+class variables:
+	(a) routes:				the ParentPointerRoutes of the prefix (used to reconstruct the paths)
+	(b) indptr:				numpy array (int64) of length nb_nodes+1
+	(c) neighbors:			numpy array (int32) with the index of the neighbor that sent each route
+	(d) lengths:			numpy array (int32) with the length of each route
+	(e) origins:			numpy array (int32) with the index of the origin (i.e., the last AS in the path) of each route
+	(f) explicit_paths:		dictionary with (i) keys positions in the arrays and (ii) values the (full) path of the routes that are not the path of their neighbor (e.g., routes from hijackers)
+'''
+class CompactRIB:
+	def __init__(self, routes, indptr, neighbors, lengths, origins, explicit_paths=None):
+		self.routes = routes
+		self.indptr = np.asarray(indptr, dtype=np.int64)
+		self.neighbors = np.asarray(neighbors, dtype=np.int32)
+		self.lengths = np.asarray(lengths, dtype=np.int32)
+		self.origins = np.asarray(origins, dtype=np.int32)
+		self.explicit_paths = explicit_paths if explicit_paths is not None else {}
+
+	'''
+	Returns the path of the route in the given position of the arrays.
+	'''
+	def get_path_of_position(self, k):
+		path = self.explicit_paths.get(k)
+		if path is None:
+			n = int(self.neighbors[k])
+			path = [self.routes.ASNs[n]] + self.routes.get_path_of_index(n)
+		return path
+
+	'''
+	Returns a list of tuples (neighbor ASN, path length, origin ASN) with the routes received by the node with the given ASN.
+	'''
+	def get_received_routes_info(self, ASN):
+		ASNs = self.routes.ASNs
+		(start, end) = self.get_positions(ASN)
+		return [(ASNs[n], length, ASNs[o]) for n, length, o in zip(self.neighbors[start:end].tolist(), self.lengths[start:end].tolist(), self.origins[start:end].tolist())]
+
+	'''
+	Returns the positions (start, end) in the arrays of the routes received by the node with the given ASN.
+	'''
+	def get_positions(self, ASN):
+		i = self.routes.ASN_to_index.get(ASN)
+		if (i is None) or (i >= len(self.indptr)-1):
+			return (0, 0)
+		return (int(self.indptr[i]), int(self.indptr[i+1]))
+
+	'''
+	Returns the number of bytes of the arrays of the routes (the explicit paths are not counted).
+	'''
+	def get_nb_bytes(self):
+		return self.indptr.nbytes + self.neighbors.nbytes + self.lengths.nbytes + self.origins.nbytes
+
+
+
+'''
+Read-only dictionary of the routes received by a node for a prefix with a CompactRIB (i.e., "BGPnode.all_paths[IPprefix]"), with (i) keys the ASNs of the neighbors that sent the routes and (ii) values the paths, which are reconstructed when they are requested.
+'''
+class ReceivedRoutes(Mapping):
+	def __init__(self, RIB, ASN):
+		self.RIB = RIB
+		(self.start, self.end) = RIB.get_positions(ASN)
+		self.positions = None
+
+	def _get_positions(self):
+		if self.positions is None:
+			ASNs = self.RIB.routes.ASNs
+			self.positions = {ASNs[n]: self.start+k for k, n in enumerate(self.RIB.neighbors[self.start:self.end].tolist())}
+		return self.positions
+
+	def __getitem__(self, ASN):
+		return self.RIB.get_path_of_position(self._get_positions()[ASN])
+
+	def __contains__(self, ASN):
+		return ASN in self._get_positions()
+
+	def __iter__(self):
+		return iter(self._get_positions())
+
+	def __len__(self):
+		return self.end - self.start
+
+	'''
+	Returns the length of the path received from the given neighbor, without reconstructing the path.
+	'''
+	def get_path_length(self, ASN):
+		return int(self.RIB.lengths[self._get_positions()[ASN]])
+
+
+
+'''
+Dictionary of the routes received by a BGPnode (i.e., "BGPnode.all_paths"), for topologies with compact RIBs (see BGPtopology.set_compact_RIB).
+The routes stored in the dictionary are returned as in a normal dictionary (of dictionaries); for the other prefixes, the routes are returned as a (read-only) ReceivedRoutes view of the CompactRIB of the prefix (if any).
+Iterating over the dictionary (e.g., items()) returns only the prefixes stored in the dictionary, i.e., the methods of the BGPnode that change the received routes (e.g., "discard_paths_from_neighbors(...)") do not touch the compact RIBs.
+The ReceivedRoutes views (and the positions of their routes) are kept (in "received_routes") until the compact RIBs of the topology change (see BGPtopology.compact_routes_version).
+'''
+class CompactAllPaths(defaultdict):
+	__slots__ = ('node', 'received_routes')
+
+	def __init__(self, node, all_paths=()):
+		defaultdict.__init__(self, dict, all_paths)
+		self.node = node
+		self.received_routes = None
+
+	def _get_received_routes(self, IPprefix):
+		Topology = self.node.Topology
+		cached = self.received_routes
+		if (cached is None) or (cached[0] != Topology.compact_routes_version):
+			cached = (Topology.compact_routes_version, {})
+			self.received_routes = cached
+		received_routes = cached[1].get(IPprefix)
+		if received_routes is None:
+			RIB = Topology.compact_RIBs.get(IPprefix)
+			if RIB is not None:
+				received_routes = ReceivedRoutes(RIB, self.node.ASN)
+				cached[1][IPprefix] = received_routes
+		return received_routes
+
+	def __missing__(self, IPprefix):
+		received_routes = self._get_received_routes(IPprefix)
+		if received_routes is None:
+			return defaultdict.__missing__(self, IPprefix)
+		return received_routes
+
+	def get(self, IPprefix, default=None):
+		if dict.__contains__(self, IPprefix):
+			return dict.__getitem__(self, IPprefix)
+		received_routes = self._get_received_routes(IPprefix)
+		return default if received_routes is None else received_routes
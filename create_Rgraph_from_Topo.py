@@ -13,6 +13,7 @@
 
 from BGPtopology import BGPtopology
 from Rgraph import *
+from compact_routes import ReceivedRoutes
 
 
 '''
@@ -29,14 +30,18 @@ Input argument:
 	(a) Topo: an AS topology object
 	(b) prefix: the prefix for which the Rgraph will be constructed
 	(c) shortest_path_preference: True/False for not adding in the Rgraph edges for paths that are longer than the best path
+	(d) cache: (optional) a SimulationCache (see simulation_cache.py); IF the Rgraph of the same topology and anycasters has been cached, THEN it is returned from the cache, ELSE it is written to the cache
+	(e) forbidden_neighbors: (optional) the forbidden neighbors with which the anycasters announced the prefix (see BGPtopology.add_prefix); used only for the key of the cache
+	(f) topology_hash: (optional) the hash of the topology (see simulation_cache.get_topology_hash); used only for the key of the cache, and computed if not given
+	(g) Rgraph_class: the class of the Rgraph, i.e., Rgraph (default) or CSRRgraph (see CSRRgraph.py)
 
 Output:
 	The Rgraph
 '''
-def create_Rgraph_from_Topo(Topo, prefix, shortest_path_preference=False):
+def create_Rgraph_from_Topo(Topo, prefix, shortest_path_preference=False, cache=None, forbidden_neighbors=None, topology_hash=None, Rgraph_class=Rgraph):
 
 	# create an empty Rgraph
-	G = Rgraph()	
+	G = Rgraph_class()	
 
 	# find all nodes that announce the prefix, and add them in the set "anycaster_ASes", and add them as nodes in the Rgraph
 	anycaster_ASes = set()
@@ -46,6 +51,17 @@ def create_Rgraph_from_Topo(Topo, prefix, shortest_path_preference=False):
 			G.add_node(ASN)
 	assert len(anycaster_ASes)>1, "Number of Anycasters <= 1"
 
+	if cache is not None:
+		from simulation_cache import get_topology_hash, get_catchment_from_Topo, create_Rgraph_from_structure	# imported here, since simulation_cache imports this file
+		if topology_hash is None:
+			topology_hash = get_topology_hash(Topo)
+		entry = cache.get_configuration(Topo, anycaster_ASes, forbidden_neighbors, shortest_path_preference, topology_hash=topology_hash)
+		if entry is not None:
+			return create_Rgraph_from_structure(entry['nodes'], entry['edges'], Rgraph_class=Rgraph_class)	# without the colors (if any), i.e., as the Rgraph created without a cache
+		G = create_Rgraph_from_Topo(Topo, prefix, shortest_path_preference=shortest_path_preference, Rgraph_class=Rgraph_class)
+		cache.put_configuration(Topo, anycaster_ASes, forbidden_neighbors, shortest_path_preference, get_catchment_from_Topo(Topo, prefix), G, topology_hash=topology_hash)
+		return G
+
 	# iterate over all nodes and ...
 	for ASN in Topo.get_set_of_nodes_with_path_to_prefix(prefix):
 		if ASN in anycaster_ASes:
@@ -62,7 +78,38 @@ def create_Rgraph_from_Topo(Topo, prefix, shortest_path_preference=False):
 		for neighbor_ASN in all_paths.keys():
 			neighbor_type = Topo.get_node(ASN).ASneighbors[neighbor_ASN] 
 			if neighbor_type == best_path_neighbor_type: # if this neighbor is of the same type/preference with the neighbor of the best path, add an edge in the Rgraph
-				if (not shortest_path_preference) or ( len(all_paths[neighbor_ASN])==len(best_path) ): # check also "shortest_path_preference" option (if False: first condition is satisfied always, if True: it needs second condition to be satisfied, i.e., the path of equal length to the best path)
+				if (not shortest_path_preference) or ( get_path_length(all_paths,neighbor_ASN)==len(best_path) ): # check also "shortest_path_preference" option (if False: first condition is satisfied always, if True: it needs second condition to be satisfied, i.e., the path of equal length to the best path)
 					G.add_edge(neighbor_ASN,ASN)
 
 	return G
+
+
+
+'''
+Returns the length of the path received from the given neighbor (i.e., all_paths[neighbor_ASN]); for a compact RIB (see compact_routes.py), the path is not reconstructed.
+'''
+def get_path_length(all_paths, neighbor_ASN):
+	if isinstance(all_paths, ReceivedRoutes):
+		return all_paths.get_path_length(neighbor_ASN)
+	return len(all_paths[neighbor_ASN])
+
+
+
+'''
+Creates the R-graph from a list of edges, e.g., the edges computed (without running a BGP simulation) by "AnycastRoutes.get_Rgraph_edges(...)" or "BGPtopology.simulate_anycast_configurations(...)".
+
+Input argument:
+	(a) anycasters: the nodes that announce the prefix (i.e., the roots of the Rgraph)
+	(b) edges: list of tuples (ASN1, ASN2, local_preference) for the directed edges ASN1-->ASN2
+	(c) Rgraph_class: the class of the Rgraph, i.e., Rgraph (default) or CSRRgraph (see CSRRgraph.py)
+
+Output:
+	The Rgraph
+'''
+def create_Rgraph_from_edges(anycasters, edges, Rgraph_class=Rgraph):
+	G = Rgraph_class()
+	for ASN in anycasters:
+		G.add_node(ASN)
+	assert len(anycasters)>1, "Number of Anycasters <= 1"
+	G.add_edges(edges)
+	return G
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Routing engine that computes the converged BGP routes for a prefix (announced by one or more anycasters) without exchanging BGP messages.
+# It assumes the standard policy of the BGPnode class:
+#	(a) route selection (see BGPnode.conditions_to_change_existing_path): prefer routes from customers > peers > providers, then the shorter path, then the neighbor with the higher preference,
+#	(b) export (see BGPnode.export_path): routes from customers are announced to all neighbors, routes from peers/providers only to customers; the anycasters announce to all their (not forbidden) neighbors.
+# Under this policy, the converged routes can be computed with three breadth-first sweeps:
+#	(1) customer routes, which propagate upwards (from customers to providers),
+#	(2) peer routes, i.e., one hop over a peering link from a node with a customer route (or an anycaster),
+#	(3) provider routes, which propagate downwards (from providers to customers) in increasing path length.
+# Each sweep is linear in the number of links.
+#
+
+import numpy as np
+from compact_routes import ParentPointerRoutes, CompactRIB
+
+NO_ROUTE = 2	# route class of nodes without route (the route classes -1,0,1 denote routes from customers, peers, providers, as in BGPnode.ASneighbors)
+
+
+'''
+Returns the positions indptr[i]...indptr[i+1]-1 for all the given nodes i (i.e., the concatenation of their CSR rows), and the position (in the given array of nodes) of the node of each returned position.
+'''
+def _get_rows_of(indptr, nodes):
+	starts = indptr[nodes]
+	counts = indptr[nodes+1] - starts
+	offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+	return (offsets + np.arange(int(counts.sum()), dtype=np.int64), np.repeat(np.arange(len(nodes), dtype=np.int64), counts))
+
+
+
+'''
+The topology arrays needed by the routing engine (see BGPtopology.get_CSR_arrays), and in addition:
+	(a) ASN_to_index:		dictionary with (i) keys the ASNs and (ii) values the indices of the nodes
+	(b) rows:				numpy array with the index of the node of each position (i.e., of each directed link)
+	(c) preference_rank:	numpy array with the rank of the preference of each directed link (0 for the highest preference among all links), used to select the most preferred routes
+	(d) receivers_by_sender:	dictionary with keys the relations {-1,0,1}, and values a tuple (indptr, slots) in CSR format: for the node i, slots[indptr[i]...indptr[i+1]-1] are the positions of the directed links (X-->i) of the neighbors X that have i as a neighbor of the given relation
+'''
+class RoutingArrays:
+	def __init__(self, ASNs, indptr, indices, relations, preferences):
+		self.ASNs = ASNs
+		self.ASN_to_index = {ASN:i for i,ASN in enumerate(ASNs)}
+		self.nb_nodes = len(ASNs)
+		self.indptr = np.asarray(indptr, dtype=np.int64)
+		self.indices = np.asarray(indices, dtype=np.int64)
+		self.relations = np.asarray(relations, dtype=np.int8)
+		self.preferences = np.asarray(preferences, dtype=np.float64)
+		self.rows = np.repeat(np.arange(self.nb_nodes, dtype=np.int64), np.diff(self.indptr))
+
+		self.preference_rank = np.empty(len(self.indices), dtype=np.int64)
+		self.preference_rank[np.argsort(-self.preferences, kind='stable')] = np.arange(len(self.indices), dtype=np.int64)
+
+		self.receivers_by_sender = {}
+		for relation in (-1, 0, 1):
+			slots = np.flatnonzero(self.relations == relation)
+			slots = slots[np.argsort(self.indices[slots], kind='stable')]
+			counts = np.bincount(self.indices[slots], minlength=self.nb_nodes)
+			sender_indptr = np.zeros(self.nb_nodes+1, dtype=np.int64)
+			np.cumsum(counts, out=sender_indptr[1:])
+			self.receivers_by_sender[relation] = (sender_indptr, slots)
+
+	'''
+	Returns a numpy array (bool) with True at the positions of the directed links (X-->anycaster) over which the node X does not receive the prefix, since it is a forbidden neighbor of the anycaster.
+
+	Input arguments:
+		(a) forbidden_neighbors: dictionary with (i) keys anycasters and (ii) values the list of neighbors to which the anycaster does not announce the prefix
+	'''
+	def get_blocked_slots(self, forbidden_neighbors):
+		blocked = np.zeros(len(self.indices), dtype=bool)
+		for ASN, list_of_forbidden in forbidden_neighbors.items():
+			o = self.ASN_to_index[ASN]
+			for forbidden_ASN in list_of_forbidden:
+				f = self.ASN_to_index.get(forbidden_ASN)
+				if f is None:
+					continue
+				start = self.indptr[f]
+				blocked[start + np.flatnonzero(self.indices[start:self.indptr[f+1]] == o)] = True
+		return blocked
+
+
+'''
+Returns the RoutingArrays of the given topology; for a CSRtopology, the arrays are cached (in the topology) until its links change.
+'''
+def get_routing_arrays(Topo):
+	(ASNs, indptr, indices, relations, preferences) = Topo.get_CSR_arrays()
+	cached = getattr(Topo, 'routing_arrays_cache', None)
+	if (cached is not None) and (cached[0] is indices) and (cached[1] is preferences):
+		return cached[2]
+	routing_arrays = RoutingArrays(ASNs, indptr, indices, relations, preferences)
+	if getattr(Topo, 'indices', None) is indices:	# i.e., CSRtopology, whose arrays are replaced (not modified) when the links change
+		Topo.routing_arrays_cache = (indices, preferences, routing_arrays)
+	return routing_arrays
+
+
+
+'''
+Converged routes of all the nodes of a topology for a prefix announced by a set of anycasters (see the function "compute_anycast_routes(...)").
+
+class variables:
+	(a) routing_arrays:			the RoutingArrays of the topology
+	(b) anycasters:				list of the ASNs of the anycasters
+	(c) forbidden_neighbors:	dictionary with the forbidden neighbors of the anycasters (or None)
+	(d) next_hop:				numpy array with (per node index) the index of the neighbor of the best path (-1 for anycasters and nodes without route)
+	(e) path_length:			numpy array with the length of the best path, i.e., the number of ASes in the path (0 for anycasters, -1 for nodes without route)
+	(f) origin:					numpy array with the index of the anycaster (or hijacker) at the end of the best path (the anycaster itself for anycasters, -1 for nodes without route)
+	(g) route_class:			numpy array with the type of the neighbor of the best path, i.e., {-1,0,1} for {customer,peer,provider} (NO_ROUTE for anycasters and nodes without route)
+	(h) next_hop_slot:			numpy array with the position (in the CSR arrays) of the directed link from the node to the neighbor of the best path (-1 for anycasters and nodes without route)
+	(i) received_indptr, received_neighbors, received_lengths, received_is_alternate:	the routes received by each node (i.e., the converged "all_paths" of the BGPnode) in CSR format;
+			the neighbor that sent the route, the length of the route, and whether the route is of the same class as the best route (i.e., an equal-class alternate, including the best route itself);
+			they are calculated (with the method "compute_received_routes()") only when they are needed
+	(j) hijack:					tuple (hijacker_ASN, hijacked_path) of the hijack of the prefix (or None); see the function "compute_batch_of_anycast_routes(...)"
+'''
+class AnycastRoutes:
+	def __init__(self, routing_arrays, anycasters, forbidden_neighbors, next_hop, path_length, origin, route_class, next_hop_slot, hijack=None):
+		self.routing_arrays = routing_arrays
+		self.anycasters = list(anycasters)
+		self.forbidden_neighbors = forbidden_neighbors
+		self.hijack = hijack
+		self.next_hop = next_hop
+		self.path_length = path_length
+		self.origin = origin
+		self.route_class = route_class
+		self.next_hop_slot = next_hop_slot
+		self.received_indptr = None
+		self.received_neighbors = None
+		self.received_lengths = None
+		self.received_is_alternate = None
+
+	'''
+	Returns the best path (i.e., a list of ASNs [neighborAS1 AS2 AS3.... originAS], as in BGPnode.paths) of the given node; [] for anycasters and None for nodes without route.
+	The paths that lead to the hijacker end with the hijacked path (and the path of the hijacker is the hijacked path).
+	'''
+	def get_path(self, ASN):
+		i = self.routing_arrays.ASN_to_index[ASN]
+		if self.path_length[i] < 0:
+			return None
+		ASNs = self.routing_arrays.ASNs
+		path = []
+		i = self.next_hop[i]
+		while i >= 0:
+			path.append(ASNs[i])
+			i = self.next_hop[i]
+		if (self.hijack is not None) and ((path[-1] if path else ASN) == self.hijack[0]):
+			path.extend(self.hijack[1])
+		return path
+
+	'''
+	Returns the number of nodes (not including the anycasters) that route to each anycaster, as a dictionary with keys the anycasters and values the number of nodes.
+	'''
+	def get_catchment(self):
+		counts = np.bincount(self.origin[self.path_length > 0], minlength=self.routing_arrays.nb_nodes)
+		return {ASN: int(counts[self.routing_arrays.ASN_to_index[ASN]]) for ASN in self.anycasters}
+
+	'''
+	Returns the number of nodes (not including the hijacker) whose best path leads to the hijacker (i.e., as BGPtopology.get_nb_of_nodes_with_hijacked_path_to_prefix); 0 if there is no hijack.
+	'''
+	def get_nb_of_hijacked_nodes(self):
+		if self.hijack is None:
+			return 0
+		return int(np.count_nonzero((self.origin == self.routing_arrays.ASN_to_index[self.hijack[0]]) & (self.next_hop >= 0)))
+
+	'''
+	Computes the routes received by each node (i.e., the converged "all_paths"): node X receives a route from its neighbor N, IF
+		(i) N is an anycaster (that announces to X), or N has a route that it exports to X (i.e., a route from a customer, or X is a customer of N), and
+		(ii) the path of N does not contain X (otherwise X discards it, for loop avoidance).
+	The received routes (and thus the Rgraph edges and the writing of the routes to a topology) are not supported for the routes of a hijack.
+	'''
+	def compute_received_routes(self):
+		if self.received_indptr is not None:
+			return
+		if self.hijack is not None:
+			raise Exception('The received routes are not computed for the routes of a hijack')
+		ra = self.routing_arrays
+		next_hop = self.next_hop
+		path_length = self.path_length
+		route_class = self.route_class
+		is_origin = np.zeros(ra.nb_nodes, dtype=bool)
+		is_origin[[ra.ASN_to_index[ASN] for ASN in self.anycasters]] = True
+		if self.forbidden_neighbors:
+			not_blocked = ~ra.get_blocked_slots(self.forbidden_neighbors)
+		else:
+			not_blocked = True
+
+		receivers = ra.rows
+		senders = ra.indices
+		sender_exports = (is_origin[senders] & not_blocked) | ((path_length[senders] > 0) & ((route_class[senders] == -1) | (ra.relations == 1)))
+		candidate = sender_exports & (path_length[receivers] > 0)
+
+		# loop avoidance: walk the best path of each sender, and discard the routes whose path contains the receiver
+		slots = np.flatnonzero(candidate & ~is_origin[senders])
+		current = senders[slots]
+		target = receivers[slots]
+		loop = np.zeros(len(slots), dtype=bool)
+		while len(current) > 0:
+			active = current >= 0
+			if not active.any():
+				break
+			loop |= active & (current == target)
+			current = np.where(active, next_hop[np.maximum(current, 0)], -1)
+		candidate[slots[loop]] = False
+
+		received_slots = np.flatnonzero(candidate)
+		counts = np.bincount(receivers[received_slots], minlength=ra.nb_nodes)
+		self.received_indptr = np.zeros(ra.nb_nodes+1, dtype=np.int64)
+		np.cumsum(counts, out=self.received_indptr[1:])
+		self.received_neighbors = senders[received_slots]
+		self.received_lengths = path_length[senders[received_slots]] + 1
+		self.received_is_alternate = ra.relations[received_slots] == route_class[receivers[received_slots]]
+
+	'''
+	Returns the edges of the Rgraph of the prefix (i.e., as they are added by the function "create_Rgraph_from_Topo(...)"): for every node with a route (not anycaster), a directed edge from the neighbor of its best path, and from every neighbor of an equal-class alternate route (IF shortest_path_preference==True, only alternates with the same length as the best path).
+
+	Returns:
+		A list of tuples (ASN1, ASN2, local_preference) for the directed edges ASN1-->ASN2; local_preference is the preference of ASN2 for ASN1 for the edges of the best paths, and None for the other edges
+	'''
+	def get_Rgraph_edges(self, shortest_path_preference=False):
+		self.compute_received_routes()
+		ra = self.routing_arrays
+		ASNs = ra.ASNs
+		receivers = np.repeat(np.arange(ra.nb_nodes, dtype=np.int64), np.diff(self.received_indptr))
+		keep = self.received_is_alternate & (self.received_neighbors != self.next_hop[receivers])
+		if shortest_path_preference:
+			keep &= (self.received_lengths == self.path_length[receivers])
+		with_route = np.flatnonzero(self.path_length > 0)
+		edges = list(zip([ASNs[n] for n in self.next_hop[with_route].tolist()], [ASNs[i] for i in with_route.tolist()], ra.preferences[self.next_hop_slot[with_route]].tolist()))
+		for i, n in zip(receivers[keep].tolist(), self.received_neighbors[keep].tolist()):
+			edges.append((ASNs[n], ASNs[i], None))
+		return edges
+
+	'''
+	Writes the routes to the BGPnodes of the given topology (which must be the topology for which the routes were computed), as if the prefix had been announced by the anycasters with the method "add_prefix(...)":
+		(i) the anycasters own the prefix (i.e., "IPprefix") and have an empty path,
+		(ii) each node with a route gets the best path (i.e., "paths"), and
+		(iii) the received routes (i.e., "all_paths"); IF full_RIB==False, only the equal-class alternates (i.e., the entries read by the function "create_Rgraph_from_Topo(...)"), otherwise all the routes received from the neighbors.
+	IF compact==True, the best paths and the received routes are not written to the nodes, but they are kept as compact routes and a compact RIB (see BGPtopology.set_compact_routes and BGPtopology.set_compact_RIB).
+	As with the BGP messages, the path announced by a node is a single list shared by all the nodes that receive it.
+
+	Input arguments:
+		(a) Topo: the topology
+		(b) IPprefix: the prefix
+		(c) full_RIB: True/False (see above)
+		(d) compact: True/False (see above)
+	'''
+	def write_routes_to_Topo(self, Topo, IPprefix, full_RIB=False, compact=False):
+		self.compute_received_routes()
+		ASNs = self.routing_arrays.ASNs
+		announced = {}
+		for ASN in self.anycasters:
+			node = Topo.get_node(ASN)
+			node.IPprefix.add(IPprefix)
+			node.paths[IPprefix] = []
+			announced[self.routing_arrays.ASN_to_index[ASN]] = [ASN]
+
+		if compact:
+			routes = ParentPointerRoutes(ASNs, self.routing_arrays.ASN_to_index, self.next_hop, self.path_length)
+			Topo.set_compact_routes(IPprefix, routes)
+			if full_RIB:
+				keep = np.ones(len(self.received_neighbors), dtype=bool)
+			else:
+				keep = self.received_is_alternate
+			receivers = np.repeat(np.arange(self.routing_arrays.nb_nodes, dtype=np.int64), np.diff(self.received_indptr))[keep]
+			RIB_indptr = np.zeros(self.routing_arrays.nb_nodes+1, dtype=np.int64)
+			np.cumsum(np.bincount(receivers, minlength=self.routing_arrays.nb_nodes), out=RIB_indptr[1:])
+			neighbors = self.received_neighbors[keep]
+			Topo.set_compact_RIB(IPprefix, CompactRIB(routes, RIB_indptr, neighbors, self.received_lengths[keep], self.origin[neighbors]))
+			return
+
+		with_route = np.flatnonzero(self.path_length > 0)
+		with_route = with_route[np.argsort(self.path_length[with_route], kind='stable')].tolist()
+		nodes = [Topo.get_node(ASNs[i]) for i in with_route]
+		for i, n, node in zip(with_route, self.next_hop[with_route].tolist(), nodes):
+			path = announced[n]
+			announced[i] = [ASNs[i]] + path
+			node.paths[IPprefix] = path
+
+		received_indptr = self.received_indptr.tolist()
+		received_neighbors = self.received_neighbors.tolist()
+		received_is_alternate = self.received_is_alternate.tolist()
+		for i, node in zip(with_route, nodes):
+			all_paths = node.all_paths[IPprefix]
+			for k in range(received_indptr[i], received_indptr[i+1]):
+				if full_RIB or received_is_alternate[k]:
+					all_paths[ASNs[received_neighbors[k]]] = announced[received_neighbors[k]]
+		Topo.invalidate_path_index(IPprefix)
+
+
+
+'''
+Converged routes of a batch of anycast configurations (i.e., of different sets of anycasters over the same topology; see the function "compute_batch_of_anycast_routes(...)").
+The routes of all configurations are kept in arrays of shape (nb_of_configurations, nb_of_nodes), i.e., row k corresponds to the k-th configuration.
+
+class variables:
+	(a) routing_arrays:					the RoutingArrays of the topology
+	(b) list_of_anycasters:				list with the list of anycasters of each configuration
+	(c) list_of_forbidden_neighbors:	list with the forbidden neighbors (dictionary or None) of each configuration
+	(d) next_hop, path_length, origin, route_class, next_hop_slot:	numpy arrays of shape (nb_of_configurations, nb_of_nodes); see the AnycastRoutes class
+	(e) list_of_hijacks:				list with the hijack (tuple (hijacker_ASN, hijacked_path), or None) of each configuration
+'''
+class BatchAnycastRoutes:
+	def __init__(self, routing_arrays, list_of_anycasters, list_of_forbidden_neighbors, next_hop, path_length, origin, route_class, next_hop_slot, list_of_hijacks=None):
+		self.routing_arrays = routing_arrays
+		self.list_of_anycasters = list_of_anycasters
+		self.list_of_forbidden_neighbors = list_of_forbidden_neighbors
+		self.next_hop = next_hop
+		self.path_length = path_length
+		self.origin = origin
+		self.route_class = route_class
+		self.next_hop_slot = next_hop_slot
+		self.list_of_hijacks = list_of_hijacks if list_of_hijacks is not None else [None]*len(list_of_anycasters)
+
+	def get_nb_of_configurations(self):
+		return len(self.list_of_anycasters)
+
+	'''
+	Returns the AnycastRoutes of the k-th configuration (its arrays are views of the rows of the batch arrays).
+	'''
+	def get_routes(self, k):
+		return AnycastRoutes(self.routing_arrays, self.list_of_anycasters[k], self.list_of_forbidden_neighbors[k],
+			self.next_hop[k], self.path_length[k], self.origin[k], self.route_class[k], self.next_hop_slot[k], self.list_of_hijacks[k])
+
+	'''
+	Returns the number of nodes (not including the anycasters) that route to each anycaster in the k-th configuration (see AnycastRoutes.get_catchment).
+	'''
+	def get_catchment(self, k):
+		return self.get_routes(k).get_catchment()
+
+	'''
+	Returns a numpy array with the number of hijacked nodes of each configuration (see AnycastRoutes.get_nb_of_hijacked_nodes).
+	'''
+	def get_nb_of_hijacked_nodes(self):
+		hijacker = np.array([self.routing_arrays.ASN_to_index[hijack[0]] if hijack is not None else -1 for hijack in self.list_of_hijacks], dtype=np.int64)
+		return np.count_nonzero((self.origin == hijacker[:, None]) & (self.next_hop >= 0), axis=1)
+
+
+
+'''
+Computes the converged BGP routes (see the description at the top of the file) of all nodes for a batch of configurations of anycasters over the same topology.
+All configurations are propagated together: the per node arrays of the routes have one row per configuration, and each breadth-first sweep handles all the configurations at once.
+
+Input arguments:
+	(a) Topo: a BGPtopology (or CSRtopology)
+	(b) list_of_anycasters: list with the list of anycasters (ASNs) of each configuration
+	(c) list_of_forbidden_neighbors: (optional) list with one entry per configuration, either None or a dictionary with (i) keys anycasters and (ii) values the list of neighbors to which the anycaster does not announce the prefix
+	(d) routing_arrays: (optional) the RoutingArrays of the topology (see the function "get_routing_arrays(...)"), if they have been already calculated
+	(e) list_of_hijacks: (optional) list with one entry per configuration, either None or a tuple (hijacker_ASN, hijacked_path), i.e., as after "Topo.do_hijack(hijacker_ASN, prefix, hijack_type)" where hijacked_path is the path of the hijacker (see BGPnode.do_hijack);
+			the hijacker announces [hijacker_ASN] + hijacked_path to all its neighbors, and the nodes in the hijacked_path discard it (loop avoidance); a hijack by an anycaster of the configuration is ignored (as in BGPnode.do_hijack)
+
+Returns:
+	A BatchAnycastRoutes object
+'''
+def compute_batch_of_anycast_routes(Topo, list_of_anycasters, list_of_forbidden_neighbors=None, routing_arrays=None, list_of_hijacks=None):
+	ra = routing_arrays if routing_arrays is not None else get_routing_arrays(Topo)
+	K = len(list_of_anycasters)
+	N = ra.nb_nodes
+	E = len(ra.indices)
+	indices = ra.indices
+	rows = ra.rows
+	preference_rank = ra.preference_rank
+	if list_of_forbidden_neighbors is None:
+		list_of_forbidden_neighbors = [None]*K
+	if list_of_hijacks is None:
+		list_of_hijacks = [None]*K
+	else:
+		list_of_hijacks = [hijack if (hijack is not None) and (hijack[0] not in anycasters) else None for anycasters, hijack in zip(list_of_anycasters, list_of_hijacks)]
+
+	# the arrays are flattened, i.e., the node i of the configuration k is at the position k*N+i (and the directed link s at k*E+s)
+	origin_indices = [k*N + ra.ASN_to_index[ASN] for k, anycasters in enumerate(list_of_anycasters) for ASN in anycasters]
+	origin_lengths = [0]*len(origin_indices)
+
+	# the hijackers are origins whose path (i.e., the hijacked path) is not empty, except for origin-AS hijacks; poisoned[k*N+i] is True if in the configuration k the node i is in the hijacked path
+	hijacker = None
+	poisoned = None
+	if any(list_of_hijacks):
+		hijacker = np.full(K, -1, dtype=np.int64)
+		poisoned = np.zeros(K*N, dtype=bool)
+		for k, hijack in enumerate(list_of_hijacks):
+			if hijack is not None:
+				(hijacker_ASN, hijacked_path) = hijack
+				hijacker[k] = ra.ASN_to_index[hijacker_ASN]
+				origin_indices.append(k*N + hijacker[k])
+				origin_lengths.append(len(hijacked_path))
+				poisoned[[k*N + ra.ASN_to_index[ASN] for ASN in hijacked_path]] = True
+	origin_indices = np.array(origin_indices, dtype=np.int64)
+	origin_lengths = np.array(origin_lengths, dtype=np.int64)
+	is_origin = np.zeros(K*N, dtype=bool)
+	is_origin[origin_indices] = True
+
+	# blocked[k*E+s] is True if in the configuration k the node of the directed link s does not receive the prefix from the neighbor (an anycaster that does not announce to it)
+	blocked = None
+	if any(list_of_forbidden_neighbors):
+		blocked = np.zeros(K*E, dtype=bool)
+		for k, forbidden_neighbors in enumerate(list_of_forbidden_neighbors):
+			if forbidden_neighbors:
+				blocked[k*E:(k+1)*E] = ra.get_blocked_slots(forbidden_neighbors)
+
+	next_hop = np.full(K*N, -1, dtype=np.int64)
+	path_length = np.full(K*N, -1, dtype=np.int64)
+	origin = np.full(K*N, -1, dtype=np.int64)
+	route_class = np.full(K*N, NO_ROUTE, dtype=np.int8)
+	next_hop_slot = np.full(K*N, -1, dtype=np.int64)
+	path_length[origin_indices] = origin_lengths
+	origin[origin_indices] = origin_indices % N if N > 0 else origin_indices
+
+	best_key = np.empty(K*N, dtype=np.int64)
+	no_key = np.iinfo(np.int64).max
+
+	'''
+	Assigns routes to the neighbors of the given (flattened) sender nodes, if the neighbors do not already have a route and they receive the route over a link of the given relation.
+	The best candidate per receiver is the one with the shortest path, and then with the highest preference; i.e., with the lowest key (path length of the sender)*E + (rank of the preference).
+	'''
+	def assign_routes(senders, receiver_relation):
+		(sender_indptr, sender_slots) = ra.receivers_by_sender[receiver_relation]
+		sender_nodes = senders % N
+		(positions, owners) = _get_rows_of(sender_indptr, sender_nodes)
+		receiver_slots = sender_slots[positions]
+		offsets = (senders - sender_nodes)[owners]		# i.e., k*N for the configuration k
+		receivers = offsets + rows[receiver_slots]
+		keep = path_length[receivers] < 0
+		if blocked is not None:
+			keep &= ~blocked[(offsets // N) * E + receiver_slots]
+		if poisoned is not None:
+			keep &= ~(poisoned[receivers] & (origin[offsets + indices[receiver_slots]] == hijacker[offsets // N]))
+		receiver_slots = receiver_slots[keep]
+		receivers = receivers[keep]
+		senders = offsets[keep] + indices[receiver_slots]
+		keys = path_length[senders] * E + preference_rank[receiver_slots]
+		best_key[receivers] = no_key
+		np.minimum.at(best_key, receivers, keys)
+		best = keys == best_key[receivers]
+		receivers = receivers[best]
+		senders = senders[best]
+		path_length[receivers] = path_length[senders] + 1
+		next_hop[receivers] = senders % N
+		origin[receivers] = origin[senders]
+		route_class[receivers] = receiver_relation
+		next_hop_slot[receivers] = receiver_slots[best]
+		return receivers
+
+	# (1) customer routes: breadth-first, from customers to providers; the origins join the frontier at the level of their path length
+	frontier = origin_indices[origin_lengths == 0]
+	level = 0
+	max_origin_length = int(origin_lengths.max()) if len(origin_lengths) > 0 else 0
+	while (len(frontier) > 0) or (level < max_origin_length):
+		frontier = assign_routes(frontier, -1)
+		level += 1
+		if level <= max_origin_length:
+			frontier = np.concatenate((frontier, origin_indices[origin_lengths == level]))
+
+	# (2) peer routes: from peers with a customer route (or anycasters)
+	assign_routes(np.flatnonzero(is_origin | (route_class == -1)), 0)
+
+	# (3) provider routes: from providers with any route, in increasing path length
+	level = 0
+	max_level = int(path_length.max()) if K*N > 0 else -1
+	while level <= max_level:
+		new_routes = assign_routes(np.flatnonzero(path_length == level), 1)
+		if len(new_routes) > 0:
+			max_level = max(max_level, level+1)
+		level += 1
+
+	shape = (K, N)
+	return BatchAnycastRoutes(ra, [list(anycasters) for anycasters in list_of_anycasters], list(list_of_forbidden_neighbors),
+		next_hop.reshape(shape), path_length.reshape(shape), origin.reshape(shape), route_class.reshape(shape), next_hop_slot.reshape(shape), list_of_hijacks)
+
+
+
+'''
+Computes the converged BGP routes (see the description at the top of the file) of all nodes for a prefix announced by the given anycasters, i.e., the same routes as with:
+	for ASN in anycasters:
+		Topo.add_prefix(ASN, prefix, forbidden_neighbors=forbidden_neighbors.get(ASN))
+
+Input arguments:
+	(a) Topo: a BGPtopology (or CSRtopology)
+	(b) anycasters: list of the ASNs that announce the prefix
+	(c) forbidden_neighbors: (optional) dictionary with (i) keys anycasters and (ii) values the list of neighbors to which the anycaster does not announce the prefix
+
+Returns:
+	An AnycastRoutes object
+'''
+def compute_anycast_routes(Topo, anycasters, forbidden_neighbors=None):
+	return compute_batch_of_anycast_routes(Topo, [anycasters], [forbidden_neighbors]).get_routes(0)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Impact of BGP hijacks against anycast prefixes, for many (victims, hijacker, hijack type) triples at once.
+# The impact of a triple is the number of nodes (ASes) whose best path leads to the hijacker, i.e., the same number as
+#	for ASN in victims:
+#		Topo.add_prefix(ASN, prefix)
+#	Topo.do_hijack(hijacker, prefix, hijack_type)
+#	Topo.get_nb_of_nodes_with_hijacked_path_to_prefix(prefix, hijacker)
+# but without exchanging BGP messages: for every set of victims, the legitimate routes are computed once with the routing engine (see gao_rexford_routing.py) and give the path announced by each hijacker (see BGPnode.get_path_poisoning_hijack);
+# then the routes of all the hijacks of the victims are computed in batches (see the function "compute_batch_of_anycast_routes(...)"), and the sets of victims are distributed to a pool of processes (see parallel_experiments.py).
+#
+
+from functools import partial
+import numpy as np
+from gao_rexford_routing import get_routing_arrays, compute_batch_of_anycast_routes
+from parallel_experiments import map_over_topology
+
+_shared_routing_arrays = None	# the RoutingArrays of the topology, inherited by the forked workers
+
+
+'''
+Returns the path of the hijacker after the hijack (i.e., the path that it announces, without its own ASN), as set by BGPnode.do_hijack; None if the hijacker does not announce anything (i.e., it has no legitimate path for a hijack of type > 0).
+
+Input arguments:
+	(a) legitimate_path: the best path of the hijacker before the hijack (None if it has no path)
+	(b) hijack_type: the type of the hijack (0 for origin-AS hijack; 1,2,3,... for 1st, 2nd, 3rd,... hop hijack)
+'''
+def get_hijacked_path(legitimate_path, hijack_type):
+	if hijack_type == 0:
+		return []
+	if not legitimate_path:
+		return None
+	if hijack_type <= len(legitimate_path):
+		return list(legitimate_path[-hijack_type:])
+	return [legitimate_path[-1]]*hijack_type
+
+
+'''
+Computes the impact of the hijacks of the given hijackers and hijack types against a set of victims (see the function "compute_hijack_impact_matrix(...)").
+
+Returns:
+	A numpy array (int32) of shape (nb_of_hijackers, nb_of_hijack_types) with the number of hijacked nodes
+'''
+def compute_hijack_impact_of_victims(Topo, victims, hijackers, hijack_types, batch_size=32, routing_arrays=None):
+	ra = routing_arrays if routing_arrays is not None else get_routing_arrays(Topo)
+	legitimate_routes = compute_batch_of_anycast_routes(Topo, [victims], routing_arrays=ra).get_routes(0)
+	impact = np.zeros((len(hijackers), len(hijack_types)), dtype=np.int32)
+
+	positions = []
+	hijacks = []
+	for h, hijacker_ASN in enumerate(hijackers):
+		if hijacker_ASN in victims:
+			continue
+		legitimate_path = legitimate_routes.get_path(hijacker_ASN)
+		for t, hijack_type in enumerate(hijack_types):
+			hijacked_path = get_hijacked_path(legitimate_path, hijack_type)
+			if hijacked_path is not None:
+				positions.append((h, t))
+				hijacks.append((hijacker_ASN, hijacked_path))
+
+	for start in range(0, len(hijacks), batch_size):
+		batch_hijacks = hijacks[start:start+batch_size]
+		batch = compute_batch_of_anycast_routes(Topo, [victims]*len(batch_hijacks), routing_arrays=ra, list_of_hijacks=batch_hijacks)
+		for (h, t), nb_of_hijacked_nodes in zip(positions[start:start+batch_size], batch.get_nb_of_hijacked_nodes().tolist()):
+			impact[h, t] = nb_of_hijacked_nodes
+	return impact
+
+
+'''
+Runs "compute_hijack_impact_of_victims(...)" in a worker (see parallel_experiments.map_over_topology).
+'''
+def _compute_hijack_impact_in_worker(Topo, victims, hijackers=None, hijack_types=None, batch_size=32):
+	return compute_hijack_impact_of_victims(Topo, victims, hijackers, hijack_types, batch_size=batch_size, routing_arrays=_shared_routing_arrays)
+
+
+
+'''
+Computes the impact of every hijacker, with every hijack type, against every set of victims (i.e., the anycasters of a prefix), in parallel.
+
+Input arguments:
+	(a) Topo: the topology (BGPtopology or CSRtopology); None if snapshot_dirname is given
+	(b) list_of_victims: list with the list of victims (ASNs) of each prefix
+	(c) list_of_hijackers: list of the ASNs of the hijackers
+	(d) hijack_types: list of the hijack types (see BGPnode.do_hijack)
+	(e) snapshot_dirname: (optional) the directory of a snapshot of the topology (see parallel_experiments.map_over_topology)
+	(f) nb_of_processes: the number of worker processes (default: the number of CPUs); IF 1, the matrix is computed in the current process
+	(g) batch_size: the number of hijacks whose routes are computed together; the memory of a batch is about 40*batch_size*nb_of_nodes bytes
+
+Returns:
+	A numpy array (int32) of shape (nb_of_victim_sets, nb_of_hijackers, nb_of_hijack_types) with the number of hijacked nodes of each triple;
+	0 if the hijacker is a victim, or if it has no legitimate path (for hijack types > 0), since in these cases it does not announce the prefix
+'''
+def compute_hijack_impact_matrix(Topo, list_of_victims, list_of_hijackers, hijack_types=(0,1,2,3), snapshot_dirname=None, nb_of_processes=None, batch_size=32):
+	global _shared_routing_arrays
+	list_of_victims = [list(victims) for victims in list_of_victims]
+	function = partial(_compute_hijack_impact_in_worker, hijackers=list(list_of_hijackers), hijack_types=list(hijack_types), batch_size=batch_size)
+	matrix = np.zeros((len(list_of_victims), len(list_of_hijackers), len(hijack_types)), dtype=np.int32)
+	_shared_routing_arrays = get_routing_arrays(Topo) if Topo is not None else None
+	try:
+		for k, impact in map_over_topology(function, Topo, list_of_victims, snapshot_dirname=snapshot_dirname, nb_of_processes=nb_of_processes, ordered=False):
+			matrix[k] = impact
+	finally:
+		_shared_routing_arrays = None
+	return matrix
+
+
+
+'''
+Writes a hijack impact matrix (see the function "compute_hijack_impact_matrix(...)") to a compressed numpy file (.npz), together with the victims, the hijackers and the hijack types.
+The sets of victims are kept in CSR format, i.e., the victims of the k-th set are victims[victims_indptr[k]:victims_indptr[k+1]].
+'''
+def save_hijack_impact_matrix(filename, matrix, list_of_victims, list_of_hijackers, hijack_types):
+	victims_indptr = np.zeros(len(list_of_victims)+1, dtype=np.int64)
+	np.cumsum([len(victims) for victims in list_of_victims], out=victims_indptr[1:])
+	victims = np.array([ASN for victims in list_of_victims for ASN in victims], dtype=np.int64)
+	np.savez_compressed(filename, matrix=matrix, victims_indptr=victims_indptr, victims=victims,
+		hijackers=np.array(list_of_hijackers, dtype=np.int64), hijack_types=np.array(hijack_types, dtype=np.int64))
+
+
+'''
+Reads a hijack impact matrix written by the function "save_hijack_impact_matrix(...)".
+
+Returns:
+	A tuple (matrix, list_of_victims, list_of_hijackers, hijack_types)
+'''
+def load_hijack_impact_matrix(filename):
+	with np.load(filename) as data:
+		victims_indptr = data['victims_indptr'].tolist()
+		victims = data['victims'].tolist()
+		list_of_victims = [victims[victims_indptr[k]:victims_indptr[k+1]] for k in range(len(victims_indptr)-1)]
+		return (data['matrix'], list_of_victims, data['hijackers'].tolist(), data['hijack_types'].tolist())
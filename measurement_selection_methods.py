@@ -133,6 +133,10 @@ def random_measurements(GGG, candidate_nodes, budget, lazy_probabilities_thresho
 		i+=1
 		#print('Iteration: {}'.format(i),end='\r')
 		(list_of_Rgraph_colors, list_of_probabilities, current_efficiency) = evaluate_efficiency(current_node, GGG, list_of_Rgraph_colors, list_of_probabilities, lazy_probabilities_threshold, lazy_state_space_sampling)
+		for j, current_R_colors in enumerate(list_of_Rgraph_colors):	# update the coloring of every state after the measurement (as in greedy_next_node)
+			GGG.colors = copy.deepcopy(current_R_colors)
+			GGG.update_forward_probabilistic_coloring()
+			list_of_Rgraph_colors[j] = copy.deepcopy(GGG.colors)
 		list_of_efficiencies.append(current_efficiency)
 	#print(list_of_selected_nodes)
 	#print(list_of_efficiencies)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Runs many anycast experiments (i.e., sets of anycasters announcing a prefix), or any other tasks over a topology (see "map_over_topology(...)"), in parallel, in a pool of worker processes.
+# The topology is loaded once, and shared read-only with the workers:
+#	(a) a topology object (BGPtopology or CSRtopology) is inherited by the workers when they are forked, i.e., its memory pages are shared copy-on-write, or
+#	(b) a snapshot (see BGPtopology.save_topology_to_snapshot) is memory-mapped by every worker into a CSRtopology, i.e., the pages of the snapshot files are shared by all the workers.
+# Every worker has its own copy of the routing information of the nodes (which is cleared after each task), so the tasks do not interfere.
+#
+
+import gc
+import multiprocessing
+from functools import partial
+from CSRtopology import CSRtopology
+from create_Rgraph_from_Topo import create_Rgraph_from_Topo, create_Rgraph_from_edges
+from gao_rexford_routing import compute_anycast_routes
+from simulation_cache import get_colored_Rgraph, get_topology_hash
+
+PREFIX = 0	# the prefix announced by the anycasters in every experiment
+
+_shared_topology = None	# the topology inherited by the forked workers
+_worker_state = {}		# the topology of the worker (set by "_init_worker(...)")
+
+
+'''
+Initializes a worker process: the topology is either the one inherited from the parent process (when forked), or a CSRtopology memory-mapped from the given snapshot.
+'''
+def _init_worker(snapshot_dirname):
+	if snapshot_dirname is not None:
+		Topo = CSRtopology()
+		Topo.load_topology_from_snapshot(snapshot_dirname)
+	else:
+		Topo = _shared_topology
+	_worker_state['Topo'] = Topo
+
+
+'''
+Runs a single task in the worker, i.e., calls function(Topo, task).
+'''
+def _run_in_worker(function_and_task):
+	(function, k, task) = function_and_task
+	return (k, function(_worker_state['Topo'], task))
+
+
+
+'''
+Calls the given function for every task over the topology, in parallel, and returns (as a generator) the result of each task as soon as it is completed.
+
+The topology is given either as an object (it is shared with the workers by forking them; the "fork" start method must be available, e.g., on Linux), or as a snapshot directory (every worker memory-maps it; any start method).
+The results are equal to calling "function(Topo, task)" for each task, one after another; the function must not leave routing information in the topology (which is reused by the next tasks of the worker).
+
+Input arguments:
+	(a) function: a function (defined at the top level of a module, or a functools.partial of such a function) with arguments (Topo, task)
+	(b) Topo: the topology (BGPtopology or CSRtopology); None if snapshot_dirname is given
+	(c) tasks: list of the tasks
+	(d) snapshot_dirname: (optional) the directory of a snapshot of the topology (see BGPtopology.save_topology_to_snapshot)
+	(e) nb_of_processes: the number of worker processes (default: the number of CPUs); IF 1, the tasks are run in the current process
+	(f) chunksize: the number of tasks sent to a worker at once
+	(g) ordered: IF True, the results are returned in the order of "tasks"; ELSE in the order they are completed
+
+Returns:
+	A generator of tuples (k, result), where k is the position of the task in "tasks"
+'''
+def map_over_topology(function, Topo, tasks, snapshot_dirname=None, nb_of_processes=None, chunksize=1, ordered=True):
+	global _shared_topology
+	if (Topo is None) == (snapshot_dirname is None):
+		raise Exception('Exactly one of Topo and snapshot_dirname must be given')
+	tasks = [(function, k, task) for k, task in enumerate(tasks)]
+
+	if nb_of_processes == 1:
+		_shared_topology = Topo
+		try:
+			_init_worker(snapshot_dirname)
+			for task in tasks:
+				yield _run_in_worker(task)
+		finally:
+			_worker_state.clear()
+			_shared_topology = None
+		return
+
+	if 'fork' in multiprocessing.get_all_start_methods():
+		context = multiprocessing.get_context('fork')
+	elif Topo is None:
+		context = multiprocessing.get_context()
+	else:
+		raise Exception('The "fork" start method is not available; give the topology as a snapshot (snapshot_dirname)')
+
+	_shared_topology = Topo
+	gc.freeze()	# the objects of the parent are not touched by the garbage collector of the workers, so their memory pages stay shared
+	try:
+		with context.Pool(nb_of_processes, initializer=_init_worker, initargs=(snapshot_dirname,)) as pool:
+			if ordered:
+				results = pool.imap(_run_in_worker, tasks, chunksize=chunksize)
+			else:
+				results = pool.imap_unordered(_run_in_worker, tasks, chunksize=chunksize)
+			for result in results:
+				yield result
+	finally:
+		gc.unfreeze()
+		_shared_topology = None
+
+
+
+'''
+Runs an anycast experiment over the given topology: the anycasters announce a prefix, the Rgraph of the prefix is created (see "create_Rgraph_from_Topo(...)"), and it is colored probabilistically.
+
+Input arguments:
+	(a) Topo: the topology (BGPtopology or CSRtopology)
+	(b) anycasters: list of the ASNs of the anycasters
+	(c) use_routing_engine: IF True, the routes are computed without BGP messages (see gao_rexford_routing.py) and the routing information of the nodes is not changed; ELSE the BGP messages are simulated, and the routing information is cleared afterwards
+	(d) shortest_path_preference: True/False, as in "create_Rgraph_from_Topo(...)"
+	(e) in_percentage: True/False, as in Rgraph.get_certain_catchment
+	(f) cache: (optional) a SimulationCache (see simulation_cache.py); IF the experiment has been cached, THEN the colored Rgraph is read from the cache, ELSE it is written to the cache
+	(g) topology_hash: (optional) the hash of the topology (see simulation_cache.get_topology_hash); computed if not given (and a cache is given)
+
+Returns:
+	A tuple (certain_catchment, probabilistic_catchment) of dictionaries with keys the anycasters (see Rgraph.get_certain_catchment and Rgraph.get_probabilistic_catchment)
+'''
+def run_anycast_experiment(Topo, anycasters, use_routing_engine=False, shortest_path_preference=False, in_percentage=False, cache=None, topology_hash=None):
+	if cache is not None:
+		(G, _) = get_colored_Rgraph(Topo, anycasters, shortest_path_preference=shortest_path_preference, cache=cache, topology_hash=topology_hash, use_routing_engine=use_routing_engine)
+		return (dict(G.get_certain_catchment(in_percentage=in_percentage)), dict(G.get_probabilistic_catchment(in_percentage=in_percentage)))
+	if use_routing_engine:
+		edges = compute_anycast_routes(Topo, anycasters).get_Rgraph_edges(shortest_path_preference=shortest_path_preference)
+		G = create_Rgraph_from_edges(anycasters, edges)
+	else:
+		try:
+			for AS in anycasters:
+				Topo.add_prefix(AS, PREFIX)
+			G = create_Rgraph_from_Topo(Topo, PREFIX, shortest_path_preference=shortest_path_preference)
+		finally:
+			Topo.clear_routing_information()
+	G.set_probabilistic_coloring(anycasters)
+	return (dict(G.get_certain_catchment(in_percentage=in_percentage)), dict(G.get_probabilistic_catchment(in_percentage=in_percentage)))
+
+
+
+'''
+Runs the anycast experiments for the given sets of anycasters in parallel, and returns (as a generator) the results of each experiment as soon as it is completed.
+
+The topology is given either as an object (it is shared with the workers by forking them; the "fork" start method must be available, e.g., on Linux), or as a snapshot directory (every worker memory-maps it; any start method).
+The results are equal to running "run_anycast_experiment(...)" for each set of anycasters, one after another.
+
+Input arguments:
+	(a) Topo: the topology (BGPtopology or CSRtopology); None if snapshot_dirname is given
+	(b) list_of_anycasters: list with the list of anycasters (ASNs) of each experiment
+	(c) snapshot_dirname: (optional) the directory of a snapshot of the topology (see BGPtopology.save_topology_to_snapshot)
+	(d) nb_of_processes: the number of worker processes (default: the number of CPUs); IF 1, the experiments are run in the current process
+	(e) use_routing_engine, shortest_path_preference, in_percentage: see the function "run_anycast_experiment(...)"
+	(f) chunksize: the number of experiments sent to a worker at once
+	(g) ordered: IF True, the results are returned in the order of "list_of_anycasters"; ELSE in the order they are completed
+	(h) cache: (optional) a SimulationCache (see simulation_cache.py), shared by all the workers; the hash of the topology is computed once, before the workers start
+
+Returns:
+	A generator of tuples (k, anycasters, certain_catchment, probabilistic_catchment), where k is the position of the experiment in "list_of_anycasters"
+'''
+def run_anycast_experiments(Topo, list_of_anycasters, snapshot_dirname=None, nb_of_processes=None, use_routing_engine=False, shortest_path_preference=False, in_percentage=False, chunksize=1, ordered=True, cache=None):
+	topology_hash = None
+	if cache is not None:
+		if Topo is None:
+			snapshot = CSRtopology()
+			snapshot.load_topology_from_snapshot(snapshot_dirname)
+			topology_hash = get_topology_hash(snapshot)
+			del snapshot
+		else:
+			topology_hash = get_topology_hash(Topo)
+	function = partial(run_anycast_experiment, use_routing_engine=use_routing_engine, shortest_path_preference=shortest_path_preference, in_percentage=in_percentage, cache=cache, topology_hash=topology_hash)
+	list_of_anycasters = [list(anycasters) for anycasters in list_of_anycasters]
+	for k, (certain_catchment, probabilistic_catchment) in map_over_topology(function, Topo, list_of_anycasters, snapshot_dirname=snapshot_dirname, nb_of_processes=nb_of_processes, chunksize=chunksize, ordered=ordered):
+		yield (k, list_of_anycasters[k], certain_catchment, probabilistic_catchment)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Index of the best paths of all the nodes of a topology for a prefix: for every AS (and every edge, i.e., pair of consecutive ASes), the set of the nodes whose best path contains it.
+# It is built once (after the routing of the prefix has converged), and then each query costs a dictionary lookup instead of a scan of the paths of all the nodes.
+# When the best path of a node may have changed (see BGPtopology.invalidate_path_index), only this node is re-indexed, at the next query.
+#
+
+from collections import defaultdict
+
+
+'''
+Returns the edges of the given path as tuples (ASN1, ASN2), where ASN1 announced the path to ASN2, i.e., ASN1 is right after ASN2 in the path.
+As in BGPtopology.get_set_of_nodes_with_specific_edge_to_prefix, only the first appearance of each ASN is considered (e.g., for prepended or poisoned paths).
+'''
+def get_edges_of_path(path):
+	if len(set(path)) == len(path):
+		return list(zip(path[1:], path[:-1]))
+	first_position = {}
+	for k, ASN in enumerate(path):
+		first_position.setdefault(ASN, k)
+	ASN_in_position = {k: ASN for ASN, k in first_position.items()}
+	return [(ASN_in_position[k+1], ASN) for k, ASN in ASN_in_position.items() if k+1 in ASN_in_position]
+
+
+
+'''
+Index of the best paths of the nodes of a topology for a prefix.
+
+class variables:
+	(a) Topology:				the topology (BGPtopology or CSRtopology)
+	(b) IPprefix:				the prefix
+	(c) indexed_paths:			dictionary with (i) keys the ASNs of the indexed nodes and (ii) values their (indexed) best path; nodes without path are not kept
+	(d) nodes_with_ASN:			dictionary with (i) keys ASNs and (ii) values the set of the nodes whose best path contains the ASN
+	(e) nodes_with_edge:		dictionary with (i) keys tuples (ASN1, ASN2) and (ii) values the set of the nodes whose best path contains the edge from ASN1 to ASN2 (see the function "get_edges_of_path(...)")
+	(f) changed_nodes:			set of the ASNs of the nodes to be re-indexed at the next query (None for all the nodes)
+'''
+class PathIndex:
+	def __init__(self, Topology, IPprefix):
+		self.Topology = Topology
+		self.IPprefix = IPprefix
+		self.indexed_paths = {}
+		self.nodes_with_ASN = defaultdict(set)
+		self.nodes_with_edge = defaultdict(set)
+		self.changed_nodes = None
+
+	'''
+	Marks the given node (or all the nodes, if ASN is None) to be re-indexed at the next query.
+	'''
+	def invalidate(self, ASN=None):
+		if ASN is None:
+			self.changed_nodes = None
+		elif self.changed_nodes is not None:
+			self.changed_nodes.add(ASN)
+
+	'''
+	Returns the set of the nodes to be re-indexed at the next query, i.e., the nodes whose best path may have changed since the last query (or None for all the nodes); the returned set must not be changed.
+	'''
+	def get_changed_nodes(self):
+		return self.changed_nodes
+
+	'''
+	Re-indexes the changed nodes: the entries of a node are replaced only if its best path is not the (same) path that has been indexed; the paths are never changed in place by the BGPnodes, so the check is an identity check.
+	'''
+	def update(self):
+		if self.changed_nodes is None:
+			list_of_nodes = set(self.Topology.get_all_nodes_ASNs()).union(self.indexed_paths.keys())
+		elif self.changed_nodes:
+			list_of_nodes = self.changed_nodes
+		else:
+			return
+		for ASN in list_of_nodes:
+			node = self.Topology.peek_node(ASN)
+			path = node.paths.get(self.IPprefix) if node is not None else None
+			old_path = self.indexed_paths.get(ASN)
+			if (path is old_path) or ((not path) and (not old_path)):
+				continue
+			if old_path:
+				self.remove_path(ASN, old_path)
+			if path:
+				self.add_path(ASN, path)
+		self.changed_nodes = set()
+
+	def add_path(self, ASN, path):
+		self.indexed_paths[ASN] = path
+		for transit_ASN in path:
+			self.nodes_with_ASN[transit_ASN].add(ASN)
+		for edge in get_edges_of_path(path):
+			self.nodes_with_edge[edge].add(ASN)
+
+	def remove_path(self, ASN, path):
+		del self.indexed_paths[ASN]
+		for transit_ASN in path:
+			nodes = self.nodes_with_ASN.get(transit_ASN)
+			if nodes is not None:
+				nodes.discard(ASN)
+				if not nodes:
+					del self.nodes_with_ASN[transit_ASN]
+		for edge in get_edges_of_path(path):
+			nodes = self.nodes_with_edge.get(edge)
+			if nodes is not None:
+				nodes.discard(ASN)
+				if not nodes:
+					del self.nodes_with_edge[edge]
+
+	'''
+	Returns the set of the nodes whose best path contains the given ASN (the returned set must not be changed).
+	'''
+	def get_nodes_with_ASN(self, ASN):
+		self.update()
+		return self.nodes_with_ASN.get(ASN, frozenset())
+
+	'''
+	Returns the set of the nodes whose best path contains the given edge, i.e., a list/tuple (ASN1, ASN2); IF directed==True only the edge from ASN1 to ASN2, ELSE the edge in either direction.
+	For directed edges, the returned set must not be changed.
+	'''
+	def get_nodes_with_edge(self, edge, directed=False):
+		self.update()
+		(ASN1, ASN2) = edge
+		nodes = self.nodes_with_edge.get((ASN1, ASN2), frozenset())
+		if not directed:
+			nodes = nodes.union(self.nodes_with_edge.get((ASN2, ASN1), ()))
+		return nodes
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Opt-in counters (and timers) of the propagation of the BGP messages among the nodes of a topology (see BGPtopology.enable_instrumentation), e.g., to find why a simulation is slow:
+# the messages received per AS, the changes of best path, the path exploration, the announcements sent, and the calls (and time) of the BGP methods of the nodes.
+# The counters are kept by an instrumented subclass of the node class of the topology, i.e., the nodes of a topology are switched to this subclass only while the instrumentation is enabled;
+# hence a topology without instrumentation runs the methods of BGPnode (or CSRnode) without any extra cost.
+# Only the simulations with BGP messages are counted (e.g., "Topo.add_prefix(...)", "Topo.do_hijack(...)", "Topo.add_link(...)"), and not the routing engine (see gao_rexford_routing.py).
+#
+
+from collections import Counter
+from time import perf_counter
+
+INSTRUMENTED_METHODS = ('receive_path', 'add_received_path', 'select_best_path', 'withdraw_path', 'replace_withdrawn_path', 'export_path', 'announce_path')
+
+_instrumented_classes = {}	# dictionary with (i) keys node classes and (ii) values their instrumented subclass
+
+
+
+'''
+Counters of the propagation of the BGP messages in a topology.
+
+class variables:
+	(a) timers:					True/False - whether the time spent in each BGP method is measured (it costs two calls of the clock per method call)
+	(b) announcements_received:	Counter with (i) keys ASNs and (ii) values the number of announcements received by the AS (see BGPnode.receive_path)
+	(c) withdrawals_received:	Counter with (i) keys ASNs and (ii) values the number of withdrawals received by the AS (see BGPnode.withdraw_path)
+	(d) best_path_changes:		Counter with (i) keys ASNs and (ii) values the number of times the best path of the AS (for any prefix) has changed, incl. a new path where there was no path and a withdrawn path that is not replaced
+	(e) path_explorations:		Counter with (i) keys ASNs and (ii) values the number of times a best path of the AS has been replaced by another path, i.e., the changes of best path from a path to a path
+	(f) announcements_sent:		Counter with (i) keys ASNs and (ii) values the number of announcements sent by the AS (one per neighbor; see BGPnode.announce_path)
+	(g) calls:					Counter with (i) keys the names of the instrumented methods and (ii) values the number of calls
+	(h) self_time:				Counter with (i) keys the names of the instrumented methods and (ii) values the time (in seconds) spent in the method, excluding the time of the instrumented methods that it calls (only if timers==True)
+'''
+class PropagationCounters:
+	def __init__(self, timers=False):
+		self.timers = timers
+		self.announcements_received = Counter()
+		self.withdrawals_received = Counter()
+		self.best_path_changes = Counter()
+		self.path_explorations = Counter()
+		self.announcements_sent = Counter()
+		self.calls = Counter()
+		self.self_time = Counter()
+		self.timer_stack = []
+
+	'''
+	Calls the given (bound) method with the given arguments, and counts the call (and its time, if timers==True) for the given method name.
+	The time of a call is added to the method, after the time of the instrumented methods that it called (e.g., in the 'recursive' propagation mode, the methods of the neighbors) is subtracted.
+	'''
+	def call(self, method_name, method, *args):
+		self.calls[method_name] += 1
+		if not self.timers:
+			return method(*args)
+		stack = self.timer_stack
+		stack.append(0.0)
+		start = perf_counter()
+		try:
+			return method(*args)
+		finally:
+			elapsed = perf_counter() - start
+			self.self_time[method_name] += elapsed - stack.pop()
+			if stack:
+				stack[-1] += elapsed
+
+	'''
+	Counts a change of the best path of the given AS from old_path to new_path (if they are different).
+	'''
+	def count_best_path_change(self, ASN, old_path, new_path):
+		if old_path != new_path:
+			self.best_path_changes[ASN] += 1
+			if old_path and new_path:
+				self.path_explorations[ASN] += 1
+
+	'''
+	Returns a PropagationReport of the counters, with the given number of hottest ASes.
+	'''
+	def get_report(self, nb_of_hottest_ASes=10):
+		return PropagationReport(self, nb_of_hottest_ASes)
+
+
+
+'''
+Report of the propagation of the BGP messages (see PropagationCounters); the values are copied when the report is created, i.e., the report does not change when the counters change.
+
+class variables:
+	(a) nb_of_announcements_received, nb_of_withdrawals_received, nb_of_messages_received, nb_of_best_path_changes, nb_of_path_explorations, nb_of_announcements_sent:	integers - the totals over all the ASes
+	(b) messages_received:		dictionary with (i) keys ASNs and (ii) values the number of messages (announcements and withdrawals) received by the AS
+	(c) announcements_received, withdrawals_received, best_path_changes, path_explorations, announcements_sent:	dictionaries with (i) keys ASNs and (ii) values the respective counters of the AS (see PropagationCounters)
+	(d) hottest_ASes:			list of tuples (ASN, nb_of_messages_received) for the ASes that received the most messages, in decreasing order
+	(e) calls:					dictionary with (i) keys the names of the instrumented methods and (ii) values the number of calls
+	(f) self_time:				dictionary with (i) keys the names of the instrumented methods and (ii) values the time (in seconds) spent in the method (empty if the timers are disabled)
+'''
+class PropagationReport:
+	def __init__(self, counters, nb_of_hottest_ASes=10):
+		self.announcements_received = dict(counters.announcements_received)
+		self.withdrawals_received = dict(counters.withdrawals_received)
+		self.messages_received = dict(counters.announcements_received + counters.withdrawals_received)
+		self.best_path_changes = dict(counters.best_path_changes)
+		self.path_explorations = dict(counters.path_explorations)
+		self.announcements_sent = dict(counters.announcements_sent)
+		self.nb_of_announcements_received = sum(self.announcements_received.values())
+		self.nb_of_withdrawals_received = sum(self.withdrawals_received.values())
+		self.nb_of_messages_received = self.nb_of_announcements_received + self.nb_of_withdrawals_received
+		self.nb_of_best_path_changes = sum(self.best_path_changes.values())
+		self.nb_of_path_explorations = sum(self.path_explorations.values())
+		self.nb_of_announcements_sent = sum(self.announcements_sent.values())
+		self.hottest_ASes = Counter(self.messages_received).most_common(nb_of_hottest_ASes)
+		self.calls = {method_name: counters.calls.get(method_name, 0) for method_name in INSTRUMENTED_METHODS}
+		self.self_time = {method_name: counters.self_time.get(method_name, 0.0) for method_name in INSTRUMENTED_METHODS} if counters.timers else {}
+
+	'''
+	Returns the report as a dictionary (e.g., to be written as json), with the totals, the hottest ASes, the calls and times of the methods, and (IF per_AS==True) the counters of every AS.
+	'''
+	def to_dict(self, per_AS=False):
+		report = {
+			'nb_of_announcements_received': self.nb_of_announcements_received,
+			'nb_of_withdrawals_received': self.nb_of_withdrawals_received,
+			'nb_of_messages_received': self.nb_of_messages_received,
+			'nb_of_best_path_changes': self.nb_of_best_path_changes,
+			'nb_of_path_explorations': self.nb_of_path_explorations,
+			'nb_of_announcements_sent': self.nb_of_announcements_sent,
+			'hottest_ASes': [list(row) for row in self.hottest_ASes],
+			'calls': dict(self.calls),
+			'self_time': dict(self.self_time),
+		}
+		if per_AS:
+			for name in ('messages_received', 'announcements_received', 'withdrawals_received', 'best_path_changes', 'path_explorations', 'announcements_sent'):
+				report[name] = dict(getattr(self, name))
+		return report
+
+	def print_info(self):
+		print('messages received: {} (announcements: {}, withdrawals: {})'.format(self.nb_of_messages_received, self.nb_of_announcements_received, self.nb_of_withdrawals_received))
+		print('announcements sent: {}'.format(self.nb_of_announcements_sent))
+		print('best path changes: {} (path explorations: {})'.format(self.nb_of_best_path_changes, self.nb_of_path_explorations))
+		print('hottest ASes (ASN, messages received): {}'.format(self.hottest_ASes))
+		for method_name in INSTRUMENTED_METHODS:
+			if self.self_time:
+				print('{}: {} calls, {:.3f} s'.format(method_name, self.calls[method_name], self.self_time[method_name]))
+			else:
+				print('{}: {} calls'.format(method_name, self.calls[method_name]))
+
+	def __repr__(self):
+		return 'PropagationReport(messages_received={}, announcements_sent={}, best_path_changes={}, path_explorations={})'.format(
+			self.nb_of_messages_received, self.nb_of_announcements_sent, self.nb_of_best_path_changes, self.nb_of_path_explorations)
+
+
+
+'''
+The instrumented BGP methods; each one counts the call in the PropagationCounters of the topology of the node ("Topology.instrumentation"), and calls the method of the node class.
+It is combined with a node class (BGPnode or a subclass) by the function "get_instrumented_node_class(...)".
+'''
+class InstrumentedNode:
+	def receive_path(self,IPprefix, new_path):
+		counters = self.Topology.instrumentation
+		counters.announcements_received[self.ASN] += 1
+		return counters.call('receive_path', super().receive_path, IPprefix, new_path)
+
+	def add_received_path(self,IPprefix,new_path):
+		counters = self.Topology.instrumentation
+		old_path = self.paths.get(IPprefix)
+		changed = counters.call('add_received_path', super().add_received_path, IPprefix, new_path)
+		if changed:
+			counters.count_best_path_change(self.ASN, old_path, self.paths.get(IPprefix))
+		return changed
+
+	def select_best_path(self,IPprefix):
+		return self.Topology.instrumentation.call('select_best_path', super().select_best_path, IPprefix)
+
+	def withdraw_path(self,IPprefix,w_ASN):
+		counters = self.Topology.instrumentation
+		counters.withdrawals_received[self.ASN] += 1
+		return counters.call('withdraw_path', super().withdraw_path, IPprefix, w_ASN)
+
+	def replace_withdrawn_path(self,IPprefix):
+		counters = self.Topology.instrumentation
+		old_path = self.paths.get(IPprefix)
+		result = counters.call('replace_withdrawn_path', super().replace_withdrawn_path, IPprefix)
+		counters.count_best_path_change(self.ASN, old_path, self.paths.get(IPprefix))
+		return result
+
+	def export_path(self,IPprefix,previous_path=None):
+		return self.Topology.instrumentation.call('export_path', super().export_path, IPprefix, previous_path)
+
+	def announce_path(self,IPprefix, neighbors_to_announce, path_to_announce=None):
+		counters = self.Topology.instrumentation
+		counters.announcements_sent[self.ASN] += len(neighbors_to_announce)
+		return counters.call('announce_path', super().announce_path, IPprefix, neighbors_to_announce, path_to_announce)
+
+
+
+'''
+Returns the instrumented subclass of the given node class (e.g., BGPnode or CSRnode), i.e., a subclass whose BGP methods are the methods of InstrumentedNode; the subclass is created once per node class.
+'''
+def get_instrumented_node_class(node_class):
+	if issubclass(node_class, InstrumentedNode):
+		return node_class
+	instrumented_class = _instrumented_classes.get(node_class)
+	if instrumented_class is None:
+		instrumented_class = type('Instrumented' + node_class.__name__, (InstrumentedNode, node_class), {'base_node_class': node_class})
+		_instrumented_classes[node_class] = instrumented_class
+	return instrumented_class
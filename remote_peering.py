@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# What-if evaluation of remote-peering options for an anycast prefix, i.e., of (ASN, ixp_id) pairs where the AS peers remotely with all the members of the IXP (as BGPtopology.peer_remotely_with_IXP).
+# The routes of the anycasters are computed once with the routing engine and written to the topology (see AnycastRoutes.write_routes_to_Topo); then for every option:
+#	(i) the new peering links are added, and only the nodes affected by the BGP messages over the new links update their paths (incremental routing),
+#	(ii) the change of the catchment is computed only for the nodes whose best path has changed (found with the path index of the prefix, see path_index.py), and
+#	(iii) the links are removed (again incrementally), which restores the routes of the anycasters.
+# The options are distributed to a pool of processes (see parallel_experiments.py), and they are returned ranked by the number of nodes that change catchment.
+#
+
+import csv
+import random
+from functools import partial
+from gao_rexford_routing import compute_anycast_routes
+from parallel_experiments import map_over_topology
+
+PREFIX = 'remote_peering'	# the prefix announced by the anycasters
+
+_base_state = {}	# the topology (with the routes of the anycasters) and the catchment of each node before any option; inherited by the forked workers
+
+
+'''
+Returns the new links of a remote-peering option, i.e., a list of tuples (ASN, member) for the members of the IXP that are nodes of the topology and not already neighbors of the AS.
+'''
+def get_remote_peering_links(Topo, ASN, ixp_id):
+	members = Topo.list_of_all_IXP_nodes[ixp_id].members
+	return [(ASN, member) for member in sorted(members) if (member != ASN) and Topo.has_node(member) and (not Topo.has_link(ASN, member))]
+
+
+'''
+Returns the catchment of the given node for the prefix, i.e., the anycaster that it routes to (the node itself for the anycasters), or None if it has no route.
+'''
+def get_catchment_of_node(Topo, ASN):
+	node = Topo.peek_node(ASN)
+	if node is None:
+		return None
+	if node.has_prefix(PREFIX):
+		return ASN
+	path = node.paths.get(PREFIX)
+	return path[-1] if path else None
+
+
+'''
+Writes the routes of the anycasters to the topology (if not already written by this process), and builds the path index of the prefix.
+
+Returns:
+	A dictionary with (i) keys the ASNs of the nodes with a route and (ii) values their catchment (before any option)
+'''
+def prepare_base_routes(Topo, anycasters):
+	if _base_state.get('Topo') is not Topo:
+		routes = compute_anycast_routes(Topo, anycasters)
+		routes.write_routes_to_Topo(Topo, PREFIX, full_RIB=True)
+		Topo.get_path_index(PREFIX).update()
+		ASNs = routes.routing_arrays.ASNs
+		catchment = {ASNs[i]: ASNs[o] for i, o in enumerate(routes.origin.tolist()) if o >= 0}
+		_base_state.clear()
+		_base_state.update({'Topo': Topo, 'catchment': catchment})
+	return _base_state['catchment']
+
+
+'''
+Evaluates a remote-peering option (see the function "rank_remote_peering_options(...)"); the topology is left as before (incl. the members of the IXP, and the state of the random generator that draws the preferences of the new links).
+
+Returns:
+	A tuple (nb_of_new_links, nb_of_shifted_nodes, catchment_change), where catchment_change is a dictionary with (i) keys the anycasters and (ii) values the change of the number of nodes in their catchment
+'''
+def evaluate_remote_peering_option(Topo, option, anycasters):
+	(ASN, ixp_id) = option
+	base_catchment = prepare_base_routes(Topo, anycasters)
+	path_index = Topo.get_path_index(PREFIX)
+	was_member = ixp_id in Topo.get_IXPs_of_ASN(ASN)
+	links = get_remote_peering_links(Topo, ASN, ixp_id)
+	random_state = random.getstate()
+	try:
+		Topo.add_IXP_member(ixp_id, ASN)
+		for (ASN1, ASN2) in links:
+			Topo.add_link(ASN1, ASN2, 0)
+		changed_nodes = path_index.get_changed_nodes()
+		if changed_nodes is None:
+			changed_nodes = Topo.get_all_nodes_ASNs()
+		catchment_change = dict.fromkeys(anycasters, 0)
+		nb_of_shifted_nodes = 0
+		for changed_ASN in changed_nodes:
+			old = base_catchment.get(changed_ASN)
+			new = get_catchment_of_node(Topo, changed_ASN)
+			if old != new:
+				nb_of_shifted_nodes += 1
+				if old is not None:
+					catchment_change[old] -= 1
+				if new is not None:
+					catchment_change[new] += 1
+	finally:
+		Topo.remove_links(links)
+		if not was_member:
+			Topo.remove_IXP_member(ixp_id, ASN)
+		random.setstate(random_state)
+	path_index.update()	# re-indexes the nodes changed by the option and by its removal
+	return (len(links), nb_of_shifted_nodes, catchment_change)
+
+
+'''
+Runs "evaluate_remote_peering_option(...)" in a worker (see parallel_experiments.map_over_topology).
+'''
+def _evaluate_option_in_worker(Topo, option, anycasters=None):
+	return evaluate_remote_peering_option(Topo, option, anycasters)
+
+
+
+'''
+Evaluates the given remote-peering options for the prefix of the given anycasters, in parallel, and returns them ranked by their impact on the catchment.
+Every option is evaluated independently, i.e., on the routes of the anycasters without any other option; the result of an option is the same as
+	Topo.peer_remotely_with_IXP(ASN, ixp_id) (for the members that are nodes of the topology), and then the anycasters announce the prefix (see "add_prefix(...)"),
+compared with the catchment without the option.
+
+Input arguments:
+	(a) Topo: the topology (BGPtopology or CSRtopology), with IXPs (see BGPtopology.load_ixps_from_json and BGPtopology.load_ixp_members_from_json) and without routing information (it is cleared at the end)
+	(b) anycasters: list of the ASNs of the anycasters (sites)
+	(c) options: list of tuples (ASN, ixp_id), e.g., every anycaster with every IXP
+	(d) snapshot_dirname: (optional) the directory of a snapshot of the topology (see parallel_experiments.map_over_topology); then Topo is used only to check the options, and every worker computes the routes of the anycasters
+	(e) nb_of_processes: the number of worker processes (default: the number of CPUs); IF 1, the options are evaluated in the current process
+	(f) rank_by: 'shifted_nodes' (the number of nodes that change catchment) or 'gain' (the change of the catchment of the AS of the option); ties are ranked by the other criterion
+
+Returns:
+	A list of tuples (ASN, ixp_id, nb_of_new_links, nb_of_shifted_nodes, catchment_change), one per option, ranked in decreasing order (see the function "evaluate_remote_peering_option(...)")
+'''
+def rank_remote_peering_options(Topo, anycasters, options, snapshot_dirname=None, nb_of_processes=None, rank_by='shifted_nodes'):
+	if rank_by not in ('shifted_nodes', 'gain'):
+		raise Exception('Not valid ranking criterion: {}'.format(rank_by))
+	anycasters = list(anycasters)
+	options = [tuple(option) for option in options]
+	for (ASN, ixp_id) in options:
+		if (not Topo.has_node(ASN)) or (ixp_id not in getattr(Topo, 'list_of_all_IXP_nodes', {})):
+			raise Exception('Not valid remote-peering option: {}'.format((ASN, ixp_id)))
+
+	function = partial(_evaluate_option_in_worker, anycasters=anycasters)
+	table = []
+	try:
+		if snapshot_dirname is None:
+			prepare_base_routes(Topo, anycasters)
+			Topo_to_share = Topo
+		else:
+			Topo_to_share = None
+		for k, (nb_of_new_links, nb_of_shifted_nodes, catchment_change) in map_over_topology(function, Topo_to_share, options, snapshot_dirname=snapshot_dirname, nb_of_processes=nb_of_processes, ordered=False):
+			(ASN, ixp_id) = options[k]
+			table.append((ASN, ixp_id, nb_of_new_links, nb_of_shifted_nodes, catchment_change))
+	finally:
+		_base_state.clear()
+		if snapshot_dirname is None:
+			Topo.clear_routing_information()
+
+	order = {ASN_ixp: k for k, ASN_ixp in enumerate(options)}
+	gain = lambda row: row[4].get(row[0], 0)
+	if rank_by == 'shifted_nodes':
+		table.sort(key=lambda row: (-row[3], -gain(row), order[(row[0], row[1])]))
+	else:
+		table.sort(key=lambda row: (-gain(row), -row[3], order[(row[0], row[1])]))
+	return table
+
+
+'''
+Writes a ranking of remote-peering options (see the function "rank_remote_peering_options(...)") to a csv file, with one row per option:
+	ASN, ixp_id, nb_of_new_links, nb_of_shifted_nodes, and the change of the catchment of each anycaster
+'''
+def write_remote_peering_ranking_to_csv(csv_filename, table, anycasters):
+	with open(csv_filename, 'w') as csv_file:
+		csv_writer = csv.writer(csv_file, delimiter=',')
+		csv_writer.writerow(['ASN', 'ixp_id', 'nb_of_new_links', 'nb_of_shifted_nodes'] + ['catchment_change_{}'.format(ASN) for ASN in anycasters])
+		for (ASN, ixp_id, nb_of_new_links, nb_of_shifted_nodes, catchment_change) in table:
+			csv_writer.writerow([ASN, ixp_id, nb_of_new_links, nb_of_shifted_nodes] + [catchment_change.get(site, 0) for site in anycasters])
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Export of the converged routes (per prefix and node) in a columnar format, i.e., a directory with the following files:
+#	meta.json:		the format version, the file format ('npz' or 'parquet'), the prefixes (the position in the list is the index of the prefix), the number of rows, and whether the paths are included
+#	ASNs.npy:		the ASN of each node (the position in the array is the index of the node)
+#	part-00000.npz, part-00001.npz, ...:	(for the 'npz' format) the rows, in chunks; every file has one array per column
+#	routes.parquet:	(for the 'parquet' format; it needs the pyarrow package) the rows, with one row group per chunk (the paths as a list column with 64-bit offsets)
+# There is one row per prefix and node with a route (incl. the origins of the prefix), with the columns:
+#	prefix:			the index of the prefix
+#	node:			the index of the node
+#	next_hop:		the index of the neighbor of the best path (-1 for the origins)
+#	origin:			the index of the origin of the best path, i.e., the anycaster (catchment site), or the hijacker for the paths that contain the hijacker of the prefix
+#	path_length:	the length of the best path (0 for the anycasters)
+#	route_class:	the relation of the next hop, i.e., {-1,0,1} for {customer,peer,provider} (as BGPnode.ASneighbors), and 2 for the origins
+#	path:			(optional) the indices of the ASes of the best path, i.e., as BGPnode.paths; for the 'npz' format, in CSR format (the arrays "path_indptr" and "path")
+# The rows are written in chunks (see the class RoutingStateWriter), so the export of many prefixes (e.g., configurations of anycasters) needs only the memory of a chunk.
+#
+
+import array
+import json
+import os
+import numpy as np
+from gao_rexford_routing import NO_ROUTE, get_routing_arrays, compute_batch_of_anycast_routes
+
+try:
+	import pyarrow
+	import pyarrow.parquet
+except ImportError:
+	pyarrow = None
+
+ROUTING_EXPORT_VERSION = 1
+COLUMNS = ('prefix', 'node', 'next_hop', 'origin', 'path_length', 'route_class')
+COLUMN_TYPES = {'prefix': np.int32, 'node': np.int32, 'next_hop': np.int32, 'origin': np.int32, 'path_length': np.int32, 'route_class': np.int8}
+
+
+'''
+Returns the best paths of the given nodes, reconstructed from the next hops (as in compact_routes.ParentPointerRoutes), in CSR format:
+the path of nodes[k] is values[indptr[k]:indptr[k+1]], i.e., the indices of the next hop, the next hop of the next hop, etc. (the paths are built with one array operation per hop, not per node).
+
+Input arguments:
+	(a) next_hop: numpy array with the index of the next hop of each node (-1 for the origins)
+	(b) path_length: numpy array with the path length of each node
+	(c) nodes: numpy array with the indices of the nodes (with a route)
+'''
+def get_paths_from_next_hops(next_hop, path_length, nodes):
+	lengths = path_length[nodes].astype(np.int64)
+	indptr = np.zeros(len(nodes)+1, dtype=np.int64)
+	np.cumsum(lengths, out=indptr[1:])
+	values = np.empty(int(indptr[-1]), dtype=np.int32)
+	current = nodes
+	positions = indptr[:-1]
+	active = lengths > 0
+	step = 0
+	while active.any():
+		current = current[active]
+		positions = positions[active]
+		lengths = lengths[active]
+		current = next_hop[current]
+		values[positions + step] = current
+		step += 1
+		active = lengths > step
+	return (indptr, values)
+
+
+
+'''
+Writes routes to a directory, in chunks (see the description at the top of the file).
+
+class variables:
+	(a) dirname:		the directory
+	(b) ASNs:			list of the ASNs of the nodes
+	(c) with_paths:		True/False, whether the paths are written
+	(d) format:			'npz' or 'parquet'
+	(e) chunk_size:		the number of rows of a chunk
+	(f) prefixes:		list of the prefixes written so far
+'''
+class RoutingStateWriter:
+	def __init__(self, dirname, ASNs, with_paths=False, format='npz', chunk_size=1000000):
+		if format not in ('npz', 'parquet'):
+			raise Exception('Not valid format: {}'.format(format))
+		if (format == 'parquet') and (pyarrow is None):
+			raise Exception('The parquet format needs the pyarrow package')
+		os.makedirs(dirname, exist_ok=True)
+		self.dirname = dirname
+		self.ASNs = list(ASNs)
+		self.ASN_to_index = {ASN:i for i,ASN in enumerate(self.ASNs)}
+		self.with_paths = with_paths
+		self.format = format
+		self.chunk_size = chunk_size
+		self.prefixes = []
+		self.prefix_to_index = {}
+		self.buffer = []
+		self.nb_buffered_rows = 0
+		self.nb_rows = 0
+		self.nb_parts = 0
+		self.parquet_writer = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+	'''
+	Returns the index of the given prefix (it is added to the prefixes, if it is new).
+	'''
+	def get_prefix_index(self, IPprefix):
+		k = self.prefix_to_index.get(IPprefix)
+		if k is None:
+			k = len(self.prefixes)
+			self.prefixes.append(IPprefix)
+			self.prefix_to_index[IPprefix] = k
+		return k
+
+	'''
+	Adds the routes of the given nodes for the given prefix (numpy arrays with one entry per node, see the columns at the top of the file); the paths are given in CSR format (path_indptr, path) if with_paths==True.
+	The rows are written to the disk when a chunk is full.
+	'''
+	def write_routes(self, IPprefix, node, next_hop, origin, path_length, route_class, path_indptr=None, path=None):
+		if self.with_paths and (path_indptr is None):
+			raise Exception('The paths of the routes are missing')
+		columns = {'prefix': np.full(len(node), self.get_prefix_index(IPprefix), dtype=np.int32), 'node': node, 'next_hop': next_hop, 'origin': origin, 'path_length': path_length, 'route_class': route_class}
+		columns = {name: np.asarray(array, dtype=COLUMN_TYPES[name]) for name, array in columns.items()}
+		if self.with_paths:
+			columns['path_indptr'] = np.asarray(path_indptr, dtype=np.int64)
+			columns['path'] = np.asarray(path, dtype=np.int32)
+		self.buffer.append(columns)
+		self.nb_buffered_rows += len(node)
+		if self.nb_buffered_rows >= self.chunk_size:
+			self.flush()
+
+	'''
+	Writes the buffered rows as a chunk.
+	'''
+	def flush(self):
+		if self.nb_buffered_rows == 0:
+			self.buffer = []
+			return
+		columns = {name: np.concatenate([chunk[name] for chunk in self.buffer]) for name in COLUMNS}
+		if self.with_paths:
+			path_indptr = [np.zeros(1, dtype=np.int64)]
+			offset = 0
+			for chunk in self.buffer:
+				path_indptr.append(chunk['path_indptr'][1:] + offset)
+				offset += int(chunk['path_indptr'][-1])
+			columns['path_indptr'] = np.concatenate(path_indptr)
+			columns['path'] = np.concatenate([chunk['path'] for chunk in self.buffer])
+		self.buffer = []
+		self.nb_rows += self.nb_buffered_rows
+		self.nb_buffered_rows = 0
+
+		if self.format == 'npz':
+			np.savez(os.path.join(self.dirname, 'part-{:05d}.npz'.format(self.nb_parts)), **columns)
+		else:
+			arrays = [pyarrow.array(columns[name]) for name in COLUMNS]
+			names = list(COLUMNS)
+			if self.with_paths:
+				arrays.append(pyarrow.LargeListArray.from_arrays(pyarrow.array(columns['path_indptr']), pyarrow.array(columns['path'])))	# 64-bit offsets, i.e., a chunk can have more than 2^31 ASes in its paths
+				names.append('path')
+			table = pyarrow.Table.from_arrays(arrays, names=names)
+			if self.parquet_writer is None:
+				self.parquet_writer = pyarrow.parquet.ParquetWriter(os.path.join(self.dirname, 'routes.parquet'), table.schema)
+			self.parquet_writer.write_table(table)
+		self.nb_parts += 1
+
+	'''
+	Writes the remaining rows, the ASNs and the meta data.
+	'''
+	def close(self):
+		self.flush()
+		if self.parquet_writer is not None:
+			self.parquet_writer.close()
+			self.parquet_writer = None
+		asn_as_str = any(isinstance(ASN,str) for ASN in self.ASNs)
+		np.save(os.path.join(self.dirname, 'ASNs.npy'), np.array(self.ASNs, dtype=str if asn_as_str else np.int64))
+		meta = {'version': ROUTING_EXPORT_VERSION, 'format': self.format, 'prefixes': self.prefixes, 'nb_rows': self.nb_rows, 'nb_parts': self.nb_parts, 'with_paths': self.with_paths}
+		with open(os.path.join(self.dirname, 'meta.json'), 'w') as jsonfile:
+			json.dump(meta, jsonfile)
+
+
+
+'''
+Writes the routes computed by the routing engine (an AnycastRoutes object, see gao_rexford_routing.py) for the given prefix.
+The routes must be computed for the same nodes (in the same order) as the ASNs of the writer, e.g., for the topology whose "get_CSR_arrays()" gave the ASNs.
+'''
+def write_anycast_routes(writer, routes, IPprefix):
+	nodes = np.flatnonzero(routes.path_length >= 0)
+	if writer.with_paths:
+		if routes.hijack is not None:
+			raise Exception('The paths of the routes of a hijack are not exported')
+		(path_indptr, path) = get_paths_from_next_hops(routes.next_hop, routes.path_length, nodes)
+	else:
+		(path_indptr, path) = (None, None)
+	writer.write_routes(IPprefix, nodes, routes.next_hop[nodes], routes.origin[nodes], routes.path_length[nodes], routes.route_class[nodes], path_indptr, path)
+
+
+'''
+Computes the routes of the given configurations of anycasters with the routing engine (in batches, see the function "compute_batch_of_anycast_routes(...)"), and exports them; the prefix of the k-th configuration is k.
+
+Input arguments:
+	(a) Topo: the topology
+	(b) dirname: the directory to be written
+	(c) list_of_anycasters: list with the list of anycasters (ASNs) of each configuration
+	(d) list_of_forbidden_neighbors: (optional) list with the forbidden neighbors of each configuration (see "compute_batch_of_anycast_routes(...)")
+	(e) with_paths, format, chunk_size: see the class RoutingStateWriter
+	(f) batch_size: the number of configurations whose routes are computed together
+'''
+def export_anycast_configurations(Topo, dirname, list_of_anycasters, list_of_forbidden_neighbors=None, with_paths=False, format='npz', chunk_size=1000000, batch_size=32):
+	routing_arrays = get_routing_arrays(Topo)
+	if list_of_forbidden_neighbors is None:
+		list_of_forbidden_neighbors = [None]*len(list_of_anycasters)
+	with RoutingStateWriter(dirname, routing_arrays.ASNs, with_paths=with_paths, format=format, chunk_size=chunk_size) as writer:
+		for start in range(0, len(list_of_anycasters), batch_size):
+			batch = compute_batch_of_anycast_routes(Topo, list_of_anycasters[start:start+batch_size], list_of_forbidden_neighbors[start:start+batch_size], routing_arrays=routing_arrays)
+			for k in range(batch.get_nb_of_configurations()):
+				write_anycast_routes(writer, batch.get_routes(k), start+k)
+
+
+'''
+Writes the best paths of the nodes of the topology (e.g., after a simulation with BGP messages) for the given prefix.
+The owners and the hijacker of the prefix are written as origins (the path of the hijacker is its hijacked path); the origin of the paths that contain the hijacker is the hijacker.
+
+Input arguments:
+	(a) writer: the RoutingStateWriter (whose ASNs are the ASNs of the topology)
+	(b) Topo: the topology
+	(c) IPprefix: the prefix
+	(d) hijacker_ASN: the hijacker of the prefix (or None), see BGPtopology.get_list_of_hijacked_prefixes_and_hijackers
+'''
+def write_topology_routes(writer, Topo, IPprefix, hijacker_ASN=None):
+	ASN_to_index = writer.ASN_to_index
+	nb_of_nodes = len(writer.ASNs)
+	node_column = np.empty(nb_of_nodes, dtype=np.int32)
+	next_hop_column = np.empty(nb_of_nodes, dtype=np.int32)
+	origin_column = np.empty(nb_of_nodes, dtype=np.int32)
+	path_length_column = np.empty(nb_of_nodes, dtype=np.int32)
+	route_class_column = np.empty(nb_of_nodes, dtype=np.int8)
+	path_values = array.array('i')	# the indices of the ASes of the paths, in a typed buffer (as the numpy column "path")
+	get_index = ASN_to_index.__getitem__
+	k = 0
+	for i, ASN in enumerate(writer.ASNs):
+		node = Topo.peek_node(ASN)
+		if node is None:
+			continue
+		path = node.paths.get(IPprefix)
+		if node.has_prefix(IPprefix) or node.has_hijacked_prefix(IPprefix):
+			path = path or []
+			next_hop_column[k] = -1
+			origin_column[k] = i
+			route_class_column[k] = NO_ROUTE
+		elif path:
+			origin_ASN = hijacker_ASN if (hijacker_ASN is not None) and (hijacker_ASN in path) else path[-1]
+			next_hop_column[k] = ASN_to_index[path[0]]
+			origin_column[k] = ASN_to_index[origin_ASN]
+			route_class_column[k] = node.ASneighbors.get(path[0], NO_ROUTE)
+		else:
+			continue
+		node_column[k] = i
+		path_length_column[k] = len(path)
+		k += 1
+		if writer.with_paths:
+			path_values.extend(map(get_index, path))
+	path_indptr = None
+	if writer.with_paths:
+		path_indptr = np.zeros(k+1, dtype=np.int64)
+		np.cumsum(path_length_column[:k], out=path_indptr[1:])
+	writer.write_routes(IPprefix, node_column[:k], next_hop_column[:k], origin_column[:k], path_length_column[:k], route_class_column[:k], path_indptr, np.frombuffer(path_values, dtype=np.intc) if writer.with_paths else None)
+
+
+
+'''
+Reads the routes written by a RoutingStateWriter.
+
+Input arguments:
+	(a) dirname: the directory
+
+Returns:
+	A tuple (meta, ASNs, chunks), where meta is the dictionary of meta.json, ASNs the numpy array of the ASNs, and chunks a generator of dictionaries with (i) keys the names of the columns and (ii) values numpy arrays (one dictionary per chunk; the paths in CSR format, i.e., "path_indptr" and "path")
+'''
+def read_routing_state(dirname):
+	with open(os.path.join(dirname, 'meta.json'), 'r') as jsonfile:
+		meta = json.load(jsonfile)
+	if meta.get('version') != ROUTING_EXPORT_VERSION:
+		raise Exception('Not supported routing export version: {}'.format(meta.get('version')))
+	ASNs = np.load(os.path.join(dirname, 'ASNs.npy'))
+
+	def read_chunks():
+		if meta['format'] == 'npz':
+			for part in range(meta['nb_parts']):
+				with np.load(os.path.join(dirname, 'part-{:05d}.npz'.format(part))) as data:
+					yield {name: data[name] for name in data.files}
+		else:
+			if pyarrow is None:
+				raise Exception('The parquet format needs the pyarrow package')
+			parquet_file = pyarrow.parquet.ParquetFile(os.path.join(dirname, 'routes.parquet'))
+			for group in range(parquet_file.num_row_groups):
+				table = parquet_file.read_row_group(group)
+				chunk = {name: table.column(name).to_numpy() for name in COLUMNS}
+				if meta['with_paths']:
+					paths = table.column('path').combine_chunks()
+					offsets = paths.offsets.to_numpy().astype(np.int64)
+					chunk['path_indptr'] = offsets - offsets[0]
+					chunk['path'] = paths.flatten().to_numpy()
+				yield chunk
+
+	return (meta, ASNs, read_chunks())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Statistics of the routing state of a topology (e.g., the number of nodes with a path, or with a hijacked path, per prefix), computed from a single scan of the best paths of all the nodes (see BGPtopology.get_routing_statistics).
+# The scan keeps one record per (prefix, node with a path), i.e., numpy arrays with the prefix, the node, the path length, the origin and whether the path is hijacked;
+# then every statistic (for all the prefixes together, and optionally only for a subset of the nodes given as a mask) is an array operation over the records.
+#
+
+import numpy as np
+
+
+'''
+Statistics of the best paths of the nodes of a topology for a set of prefixes.
+
+class variables:
+	(a) ASNs:				list of the ASNs of the nodes (the position in the list is the index of the node)
+	(b) ASN_to_index:		dictionary with (i) keys the ASNs and (ii) values the indices of the nodes
+	(c) prefixes:			list of the prefixes (the position in the list is the index of the prefix)
+	(d) hijackers:			dictionary with (i) keys the hijacked prefixes and (ii) values the hijacker ASN (as BGPtopology.get_list_of_hijacked_prefixes_and_hijackers)
+	(e) prefix, node, path_length, origin, hijacked:	numpy arrays with one entry per node with a (not empty) path for a prefix: the index of the prefix, the index of the node, the length of the path,
+			the index of the origin (i.e., the last AS in the path; -1 if it is not a node of the topology), and True if the path contains the hijacker of the prefix
+'''
+class RoutingStatistics:
+	def __init__(self, ASNs, prefixes, hijackers, prefix, node, path_length, origin, hijacked):
+		self.ASNs = ASNs
+		self.ASN_to_index = {ASN:i for i,ASN in enumerate(ASNs)}
+		self.prefixes = prefixes
+		self.prefix_to_index = {IPprefix:k for k,IPprefix in enumerate(prefixes)}
+		self.hijackers = hijackers
+		self.prefix = np.asarray(prefix, dtype=np.int32)
+		self.node = np.asarray(node, dtype=np.int32)
+		self.path_length = np.asarray(path_length, dtype=np.int32)
+		self.origin = np.asarray(origin, dtype=np.int32)
+		self.hijacked = np.asarray(hijacked, dtype=bool)
+
+	'''
+	Returns a numpy array (bool) with True for the nodes in the given list (the ASNs that are not in the topology are ignored); it can be computed once and given as "mask" to all the methods.
+	'''
+	def get_nodes_mask(self, list_of_nodes):
+		mask = np.zeros(len(self.ASNs), dtype=bool)
+		mask[[self.ASN_to_index[ASN] for ASN in list_of_nodes if ASN in self.ASN_to_index]] = True
+		return mask
+
+	'''
+	Returns a numpy array (bool) with True for the records of the given prefix (or of all prefixes, if IPprefix is None) and of the nodes in the mask (or of all nodes, if mask is None).
+	'''
+	def select(self, IPprefix=None, mask=None):
+		selected = np.ones(len(self.prefix), dtype=bool)
+		if IPprefix is not None:
+			k = self.prefix_to_index.get(IPprefix)
+			selected &= (self.prefix == (k if k is not None else -1))
+		if mask is not None:
+			selected &= mask[self.node]
+		return selected
+
+	'''
+	Returns a dictionary with (i) keys the prefixes and (ii) values the number of elements of the selected records per prefix.
+	'''
+	def count_per_prefix(self, selected):
+		counts = np.bincount(self.prefix[selected], minlength=len(self.prefixes)).tolist()
+		return dict(zip(self.prefixes, counts))
+
+	'''
+	Returns a dictionary with (i) keys the prefixes and (ii) values the number of nodes (in the mask) with a path, and (IF origin_ASN is given) whose path is originated by the given ASN (as BGPtopology.get_nb_of_nodes_with_path_to_prefix).
+	'''
+	def get_nb_of_nodes_with_path(self, origin_ASN=None, mask=None):
+		selected = self.select(mask=mask)
+		if origin_ASN:
+			selected &= (self.origin == self.ASN_to_index.get(origin_ASN, -2))
+		return self.count_per_prefix(selected)
+
+	'''
+	Returns a dictionary with (i) keys the prefixes and (ii) values the number of nodes (in the mask) whose path contains the hijacker of the prefix (0 for prefixes that are not hijacked); as BGPtopology.get_nb_of_nodes_with_hijacked_path_to_prefix.
+	'''
+	def get_nb_of_hijacked_nodes(self, mask=None):
+		return self.count_per_prefix(self.select(mask=mask) & self.hijacked)
+
+	'''
+	Returns a dictionary with (i) keys the origin ASNs and (ii) values the number of nodes (in the mask) whose path for the given prefix is originated by the ASN.
+	'''
+	def get_origin_counts(self, IPprefix, mask=None):
+		origins = self.origin[self.select(IPprefix, mask)]
+		counts = np.bincount(origins[origins >= 0], minlength=len(self.ASNs))
+		return {self.ASNs[i]: int(counts[i]) for i in np.flatnonzero(counts).tolist()}
+
+	'''
+	Returns a dictionary with (i) keys the prefixes and (ii) values the average path length of the nodes (in the mask) with a path (0 for prefixes without paths); as BGPtopology.get_average_path_length.
+	'''
+	def get_average_path_length(self, mask=None):
+		selected = self.select(mask=mask)
+		counts = np.bincount(self.prefix[selected], minlength=len(self.prefixes))
+		sums = np.bincount(self.prefix[selected], weights=self.path_length[selected], minlength=len(self.prefixes))
+		averages = np.divide(sums, counts, out=np.zeros(len(self.prefixes)), where=counts > 0).tolist()
+		return dict(zip(self.prefixes, averages))
+
+	'''
+	Returns a numpy array with (at position L) the number of nodes (in the mask) whose path for the given prefix has length L.
+	'''
+	def get_path_length_histogram(self, IPprefix, mask=None):
+		return np.bincount(self.path_length[self.select(IPprefix, mask)])
+
+	'''
+	Returns the set of the nodes (in the mask) with a path for the given prefix, and (IF origin_ASN is given) whose path is originated by the given ASN; as BGPtopology.get_set_of_nodes_with_path_to_prefix.
+	'''
+	def get_set_of_nodes_with_path(self, IPprefix, origin_ASN=None, mask=None):
+		selected = self.select(IPprefix, mask)
+		if origin_ASN:
+			selected &= (self.origin == self.ASN_to_index.get(origin_ASN, -2))
+		return {self.ASNs[i] for i in self.node[selected].tolist()}
+
+	'''
+	Returns the set of the nodes (in the mask) whose path for the given prefix contains the hijacker of the prefix.
+	'''
+	def get_set_of_hijacked_nodes(self, IPprefix, mask=None):
+		return {self.ASNs[i] for i in self.node[self.select(IPprefix, mask) & self.hijacked].tolist()}
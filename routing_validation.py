@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Differential validation of the routing engines against the reference simulator, i.e., the BGP messages among the BGPnodes ("add_prefix(...)" of every anycaster).
+# For many seeded random topologies (see synthetic_topology.py) and anycast sets, every engine computes the routes of the prefix, and they are compared with the reference:
+#	(i) the best path ("paths") of every node,
+#	(ii) the received routes ("all_paths") of every node,
+#	(iii) the edges of the Rgraph (incl. the local preference of the best-path edges; see create_Rgraph_from_Topo), and
+#	(iv) the colors of the probabilistic coloring of the Rgraph (see Rgraph.set_probabilistic_coloring).
+# The mismatches (with a few examples) and the speedup of every engine over the reference are reported.
+# An engine is a function (Topo, anycasters, IPprefix) that computes the routes of the prefix for the given anycasters, and returns the topology (the given one, or e.g. a fork of it) with the routes in its nodes; see ENGINES.
+#
+
+import argparse
+import random
+import sys
+import time
+from collections import defaultdict
+from BGPtopology import BGPtopology
+from create_Rgraph_from_Topo import create_Rgraph_from_Topo
+from gao_rexford_routing import compute_anycast_routes
+from synthetic_topology import generate_AS_relationships
+
+PREFIX = 'validation'	# the prefix announced by the anycasters
+COLOR_TOLERANCE = 1e-9	# the maximum difference of the probabilities of two equal colors
+
+
+### engines ###
+
+def route_with_gao_rexford(Topo, anycasters, IPprefix):
+	compute_anycast_routes(Topo, anycasters).write_routes_to_Topo(Topo, IPprefix, full_RIB=True)
+	return Topo
+
+def route_with_gao_rexford_compact(Topo, anycasters, IPprefix):
+	compute_anycast_routes(Topo, anycasters).write_routes_to_Topo(Topo, IPprefix, full_RIB=True, compact=True)
+	return Topo
+
+def route_with_dfs_messages(Topo, anycasters, IPprefix):
+	mode = Topo.propagation_mode
+	Topo.set_propagation_mode('dfs')
+	try:
+		for ASN in anycasters:
+			Topo.add_prefix(ASN, IPprefix)
+	finally:
+		Topo.set_propagation_mode(mode)
+	return Topo
+
+def route_with_CSRtopology(Topo, anycasters, IPprefix):
+	Fork = Topo.fork()	# a CSRtopology with the same links and preferences
+	Fork.set_propagation_mode('dfs')
+	for ASN in anycasters:
+		Fork.add_prefix(ASN, IPprefix)
+	return Fork
+
+ENGINES = {
+	'gao_rexford': route_with_gao_rexford,
+	'gao_rexford_compact': route_with_gao_rexford_compact,
+	'dfs': route_with_dfs_messages,
+	'csr': route_with_CSRtopology,
+}
+
+
+
+'''
+Returns the routing state of the prefix in the given topology, i.e., a tuple (paths, all_paths) of dictionaries with (i) keys the ASNs and (ii) values the best path (as a list), and the received routes (as a dictionary {neighbor: path}), of the nodes with a path or received routes.
+The received routes of the nodes that own the prefix (i.e., the anycasters) are not included: with BGP messages, an anycaster keeps the routes that it received before it announced the prefix (i.e., they depend on the order of the anycasters), but it never uses them.
+'''
+def get_routing_state(Topo, IPprefix):
+	paths = {}
+	all_paths = {}
+	for ASN in Topo.get_all_nodes_ASNs():
+		node = Topo.peek_node(ASN)
+		path = node.paths.get(IPprefix)
+		if path:
+			paths[ASN] = list(path)
+		received = node.all_paths.get(IPprefix)
+		if received and (not node.has_prefix(IPprefix)):
+			all_paths[ASN] = {neighbor: list(received_path) for neighbor, received_path in received.items()}
+	return (paths, all_paths)
+
+
+'''
+Returns the Rgraph state of the prefix in the given topology, i.e., a tuple (edges, colors), where
+	edges:	dictionary with (i) keys the edges (ASN1, ASN2) of the Rgraph and (ii) values their local preference (None for the edges of alternate routes)
+	colors:	dictionary with (i) keys the ASNs and (ii) values their color (dictionary {anycaster: probability}) after the probabilistic coloring
+'''
+def get_Rgraph_state(Topo, IPprefix, anycasters, shortest_path_preference=True):
+	G = create_Rgraph_from_Topo(Topo, IPprefix, shortest_path_preference=shortest_path_preference)
+	edges = {(ASN1, ASN2): local_preference for ASN1, ASN2, local_preference in G.get_list_of_edges()}
+	G.set_probabilistic_coloring(anycasters)
+	colors = {ASN: dict(color) for ASN, color in G.colors.items() if color}
+	return (edges, colors)
+
+
+'''
+Returns True if the two colors (dictionaries {anycaster: probability}) are equal, up to COLOR_TOLERANCE.
+'''
+def equal_colors(color1, color2):
+	if (color1 is None) or (color2 is None):
+		return color1 is color2
+	return all(abs(color1.get(ASN, 0) - color2.get(ASN, 0)) <= COLOR_TOLERANCE for ASN in set(color1).union(color2))
+
+
+'''
+Compares the values of two dictionaries (see the function "compare_states(...)").
+
+Returns:
+	A list of tuples (key, reference_value, engine_value) for the keys with different values (a missing key has the value None)
+'''
+def compare_dicts(reference, engine, equal=None):
+	mismatches = []
+	for key in set(reference).union(engine):
+		(a, b) = (reference.get(key), engine.get(key))
+		if not (equal(a, b) if equal is not None else a == b):
+			mismatches.append((key, a, b))
+	return mismatches
+
+
+'''
+Compares the states (see the functions "get_routing_state(...)" and "get_Rgraph_state(...)") of the reference and of an engine.
+
+Returns:
+	A dictionary with (i) keys 'paths', 'all_paths', 'Rgraph_edges', 'colors' and (ii) values the list of mismatches (see the function "compare_dicts(...)")
+'''
+def compare_states(reference_state, engine_state):
+	(paths, all_paths, edges, colors) = reference_state
+	(engine_paths, engine_all_paths, engine_edges, engine_colors) = engine_state
+	return {
+		'paths': compare_dicts(paths, engine_paths),
+		'all_paths': compare_dicts(all_paths, engine_all_paths),
+		'Rgraph_edges': compare_dicts(edges, engine_edges, equal=lambda a, b: (a == b) or ((a is not None) and (b is not None) and abs(a - b) <= COLOR_TOLERANCE)),
+		'colors': compare_dicts(colors, engine_colors, equal=equal_colors),
+	}
+
+
+
+'''
+Results of a differential validation (see the function "validate_routing_engines(...)").
+
+class variables:
+	(a) cases:	list of dictionaries, one per (topology, anycast set, engine), with the keys
+				'topology_seed', 'nb_of_ASes', 'anycasters', 'engine',
+				'reference_time', 'engine_time' (in seconds, for the routes only; not for the Rgraph),
+				'mismatches' (dictionary with the number of mismatches of 'paths', 'all_paths', 'Rgraph_edges', 'colors'),
+				'examples' (list of tuples (kind, key, reference_value, engine_value), for the first mismatches), and
+				'error' (only if the engine, or the Rgraph of the engine, raised an exception)
+'''
+class ValidationReport:
+	def __init__(self):
+		self.cases = []
+
+	'''
+	Returns True if no case has a mismatch or an error.
+	'''
+	def is_valid(self):
+		return all((not case.get('error')) and (not any(case['mismatches'].values())) for case in self.cases)
+
+	'''
+	Returns a dictionary with (i) keys the engines and (ii) values a dictionary with the number of cases, of cases with mismatches (or errors), the total number of mismatches per kind, and the speedup (i.e., total time of the reference over total time of the engine).
+	'''
+	def get_summary(self):
+		summary = {}
+		for case in self.cases:
+			s = summary.setdefault(case['engine'], {'nb_of_cases': 0, 'nb_of_failed_cases': 0, 'mismatches': defaultdict(int), 'reference_time': 0.0, 'engine_time': 0.0})
+			s['nb_of_cases'] += 1
+			if case.get('error') or any(case['mismatches'].values()):
+				s['nb_of_failed_cases'] += 1
+			for kind, nb in case['mismatches'].items():
+				s['mismatches'][kind] += nb
+			s['reference_time'] += case['reference_time']
+			s['engine_time'] += case['engine_time'] or 0.0
+		for s in summary.values():
+			s['mismatches'] = dict(s['mismatches'])
+			s['speedup'] = s['reference_time'] / s['engine_time'] if s['engine_time'] > 0 else None
+		return summary
+
+	def to_dict(self):
+		return {'valid': self.is_valid(), 'summary': self.get_summary(), 'cases': self.cases}
+
+	def print_info(self):
+		for engine, s in self.get_summary().items():
+			speedup = 'x{:.1f}'.format(s['speedup']) if s['speedup'] is not None else '-'
+			print('{:<22} cases: {:>4}   failed: {:>4}   mismatches: {}   speedup: {}'.format(engine, s['nb_of_cases'], s['nb_of_failed_cases'], s['mismatches'], speedup))
+		for case in self.cases:
+			if case.get('error') or any(case['mismatches'].values()):
+				print('MISMATCH engine={} topology_seed={} nb_of_ASes={} anycasters={}: {} {}'.format(case['engine'], case['topology_seed'], case['nb_of_ASes'], case['anycasters'], case['mismatches'], case.get('error', '')))
+				for example in case['examples']:
+					print('\t{}'.format(example))
+
+	def __repr__(self):
+		return 'ValidationReport(cases={}, valid={})'.format(len(self.cases), self.is_valid())
+
+
+
+'''
+Builds a random topology with the given number of ASes (see synthetic_topology.py); the topology and the preferences of the links are drawn with the given seed.
+'''
+def create_random_topology(nb_of_ASes, seed):
+	links = generate_AS_relationships(nb_of_ASes, seed=seed)
+	random.seed(seed)
+	Topo = BGPtopology()
+	for (ASN1, ASN2, peering_type) in links:
+		Topo.add_link(ASN1, ASN2, peering_type)
+	return Topo
+
+
+
+'''
+Validates the given routing engines against the reference simulator, over random topologies and anycast sets.
+
+For each size and each of the nb_of_topologies seeds, a random topology is built (see the function "create_random_topology(...)"), and for each of the nb_of_anycast_sets anycast sets (drawn with the seed):
+	(i) the anycasters announce the prefix with BGP messages (in the given propagation mode), and the reference state (paths, all_paths, Rgraph edges and colors) is kept,
+	(ii) for each engine, the routing information is cleared, the engine computes the routes, and its state is compared with the reference state.
+
+Input arguments:
+	(a) engines: list of the names of the engines (see ENGINES) or dictionary with (i) keys names and (ii) values engine functions (see the description at the top of the file)
+	(b) sizes: list of the numbers of ASes of the topologies
+	(c) nb_of_topologies: the number of topologies (seeds first_seed, first_seed+1, ...) per size
+	(d) nb_of_anycast_sets: the number of anycast sets per topology
+	(e) nb_of_anycasters: tuple (min, max) of the number of anycasters of a set
+	(f) first_seed: the seed of the first topology
+	(g) reference_mode: the propagation mode of the reference (see BGPtopology.set_propagation_mode); 'recursive' (the default mode of the BGPtopology) may need a larger recursion limit for large topologies, 'dfs' delivers the same messages without recursion
+	(h) shortest_path_preference: as in "create_Rgraph_from_Topo(...)"
+	(i) max_examples: the number of mismatches kept as examples per case
+	(j) verbose: IF True, print a line per topology
+
+Returns:
+	A ValidationReport
+'''
+def validate_routing_engines(engines=('gao_rexford', 'gao_rexford_compact', 'csr'), sizes=(300,), nb_of_topologies=10, nb_of_anycast_sets=5, nb_of_anycasters=(2, 4), first_seed=0, reference_mode='recursive', shortest_path_preference=True, max_examples=5, verbose=False):
+	if not isinstance(engines, dict):
+		for name in engines:
+			if name not in ENGINES:
+				raise Exception('Not valid engine: {}'.format(name))
+		engines = {name: ENGINES[name] for name in engines}
+	report = ValidationReport()
+	for nb_of_ASes in sizes:
+		for seed in range(first_seed, first_seed + nb_of_topologies):
+			Topo = create_random_topology(nb_of_ASes, seed)
+			Topo.set_propagation_mode(reference_mode)
+			rnd = random.Random(seed)
+			ASNs = sorted(Topo.get_all_nodes_ASNs())
+			for _ in range(nb_of_anycast_sets):
+				anycasters = rnd.sample(ASNs, rnd.randint(*nb_of_anycasters))
+				Topo.clear_routing_information()
+				start = time.perf_counter()
+				for ASN in anycasters:
+					Topo.add_prefix(ASN, PREFIX)
+				reference_time = time.perf_counter() - start
+				reference_state = get_routing_state(Topo, PREFIX) + get_Rgraph_state(Topo, PREFIX, anycasters, shortest_path_preference)
+				for name, engine in engines.items():
+					Topo.clear_routing_information()
+					case = {'topology_seed': seed, 'nb_of_ASes': nb_of_ASes, 'anycasters': anycasters, 'engine': name, 'reference_time': reference_time, 'engine_time': None,
+						'mismatches': dict.fromkeys(('paths', 'all_paths', 'Rgraph_edges', 'colors'), 0), 'examples': []}
+					try:
+						start = time.perf_counter()
+						Routed = engine(Topo, anycasters, PREFIX)
+						case['engine_time'] = time.perf_counter() - start
+						engine_state = get_routing_state(Routed, PREFIX) + get_Rgraph_state(Routed, PREFIX, anycasters, shortest_path_preference)
+					except Exception as e:
+						case['error'] = '{}: {}'.format(type(e).__name__, e)
+					else:
+						for kind, mismatches in compare_states(reference_state, engine_state).items():
+							case['mismatches'][kind] = len(mismatches)
+							for (key, a, b) in mismatches[:max(0, max_examples - len(case['examples']))]:
+								case['examples'].append((kind, key, a, b))
+					report.cases.append(case)
+			Topo.clear_routing_information()
+			if verbose:
+				print('topology seed={} nb_of_ASes={}: {}'.format(seed, nb_of_ASes, report))
+				sys.stdout.flush()
+	return report
+
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Differential validation of the routing engines against the BGP messages of the BGPnodes.')
+	parser.add_argument('--engines', nargs='+', default=['gao_rexford', 'gao_rexford_compact', 'csr'], choices=sorted(ENGINES))
+	parser.add_argument('--sizes', type=int, nargs='+', default=[300])
+	parser.add_argument('--topologies', type=int, default=10, help='number of topologies per size')
+	parser.add_argument('--anycast-sets', type=int, default=5, help='number of anycast sets per topology')
+	parser.add_argument('--anycasters', type=int, nargs=2, default=[2, 4], metavar=('MIN', 'MAX'))
+	parser.add_argument('--seed', type=int, default=0, help='seed of the first topology')
+	parser.add_argument('--reference-mode', default='recursive', choices=['recursive', 'dfs'])
+	args = parser.parse_args(argv)
+	sys.setrecursionlimit(max(sys.getrecursionlimit(), 100000))	# for the 'recursive' mode of the reference
+	report = validate_routing_engines(args.engines, sizes=args.sizes, nb_of_topologies=args.topologies, nb_of_anycast_sets=args.anycast_sets, nb_of_anycasters=tuple(args.anycasters),
+		first_seed=args.seed, reference_mode=args.reference_mode, verbose=True)
+	report.print_info()
+	return 0 if report.is_valid() else 1
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Persistent (on-disk) cache of the results of anycast simulations, shared by studies and by worker processes.
+# An entry is keyed by a hash of the contents of the topology (the links, their relations and the preferences of the nodes; see "get_topology_hash(...)") and of the configuration,
+# i.e., the anycasters, their forbidden neighbors and the shortest_path_preference of the Rgraph; it keeps
+#	(i) the catchment (the anycaster that each node routes to),
+#	(ii) the Rgraph (see create_Rgraph_from_Topo), and
+#	(iii) the probabilistic coloring of the Rgraph (see Rgraph.set_probabilistic_coloring), if it has been computed.
+# Every entry is a file, written to a temporary file and then renamed, so the processes that read it see either the whole entry or no entry; the same entry may be written by many processes (with the same contents).
+# The total size of the entries is bounded: it is kept in a file of the cache directory, which is updated (while holding a lock, where fcntl is available) when an entry is written or deleted;
+# when it exceeds the limit, the least recently used entries (i.e., with the oldest modification time, which is updated when an entry is read) are deleted, until the total size is a fraction of the limit, so that the directory is scanned only once in a while.
+#
+
+import hashlib
+import json
+import os
+import pickle
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+import numpy as np
+from Rgraph import Rgraph
+from create_Rgraph_from_Topo import create_Rgraph_from_Topo, create_Rgraph_from_edges
+from gao_rexford_routing import compute_anycast_routes
+try:
+	import fcntl
+except ImportError:	# e.g., on Windows; the entries are still written atomically, but many processes may delete entries at the same time
+	fcntl = None
+
+CACHE_VERSION = 1	# part of every key; it changes when the contents of the entries change
+PREFIX = 'cached'	# the prefix announced by the anycasters (for the simulations with BGP messages)
+ENTRY_SUFFIX = '.pkl'
+LOCK_FILENAME = '.lock'
+SIZE_FILENAME = '.size'	# the total size (in bytes) of the entries
+EVICTION_RATIO = 0.9	# the entries are deleted until their total size is at most EVICTION_RATIO*max_bytes
+
+
+'''
+Returns the hash (hex string) of the contents of the topology, i.e., of its CSR arrays (see BGPtopology.get_CSR_arrays): the ASNs, the links (in the order they were added to each node), their relations and the preferences of the nodes.
+Two topologies with the same hash have the same routes for every configuration (e.g., a topology and a snapshot of it).
+Computing the hash costs a scan of the links, so it is kept in the topology (in "topology_hash_cache"), and it is computed again only after nodes or links are added or removed (see BGPtopology.links_version).
+'''
+def get_topology_hash(Topo):
+	links_version = getattr(Topo, 'links_version', None)
+	cached = getattr(Topo, 'topology_hash_cache', None)
+	if (cached is not None) and (links_version is not None) and (cached[0] == links_version):
+		return cached[1]
+	(ASNs, indptr, indices, relations, preferences) = Topo.get_CSR_arrays()
+	h = hashlib.sha256()
+	h.update(json.dumps(list(ASNs)).encode())
+	for (array, dtype) in ((indptr, np.int64), (indices, np.int32), (relations, np.int8), (preferences, np.float64)):
+		h.update(np.ascontiguousarray(array, dtype=dtype).tobytes())
+	topology_hash = h.hexdigest()
+	if links_version is not None:
+		Topo.topology_hash_cache = (links_version, topology_hash)
+	return topology_hash
+
+
+'''
+Returns the key (hex string) of a configuration over the topology with the given hash; the anycasters are a set (i.e., their order does not change the key), as well as the forbidden neighbors of each anycaster.
+'''
+def get_configuration_key(topology_hash, anycasters, forbidden_neighbors=None, shortest_path_preference=False):
+	forbidden = sorted((repr(ASN), sorted(repr(neighbor) for neighbor in neighbors)) for ASN, neighbors in (forbidden_neighbors or {}).items() if neighbors)
+	configuration = [CACHE_VERSION, topology_hash, sorted(repr(ASN) for ASN in anycasters), forbidden, bool(shortest_path_preference)]
+	return hashlib.sha256(json.dumps(configuration).encode()).hexdigest()
+
+
+'''
+Returns the catchment of the prefix in the given (routed) topology, i.e., a dictionary with (i) keys the ASNs of the nodes with a route (and the anycasters) and (ii) values the anycaster that they route to.
+'''
+def get_catchment_from_Topo(Topo, IPprefix):
+	catchment = {}
+	for ASN in Topo.get_all_nodes_ASNs():
+		node = Topo.peek_node(ASN)
+		if node.has_prefix(IPprefix):
+			catchment[ASN] = ASN
+		else:
+			path = node.get_path(IPprefix)
+			if path:
+				catchment[ASN] = path[-1]
+	return catchment
+
+
+'''
+Returns the catchment (as the function "get_catchment_from_Topo(...)") of the given AnycastRoutes (see gao_rexford_routing.py).
+'''
+def get_catchment_from_routes(routes):
+	ASNs = routes.routing_arrays.ASNs
+	return {ASNs[i]: ASNs[o] for i, o in enumerate(routes.origin.tolist()) if o >= 0}
+
+
+'''
+Returns the structure of the given Rgraph, i.e., a tuple (nodes, edges) with the list of its nodes and the list of its edges (ASN1, ASN2, local_preference);
+the edges into each node are listed in the order of its predecessors, so the Rgraph created from them (see the function "create_Rgraph_from_structure(...)") has the same coloring.
+'''
+def get_Rgraph_structure(G):
+	return (list(G.get_list_of_nodes()), G.get_list_of_edges())
+
+
+'''
+Creates an Rgraph (of the given class, i.e., Rgraph or CSRRgraph) from its structure (see the function "get_Rgraph_structure(...)"), and sets its colors (if given).
+'''
+def create_Rgraph_from_structure(nodes, edges, colors=None, Rgraph_class=Rgraph):
+	G = Rgraph_class()
+	for ASN in nodes:
+		G.add_node(ASN)
+	G.add_edges(edges)
+	if colors is not None:
+		G.colors = defaultdict(dict, {ASN: dict(color) for ASN, color in colors.items()})
+	return G
+
+
+
+'''
+Cache of simulation results in a directory (see the description at the top of the file).
+
+class variables:
+	(a) dirname:	the directory of the cache (it is created if it does not exist)
+	(b) max_bytes:	the maximum total size (in bytes) of the entries; None for no limit
+	(c) nb_of_hits, nb_of_misses:	the number of lookups (by this object) that found / did not find an entry
+'''
+class SimulationCache:
+	def __init__(self, dirname, max_bytes=2**30):
+		self.dirname = dirname
+		self.max_bytes = max_bytes
+		self.nb_of_hits = 0
+		self.nb_of_misses = 0
+		os.makedirs(dirname, exist_ok=True)
+
+	def get_entry_filename(self, key):
+		return os.path.join(self.dirname, key[:2], key + ENTRY_SUFFIX)
+
+	'''
+	Returns the entry (dictionary) of the given key, or None if there is no entry (or it cannot be read); the entry is marked as recently used.
+	'''
+	def get(self, key):
+		filename = self.get_entry_filename(key)
+		try:
+			with open(filename, 'rb') as f:
+				entry = pickle.load(f)
+		except FileNotFoundError:
+			self.nb_of_misses += 1
+			return None
+		except (OSError, EOFError, pickle.UnpicklingError):	# a corrupted entry (e.g., written by an older version) is deleted
+			with self.locked():
+				self.update_size(-self.remove(filename))
+			self.nb_of_misses += 1
+			return None
+		try:
+			os.utime(filename)
+		except OSError:	# e.g., deleted by another process in the meantime
+			pass
+		self.nb_of_hits += 1
+		return entry
+
+	'''
+	Writes the entry (dictionary) of the given key, and updates the total size of the entries; IF it is larger than max_bytes, THEN the least recently used entries are deleted (see the method "evict(...)").
+	'''
+	def put(self, key, entry):
+		filename = self.get_entry_filename(key)
+		os.makedirs(os.path.dirname(filename), exist_ok=True)
+		tmp_filename = '{}.{}.tmp'.format(filename, uuid.uuid4().hex)
+		try:
+			with open(tmp_filename, 'wb') as f:
+				pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+			size = os.path.getsize(tmp_filename)
+			with self.locked():
+				old_size = self.get_file_size(filename)
+				os.replace(tmp_filename, filename)
+				total = self.update_size(size - old_size)
+				if (self.max_bytes is not None) and (total > self.max_bytes):
+					self.evict(locked=True)
+		finally:
+			self.remove(tmp_filename)
+
+	'''
+	Deletes the given file (if it exists), and returns its size (0 if it does not exist).
+	'''
+	def remove(self, filename):
+		size = self.get_file_size(filename)
+		try:
+			os.remove(filename)
+		except FileNotFoundError:
+			return 0
+		return size
+
+	def get_file_size(self, filename):
+		try:
+			return os.path.getsize(filename)
+		except FileNotFoundError:
+			return 0
+
+	'''
+	Context manager that holds the lock of the cache directory (where fcntl is available), i.e., only one process at a time changes the total size of the entries or deletes entries.
+	'''
+	@contextmanager
+	def locked(self):
+		with open(os.path.join(self.dirname, LOCK_FILENAME), 'a') as lock_file:
+			if fcntl is not None:
+				fcntl.flock(lock_file, fcntl.LOCK_EX)
+			try:
+				yield
+			finally:
+				if fcntl is not None:
+					fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+	'''
+	Returns a list of tuples (modification time, size, filename) of all the entries.
+	'''
+	def get_entries(self):
+		entries = []
+		for subdir in os.scandir(self.dirname):
+			if not subdir.is_dir():
+				continue
+			for f in os.scandir(subdir.path):
+				if f.name.endswith(ENTRY_SUFFIX):
+					try:
+						stat = f.stat()
+					except FileNotFoundError:
+						continue
+					entries.append((stat.st_mtime, stat.st_size, f.path))
+		return entries
+
+	'''
+	Returns the total size (in bytes) of the entries, as kept in the cache directory; IF it has not been kept (e.g., a new cache), THEN the entries are scanned.
+	'''
+	def get_size(self):
+		try:
+			with open(os.path.join(self.dirname, SIZE_FILENAME)) as f:
+				return int(f.read())
+		except (OSError, ValueError):
+			return sum(size for (_, size, _) in self.get_entries())
+
+	def set_size(self, total):
+		tmp_filename = os.path.join(self.dirname, '{}.{}.tmp'.format(SIZE_FILENAME, uuid.uuid4().hex))
+		with open(tmp_filename, 'w') as f:
+			f.write(str(total))
+		os.replace(tmp_filename, os.path.join(self.dirname, SIZE_FILENAME))
+
+	'''
+	Adds the given number of bytes to the total size of the entries (it must be called while holding the lock; see the method "locked()"), and returns the new total size.
+	IF the total size has not been kept, THEN the entries are scanned (i.e., the given change is already counted).
+	'''
+	def update_size(self, delta):
+		try:
+			with open(os.path.join(self.dirname, SIZE_FILENAME)) as f:
+				total = max(int(f.read()) + delta, 0)
+		except (OSError, ValueError):
+			total = sum(size for (_, size, _) in self.get_entries())
+		self.set_size(total)
+		return total
+
+	'''
+	Deletes the least recently used entries, until the total size of the entries is at most EVICTION_RATIO*max_bytes, and keeps the (exact) total size of the remaining entries.
+	IF locked==True, THEN the caller holds the lock (see the method "locked()").
+	'''
+	def evict(self, locked=False):
+		if not locked:
+			with self.locked():
+				return self.evict(locked=True)
+		entries = sorted(self.get_entries())
+		total = sum(size for (_, size, _) in entries)
+		if self.max_bytes is not None:
+			for (_, size, filename) in entries:
+				if total <= EVICTION_RATIO*self.max_bytes:
+					break
+				self.remove(filename)
+				total -= size
+		self.set_size(total)
+
+	'''
+	Deletes all the entries.
+	'''
+	def clear(self):
+		with self.locked():
+			for (_, _, filename) in self.get_entries():
+				self.remove(filename)
+			self.set_size(0)
+
+
+	### entries of anycast configurations ###
+
+	'''
+	Returns the entry of the given configuration over the given topology (see the function "get_configuration_key(...)"), or None; the hash of the topology is computed if it is not given.
+	The entry is a dictionary with the keys 'anycasters', 'catchment' (see the function "get_catchment_from_Topo(...)"), 'nodes' and 'edges' (the structure of the Rgraph; see the function "get_Rgraph_structure(...)"), and 'colors' (the probabilistic coloring of the Rgraph, or None).
+	'''
+	def get_configuration(self, Topo, anycasters, forbidden_neighbors=None, shortest_path_preference=False, topology_hash=None):
+		if topology_hash is None:
+			topology_hash = get_topology_hash(Topo)
+		return self.get(get_configuration_key(topology_hash, anycasters, forbidden_neighbors, shortest_path_preference))
+
+	'''
+	Writes the entry of the given configuration (see the method "get_configuration(...)"), with the given catchment, Rgraph (its structure, and its coloring IF colored==True).
+	'''
+	def put_configuration(self, Topo, anycasters, forbidden_neighbors, shortest_path_preference, catchment, G, colored=False, topology_hash=None):
+		if topology_hash is None:
+			topology_hash = get_topology_hash(Topo)
+		(nodes, edges) = get_Rgraph_structure(G)
+		colors = {ASN: dict(color) for ASN, color in G.colors.items() if color} if colored else None
+		entry = {'anycasters': list(anycasters), 'catchment': catchment, 'nodes': nodes, 'edges': edges, 'colors': colors}
+		self.put(get_configuration_key(topology_hash, anycasters, forbidden_neighbors, shortest_path_preference), entry)
+
+	def __repr__(self):
+		return 'SimulationCache(dirname={}, max_bytes={}, hits={}, misses={})'.format(self.dirname, self.max_bytes, self.nb_of_hits, self.nb_of_misses)
+
+
+
+'''
+Returns the probabilistically colored Rgraph (see Rgraph.set_probabilistic_coloring) and the catchment of the prefix announced by the given anycasters, from the cache if the configuration has been computed before;
+otherwise the routes are computed, and the results are written to the cache.
+
+Input arguments:
+	(a) Topo: the topology (BGPtopology or CSRtopology), without routing information for the prefix
+	(b) anycasters: list of the ASNs of the anycasters
+	(c) forbidden_neighbors: (optional) dictionary with (i) keys anycasters and (ii) values the list of neighbors to which the anycaster does not announce the prefix
+	(d) shortest_path_preference: True/False, as in "create_Rgraph_from_Topo(...)"
+	(e) cache: a SimulationCache (IF None, nothing is cached)
+	(f) topology_hash: the hash of the topology (see the function "get_topology_hash(...)"); computed if not given
+	(g) use_routing_engine: IF True, the routes are computed without BGP messages (see gao_rexford_routing.py); ELSE the BGP messages are simulated, and the routing information is cleared afterwards
+	(h) Rgraph_class: the class of the Rgraph, i.e., Rgraph (default) or CSRRgraph (see CSRRgraph.py)
+
+Returns:
+	A tuple (G, catchment), where G is the colored Rgraph and catchment is a dictionary (see the function "get_catchment_from_Topo(...)")
+'''
+def get_colored_Rgraph(Topo, anycasters, forbidden_neighbors=None, shortest_path_preference=False, cache=None, topology_hash=None, use_routing_engine=True, Rgraph_class=Rgraph):
+	if cache is not None:
+		if topology_hash is None:
+			topology_hash = get_topology_hash(Topo)
+		entry = cache.get_configuration(Topo, anycasters, forbidden_neighbors, shortest_path_preference, topology_hash=topology_hash)
+		if entry is not None:
+			G = create_Rgraph_from_structure(entry['nodes'], entry['edges'], entry['colors'], Rgraph_class=Rgraph_class)
+			if entry['colors'] is None:
+				G.set_probabilistic_coloring(anycasters)
+				cache.put_configuration(Topo, anycasters, forbidden_neighbors, shortest_path_preference, entry['catchment'], G, colored=True, topology_hash=topology_hash)
+			return (G, entry['catchment'])
+	if use_routing_engine:
+		routes = compute_anycast_routes(Topo, anycasters, forbidden_neighbors)
+		G = create_Rgraph_from_edges(anycasters, routes.get_Rgraph_edges(shortest_path_preference=shortest_path_preference), Rgraph_class=Rgraph_class)
+		catchment = get_catchment_from_routes(routes)
+	else:
+		try:
+			for ASN in anycasters:
+				Topo.add_prefix(ASN, PREFIX, forbidden_neighbors=(forbidden_neighbors or {}).get(ASN))
+			G = create_Rgraph_from_Topo(Topo, PREFIX, shortest_path_preference=shortest_path_preference, Rgraph_class=Rgraph_class)
+			catchment = get_catchment_from_Topo(Topo, PREFIX)
+		finally:
+			Topo.clear_routing_information()
+	G.set_probabilistic_coloring(anycasters)
+	if cache is not None:
+		cache.put_configuration(Topo, anycasters, forbidden_neighbors, shortest_path_preference, catchment, G, colored=True, topology_hash=topology_hash)
+	return (G, catchment)
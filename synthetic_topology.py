@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+#
+# Seeded generator of Internet-like AS-relationship graphs, written in the format of the CAIDA AS-relationship dataset (see BGPtopology.load_topology_from_csv), e.g., for benchmarks (see benchmark.py) and tests without the CAIDA files.
+# The graph has three tiers:
+#	(i) a clique of tier-1 ASes (peers of each other, without providers),
+#	(ii) transit ASes, with providers among the tier-1 and the earlier transit ASes, and
+#	(iii) stub ASes, with providers among the tier-1 and the transit ASes.
+# The providers of an AS are selected with probability proportional to (1 + their number of customers), i.e., preferential attachment, so the sizes of the customer cones follow a power law;
+# since every provider is created before its customers, there are no cycles of customer-provider links.
+# The transit ASes are grouped in regional peering cliques (e.g., the members of an IXP), where every pair peers with some probability, and some stubs peer with a transit AS of their region.
+# The same arguments (incl. the seed) always generate the same graph.
+#
+
+import random
+
+MAX_ASN = 400000	# the ASNs are drawn from 1...MAX_ASN (or more, for larger graphs)
+
+
+'''
+Generates a synthetic AS-relationship graph.
+
+Input arguments:
+	(a) nb_of_ASes: the number of ASes (e.g., 1000 to 100000)
+	(b) seed: the seed of the random generator
+	(c) nb_of_tier1: the number of tier-1 ASes (default: between 4 and 16, growing with the size of the graph)
+	(d) transit_fraction: the fraction of the (not tier-1) ASes that are transit ASes
+	(e) nb_of_regions: the number of regional peering cliques (default: one per 25 transit ASes)
+	(f) clique_peering_probability: the probability that two transit ASes of the same region peer
+	(g) stub_peering_probability: the probability that a stub peers with a transit AS of its region
+
+Returns:
+	A list of tuples (ASN1, ASN2, peering_type), with peering_type -1 if ASN2 is a customer of ASN1, or 0 if they are peers (as the CAIDA dataset); every pair of ASes appears at most once
+'''
+def generate_AS_relationships(nb_of_ASes, seed=0, nb_of_tier1=None, transit_fraction=0.15, nb_of_regions=None, clique_peering_probability=0.3, stub_peering_probability=0.05):
+	if nb_of_tier1 is None:
+		nb_of_tier1 = min(16, 4 + nb_of_ASes // 5000)
+	if nb_of_ASes <= nb_of_tier1:
+		raise Exception('The number of ASes must be larger than the number of tier-1 ASes: {}'.format(nb_of_ASes))
+	rnd = random.Random(seed)
+	ASNs = rnd.sample(range(1, max(MAX_ASN, 2*nb_of_ASes) + 1), nb_of_ASes)
+	nb_of_transit = int(round((nb_of_ASes - nb_of_tier1) * transit_fraction))
+	if nb_of_regions is None:
+		nb_of_regions = max(1, nb_of_transit // 25)
+	tier1 = list(range(nb_of_tier1))
+	transit = list(range(nb_of_tier1, nb_of_tier1 + nb_of_transit))
+	stubs = list(range(nb_of_tier1 + nb_of_transit, nb_of_ASes))
+
+	links = []
+	linked = set()
+	def add_link(i, j, peering_type):
+		if (i != j) and ((i, j) not in linked) and ((j, i) not in linked):
+			linked.add((i, j))
+			links.append((ASNs[i], ASNs[j], peering_type))
+
+	for k, i in enumerate(tier1):
+		for j in tier1[k+1:]:
+			add_link(i, j, 0)
+
+	provider_pool = list(tier1)	# every possible provider appears (1 + its number of customers) times
+	def add_providers(i, nb_of_providers):
+		providers = set()
+		for _ in range(10 * nb_of_providers):
+			providers.add(rnd.choice(provider_pool))
+			if len(providers) == nb_of_providers:
+				break
+		for p in sorted(providers):
+			add_link(p, i, -1)
+			provider_pool.append(p)
+
+	for i in transit:
+		add_providers(i, rnd.choice((1, 2, 2, 3, 3, 4)))
+		provider_pool.append(i)
+	for i in stubs:
+		add_providers(i, rnd.choice((1, 1, 1, 2, 2, 3)))
+
+	region = {i: rnd.randrange(nb_of_regions) for i in transit}
+	members = [[] for _ in range(nb_of_regions)]
+	for i in transit:
+		members[region[i]].append(i)
+	for clique in members:
+		for k, i in enumerate(clique):
+			for j in clique[k+1:]:
+				if rnd.random() < clique_peering_probability:
+					add_link(i, j, 0)
+	if transit:
+		for i in stubs:
+			if rnd.random() < stub_peering_probability:
+				clique = members[rnd.randrange(nb_of_regions)]
+				if clique:
+					add_link(rnd.choice(clique), i, 0)
+	return links
+
+
+'''
+Writes the given links (see the function "generate_AS_relationships(...)") to a file in the format of the CAIDA AS-relationship dataset, i.e., "ASN1|ASN2|peering_type|synthetic" per line, after a comment line with the given description.
+'''
+def write_AS_relationships(filename, links, description=''):
+	with open(filename, 'w') as f:
+		f.write('# synthetic AS-relationship graph {}\n'.format(description))
+		for (ASN1, ASN2, peering_type) in links:
+			f.write('{}|{}|{}|synthetic\n'.format(ASN1, ASN2, peering_type))
+
+
+'''
+Generates a synthetic AS-relationship graph (see the function "generate_AS_relationships(...)" for the arguments) and writes it to the given file.
+
+Returns:
+	The number of links
+'''
+def generate_topology_file(filename, nb_of_ASes, seed=0, **kwargs):
+	links = generate_AS_relationships(nb_of_ASes, seed=seed, **kwargs)
+	write_AS_relationships(filename, links, 'nb_of_ASes={} seed={}'.format(nb_of_ASes, seed))
+	return len(links)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+#
+#
+# This file is part of the BGPsimulator
+#
+
+import bz2
+import gc
+import gzip
+import io
+import itertools
+import json
+import random
+import re
+from contextlib import contextmanager
+import numpy as np
+
+JSON_WHITESPACE = re.compile(r'\s*')
+JSON_DELIMITER = re.compile(r'\s*([,:\]}])\s*')
+
+
+'''
+Report of a bulk loading of a topology file; instead of printing an error per line, the malformed, duplicate, and not valid rows are collected here.
+
+class variables:
+	(a) nb_of_lines:			integer - number of lines read (including comments)
+	(b) nb_of_links_added:		integer - number of links added to the topology
+	(c) nb_of_nodes_added:		integer - number of nodes added to the topology
+	(d) malformed_rows:			list of tuples (line number, line) - rows that could not be parsed (or links of a node with itself)
+	(e) duplicate_rows:			list of tuples (line number, ASN1, ASN2, peering_type) - rows of a link that already exists (in the file or in the topology)
+	(f) invalid_relation_rows:	list of tuples (line number, ASN1, ASN2, peering_type) - rows with a peering type other than -1 or 0
+'''
+class LoadReport:
+	def __init__(self):
+		self.nb_of_lines = 0
+		self.nb_of_links_added = 0
+		self.nb_of_nodes_added = 0
+		self.malformed_rows = []
+		self.duplicate_rows = []
+		self.invalid_relation_rows = []
+
+	def has_errors(self):
+		return bool(self.malformed_rows or self.duplicate_rows or self.invalid_relation_rows)
+
+	def print_info(self):
+		print('lines read: {}'.format(self.nb_of_lines))
+		print('nodes added: {}'.format(self.nb_of_nodes_added))
+		print('links added: {}'.format(self.nb_of_links_added))
+		print('malformed rows: {}'.format(len(self.malformed_rows)))
+		print('duplicate rows: {}'.format(len(self.duplicate_rows)))
+		print('rows with not valid peering relation: {}'.format(len(self.invalid_relation_rows)))
+
+	def __repr__(self):
+		return 'LoadReport(lines={}, nodes_added={}, links_added={}, malformed={}, duplicates={}, invalid_relations={})'.format(
+			self.nb_of_lines, self.nb_of_nodes_added, self.nb_of_links_added, len(self.malformed_rows), len(self.duplicate_rows), len(self.invalid_relation_rows))
+
+
+
+'''
+Context manager that pauses the (cyclic) garbage collector, e.g., while the objects of many nodes are created at once; the collections triggered by the new objects find nothing to collect, and they cost most of the time of the bulk insertion.
+'''
+@contextmanager
+def paused_garbage_collection():
+	enabled = gc.isenabled()
+	gc.disable()
+	try:
+		yield
+	finally:
+		if enabled:
+			gc.enable()
+
+
+'''
+Opens the given file for reading text; gzip (.gz) and bzip2 (.bz2) files are detected from their first bytes and decompressed on the fly.
+'''
+def open_text_file(file):
+	with open(file, 'rb') as f:
+		magic = f.read(3)
+	if magic[:2] == b'\x1f\x8b':
+		return gzip.open(file, 'rt')
+	if magic == b'BZh':
+		return bz2.open(file, 'rt')
+	return open(file, 'r')
+
+
+
+'''
+Reads a file with a JSON array or object (e.g., a PeeringDB-style dump) incrementally, and returns (as a generator) its elements (for an array) or its (key, value) pairs (for an object) one by one;
+i.e., only one element (and a chunk of the file) is kept in memory at a time, instead of the whole file and all the parsed elements.
+
+Input arguments:
+	(a) file: a string with the name of the file to be read (plain text, gzip or bzip2)
+	(b) chunk_size: the number of characters read at once
+'''
+def iter_json_items(file, chunk_size=1<<20):
+	decoder = json.JSONDecoder()
+	with open_text_file(file) as f:
+		buffer = ''
+		eof = False
+
+		def skip_whitespace(start):	# returns the position of the next not whitespace character (reading the next chunks, if needed)
+			nonlocal buffer, eof
+			start = JSON_WHITESPACE.match(buffer, start).end()
+			while (start == len(buffer)) and (not eof):
+				data = f.read(chunk_size)
+				eof = not data
+				buffer = data
+				start = JSON_WHITESPACE.match(buffer).end()
+			return start
+
+		start = skip_whitespace(0)
+		if (start == len(buffer)) or (buffer[start] not in '[{'):
+			raise ValueError('Not valid JSON: expected an array or an object')
+		is_object = (buffer[start] == '{')
+		closing = '}' if is_object else ']'
+		start = skip_whitespace(start+1)
+		if buffer.startswith(closing, start):
+			return
+
+		while True:		# parse the item that starts at "start"; IF it (or the delimiter after it) is not complete in the buffer, read the next chunk and parse it again
+			try:
+				position = JSON_WHITESPACE.match(buffer, start).end()
+				if is_object:
+					(key, position) = decoder.raw_decode(buffer, position)
+					match = JSON_DELIMITER.match(buffer, position)
+					if (match is None) or (match.group(1) != ':'):
+						raise ValueError('Not valid JSON: expected ":" at character {}'.format(position))
+					position = match.end()
+				(value, position) = decoder.raw_decode(buffer, position)
+				match = JSON_DELIMITER.match(buffer, position)	# a value that is not followed by a delimiter (e.g., a number at the end of the buffer) may continue in the next chunk
+				if (match is None) or (match.group(1) not in ','+closing):
+					raise ValueError('Not valid JSON: expected "," or "{}" at character {}'.format(closing, position))
+			except ValueError:
+				if eof:
+					raise
+				data = f.read(chunk_size)
+				eof = not data
+				buffer = buffer[start:] + data
+				start = 0
+				continue
+			yield (key, value) if is_object else value
+			if match.group(1) == closing:
+				return
+			start = match.end()
+
+
+
+'''
+Parses a chunk of lines of the "CAIDA AS-relationship dataset" format (ASN1|ASN2|peering_type|other_not_used_fields).
+The chunk is parsed at once with numpy; only if this fails, the lines are parsed one by one, to find the malformed ones.
+
+Returns:
+	A tuple (ASN1s, ASN2s, peering_types, line_numbers) of numpy arrays
+'''
+def _parse_CAIDA_chunk(lines, line_numbers, asn_as_str, report):
+	if not asn_as_str:
+		data = _parse_CAIDA_text(''.join(lines), len(lines))
+		if data is not None:
+			return data + (np.array(line_numbers, dtype=np.int64),)
+
+	ASN1s = []
+	ASN2s = []
+	peering_types = []
+	kept_line_numbers = []
+	for line, line_number in zip(lines, line_numbers):
+		row = line.rstrip('\r\n').split('|')
+		try:
+			if asn_as_str:
+				if (not row[0]) or (not row[1]):
+					raise ValueError
+				ASN1, ASN2 = row[0], row[1]
+			else:
+				ASN1, ASN2 = int(row[0]), int(row[1])
+			peering_type = int(row[2])
+		except (ValueError, IndexError):
+			report.malformed_rows.append((line_number, line.rstrip('\r\n')))
+			continue
+		ASN1s.append(ASN1)
+		ASN2s.append(ASN2)
+		peering_types.append(peering_type)
+		kept_line_numbers.append(line_number)
+	dtype = object if asn_as_str else np.int64
+	return (np.array(ASN1s, dtype=dtype), np.array(ASN2s, dtype=dtype), np.array(peering_types, dtype=np.int64), np.array(kept_line_numbers, dtype=np.int64))
+
+'''
+Parses at once (with numpy) the given text of the given number of lines (see the function "_parse_CAIDA_chunk(...)"), and returns a tuple (ASN1s, ASN2s, peering_types) of numpy arrays, or None if some lines are not parsed (e.g., they are malformed or empty).
+'''
+def _parse_CAIDA_text(text, nb_of_lines):
+	try:
+		data = np.loadtxt(io.StringIO(text), delimiter='|', usecols=(0,1,2), dtype=np.int64, ndmin=2, comments=None)
+	except ValueError:
+		return None
+	if len(data) != nb_of_lines:
+		return None
+	return (data[:,0], data[:,1], data[:,2])
+
+
+
+'''
+Reads all the rows of a file of the "CAIDA AS-relationship dataset" format, in chunks of lines (ignoring lines starting with "#", and empty lines).
+
+Input arguments:
+	(a) file: a string with the name of the file to be read (plain text, gzip or bzip2)
+	(b) asn_as_str: if True the ASNs are kept as strings, otherwise they are converted to integers
+	(c) chunk_size: the number of lines parsed at once
+	(d) report: a LoadReport where the malformed rows are added
+
+Returns:
+	A tuple (ASN1s, ASN2s, peering_types, line_numbers) of numpy arrays, with one element per (not malformed) row
+'''
+def read_CAIDA_rows(file, asn_as_str=False, chunk_size=200000, report=None):
+	if report is None:
+		report = LoadReport()
+	chunks = []
+	line_number = 0
+	with open_text_file(file) as f:
+		while True:
+			raw_lines = list(itertools.islice(f, chunk_size))
+			if not raw_lines:
+				break
+			if not asn_as_str:	# a chunk without comments (except for the first lines, e.g., the header of the file) and malformed or empty lines is parsed at once
+				nb_of_comments = 0
+				while (nb_of_comments < len(raw_lines)) and (raw_lines[nb_of_comments][0] == '#'):
+					nb_of_comments += 1
+				text = ''.join(raw_lines[nb_of_comments:])
+				data = _parse_CAIDA_text(text, len(raw_lines)-nb_of_comments) if ('#' not in text) and text else None
+				if data is not None:
+					chunks.append(data + (np.arange(line_number+nb_of_comments+1, line_number+len(raw_lines)+1, dtype=np.int64),))
+					line_number += len(raw_lines)
+					continue
+			lines = []
+			line_numbers = []
+			for line in raw_lines:
+				line_number += 1
+				if line[0] != '#' and line.strip():	# ignore lines starting with "#"
+					lines.append(line)
+					line_numbers.append(line_number)
+			if lines:
+				chunks.append(_parse_CAIDA_chunk(lines, line_numbers, asn_as_str, report))
+	report.nb_of_lines = line_number
+
+	if not chunks:
+		dtype = object if asn_as_str else np.int64
+		return (np.zeros(0, dtype=dtype), np.zeros(0, dtype=dtype), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+	return tuple(np.concatenate([c[k] for c in chunks]) for k in range(4))
+
+
+
+'''
+Reads all the (ASN1, ASN2, ...) tuples of a JSON file with a list of tuples (e.g., the IXP-based p2p links [ASN1, ASN2, ixp_id]), incrementally and in chunks (see the function "iter_json_items(...)"), as rows of p2p links (i.e., peering type 0).
+
+Input arguments:
+	(a) file: a string with the name of the file to be read (plain text, gzip or bzip2)
+	(b) chunk_size: the number of tuples kept in a chunk (i.e., in python lists) before they are converted to numpy arrays
+	(c) report: a LoadReport where the malformed tuples are added (with their position in the list, starting from 1, as line number)
+
+Returns:
+	A tuple (ASN1s, ASN2s, peering_types, line_numbers) of numpy arrays, as the function "read_CAIDA_rows(...)"
+'''
+def read_p2p_link_rows(file, chunk_size=200000, report=None):
+	if report is None:
+		report = LoadReport()
+	chunks = []
+	ASN1s = []
+	ASN2s = []
+	line_numbers = []
+	nb_of_tuples = 0
+	for t in iter_json_items(file):
+		nb_of_tuples += 1
+		if (not isinstance(t, list)) or (len(t) < 2):
+			report.malformed_rows.append((nb_of_tuples, json.dumps(t)))
+			continue
+		ASN1s.append(t[0])
+		ASN2s.append(t[1])
+		line_numbers.append(nb_of_tuples)
+		if len(ASN1s) >= chunk_size:
+			chunks.append((np.array(ASN1s), np.array(ASN2s), np.array(line_numbers, dtype=np.int64)))
+			ASN1s, ASN2s, line_numbers = [], [], []
+	if ASN1s or (not chunks):
+		chunks.append((np.array(ASN1s, dtype=None if ASN1s else np.int64), np.array(ASN2s, dtype=None if ASN2s else np.int64), np.array(line_numbers, dtype=np.int64)))
+	report.nb_of_lines = nb_of_tuples
+	(ASN1s, ASN2s, line_numbers) = tuple(np.concatenate([c[k] for c in chunks]) for k in range(3))
+	return (ASN1s, ASN2s, np.zeros(len(ASN1s), dtype=np.int64), line_numbers)
+
+
+
+'''
+Prepares a set of rows (e.g., from the method "read_CAIDA_rows(...)") for a bulk insertion in a topology, with the same result as calling the method "add_link(...)" of the topology for each row in sequence:
+	(i) the nodes are given in the order they first appear in the rows,
+	(ii) rows with a peering type other than -1 or 0, or with ASN1==ASN2, are not added as links (but their nodes are), and they are recorded in the report,
+	(iii) for every link (in either direction) only the first row is kept, and the rest are recorded in the report as duplicates,
+	(iv) the random preferences of the nodes for their new neighbors are drawn in the same order as with "add_link(...)" (i.e., for each kept row: first the preference of ASN1 for ASN2, and then of ASN2 for ASN1).
+
+Input arguments:
+	(a) ASN1s, ASN2s, peering_types, line_numbers: numpy arrays with one element per row
+	(b) report: a LoadReport where the not valid and duplicate rows are added
+	(c) existing_link: (optional) a function f(ASN1,ASN2) that returns True if the link already exists in the topology; the rows for such links are recorded as duplicates
+
+Returns:
+	A tuple (ASNs, first, second, peering_types, preferences), where
+		ASNs: 			list of the ASNs in the order of first appearance
+		first, second:	numpy arrays (int64) with the positions in "ASNs" of the two ends of each link to be added
+		peering_types:	numpy array (int8) with the peering type (-1 or 0) of each link to be added
+		preferences:	numpy array (float64) of shape (nb_of_links, 2) with the preferences of the first end for the second, and of the second for the first
+'''
+def dedupe_links(ASN1s, ASN2s, peering_types, line_numbers, report, existing_link=None):
+	nb_rows = len(ASN1s)
+	all_ASNs = np.empty(2*nb_rows, dtype=ASN1s.dtype)
+	all_ASNs[0::2] = ASN1s
+	all_ASNs[1::2] = ASN2s
+	if nb_rows == 0:
+		return ([], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int8), np.zeros((0,2), dtype=np.float64))
+	unique_ASNs, first_index, inverse = np.unique(all_ASNs, return_index=True, return_inverse=True)
+	order_of_appearance = np.argsort(first_index, kind='stable')
+	rank = np.empty(len(unique_ASNs), dtype=np.int64)
+	rank[order_of_appearance] = np.arange(len(unique_ASNs))
+	codes = rank[inverse.reshape(-1)]
+	ASNs = unique_ASNs[order_of_appearance].tolist()
+	first = codes[0::2]
+	second = codes[1::2]
+
+	valid_relation = (peering_types == -1) | (peering_types == 0)
+	self_link = (first == second)
+	for k in np.flatnonzero(~valid_relation):
+		report.invalid_relation_rows.append((int(line_numbers[k]), ASNs[first[k]], ASNs[second[k]], int(peering_types[k])))
+	for k in np.flatnonzero(valid_relation & self_link):
+		report.malformed_rows.append((int(line_numbers[k]), '{}|{}|{}'.format(ASNs[first[k]], ASNs[second[k]], peering_types[k])))
+
+	candidates = np.flatnonzero(valid_relation & ~self_link)
+	low = np.minimum(first[candidates], second[candidates]).astype(np.uint64)
+	high = np.maximum(first[candidates], second[candidates]).astype(np.uint64)
+	keys = (low << np.uint64(32)) | high
+	_, first_of_key = np.unique(keys, return_index=True)
+	is_first = np.zeros(len(candidates), dtype=bool)
+	is_first[first_of_key] = True
+	if existing_link is not None:
+		for k in np.flatnonzero(is_first):
+			row = candidates[k]
+			if existing_link(ASNs[first[row]], ASNs[second[row]]):
+				is_first[k] = False
+	for k in candidates[~is_first]:
+		report.duplicate_rows.append((int(line_numbers[k]), ASNs[first[k]], ASNs[second[k]], int(peering_types[k])))
+
+	kept = candidates[is_first]
+	preferences = np.fromiter(iter(random.random, None), dtype=np.float64, count=2*len(kept)).reshape(-1,2)	# (the callable-iterator never ends, since random.random() never returns None)
+	return (ASNs, first[kept], second[kept], peering_types[kept].astype(np.int8), preferences)